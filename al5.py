@@ -1,568 +1,399 @@
-import os
-import numpy as np
-import cv2
-from tkinter import Tk, Label, Button, filedialog, messagebox, simpledialog, Toplevel, Entry, StringVar
-import matplotlib.pyplot as plt
-
-def aplicar_transformacion(imagen, matriz_transformacion):
-    """
-    Aplica una transformación afín a la imagen utilizando una matriz de transformación.
-
-    Parámetros:
-        imagen (numpy.ndarray): Imagen de entrada a transformar.
-        matriz_transformacion (numpy.ndarray): Matriz de transformación afín (3x3).
-
-    Retorna:
-        numpy.ndarray: Imagen transformada.
-    """
-    filas, columnas = imagen.shape[:2]
-    imagen_transformada = np.zeros_like(imagen)
-    matriz_inversa = np.linalg.inv(matriz_transformacion)
-
-    for i in range(filas):
-        for j in range(columnas):
-            transformado = np.dot(matriz_inversa, [j, i, 1])
-            x_original, y_original = int(transformado[0]), int(transformado[1])
-            if 0 <= x_original < columnas and 0 <= y_original < filas:
-                imagen_transformada[i, j] = imagen[y_original, x_original]
-
-    return imagen_transformada
-
-def rotar(angulo, ancho, alto):
-    """
-    Crea una matriz de rotación respecto al centro de la imagen.
-
-    Parámetros:
-        angulo (float): Ángulo de rotación en grados.
-        ancho (int): Ancho de la imagen.
-        alto (int): Alto de la imagen.
-
-    Retorna:
-        numpy.ndarray: Matriz de rotación afín (3x3).
-    """
-    radianes = np.radians(angulo)
-    cos_theta, sin_theta = np.cos(radianes), np.sin(radianes)
-    matriz_rotacion = np.array([
-        [cos_theta, sin_theta, 0],
-        [-sin_theta, cos_theta, 0],
-        [0, 0, 1]
-    ])
-    centro_x, centro_y = ancho // 2, alto // 2
-    matriz_traslado_centro = np.array([
-        [1, 0, -centro_x],
-        [0, 1, -centro_y],
-        [0, 0, 1]
-    ])
-    matriz_traslado_origen = np.array([
-        [1, 0, centro_x],
-        [0, 1, centro_y],
-        [0, 0, 1]
-    ])
-    return np.dot(np.dot(matriz_traslado_origen, matriz_rotacion), matriz_traslado_centro)
-
-def escalar(factor_x, factor_y, ancho, alto):
-    """
-    Crea una matriz de escalado respecto al centro de la imagen.
+"""
+Punto de entrada del editor de imágenes.
+
+Sin argumentos abre la interfaz gráfica. Con argumentos funciona como línea de comandos por
+lotes, sin cargar Tk ni matplotlib, por ejemplo:
+
+    python -m al5 rotar --angulo 30 entrada/*.jpg -o salida/
+    python -m al5 escalar --factor-x 2 --factor-y 0.5 foto.png
+    python -m al5 reflejar --eje horizontal foto.png
+    python -m al5 trasladar --dx 10 --dy -5 foto.png
+    python -m al5 rotar --barrido angulo=0:360:5 foto.png
+    python -m al5 rotar --angulo 90 clip.mp4 "fotogramas/f_%04d.png"
+    python -m al5 rotar --angulo 30 --vigilar entrada/ -j 4 -o salida/
+    python -m al5 trabajos trabajos.json -j 4
+    python -m al5 servir --puerto 8080
+    python -m al5 compuesta --pasos "rotar:angulo=30;escalar:factor_x=2,factor_y=2" foto.png
+
+Importar este módulo no abre ninguna ventana; las funciones del núcleo se reexportan aquí.
+"""
+import argparse
+import glob
+import math
+import sys
+
+from transformaciones import (
+    ALIAS_TRANSFORMACIONES,
+    aplicar_transformacion,
+    aplicar_transformacion_lote,
+    aplicar_transformacion_por_bloques,
+    aplicar_transformacion_referencia,
+    combinaciones_barrido,
+    construir_matriz,
+    componer_transformaciones,
+    escalar,
+    interpretar_barrido,
+    interpretar_pasos,
+    reflejar,
+    rotar,
+    trasladar,
+    validar_invertible,
+)
+from mapas import (
+    INTERPOLACIONES,
+    PRECISIONES,
+    CacheMapas,
+    cache_mapas,
+    calcular_mapa,
+    coordenadas_origen,
+    remapear,
+    remapear_pila,
+)
+from metricas import RegistroMetricas, imprimir_resumen, validar_ruta_informe
+from procesamiento import (
+    mostrar_imagenes,
+    procesar_barrido,
+    procesar_imagen,
+    procesar_imagenes,
+    procesar_imagenes_en_flujo,
+    transformar_imagen,
+)
+
+
+def crear_parser():
+    """
+    Crea el analizador de argumentos de la línea de comandos.
+
+    Cada transformación es un subcomando con sus propios parámetros; también se aceptan los
+    nombres en inglés (rotate, scale, reflect, translate, pipeline).
 
-    Parámetros:
-        factor_x (float): Factor de escalado en el eje X.
-        factor_y (float): Factor de escalado en el eje Y.
-        ancho (int): Ancho de la imagen.
-        alto (int): Alto de la imagen.
+    No recibe parámetros.
 
     Retorna:
-        numpy.ndarray: Matriz de escalado afín (3x3).
+        argparse.ArgumentParser: Analizador configurado.
     """
-    matriz_escalado = np.array([
-        [factor_x, 0, 0],
-        [0, factor_y, 0],
-        [0, 0, 1]
-    ])
-
-    centro_x, centro_y = ancho // 2, alto // 2
-    matriz_traslado_centro = np.array([
-        [1, 0, -centro_x],
-        [0, 1, -centro_y],
-        [0, 0, 1]
-    ])
-    matriz_traslado_origen = np.array([
-        [1, 0, centro_x],
-        [0, 1, centro_y],
-        [0, 0, 1]
-    ])
-
-    return np.dot(np.dot(matriz_traslado_origen, matriz_escalado), matriz_traslado_centro)
-
-def reflejar(eje, ancho, alto):
-    """
-    Crea una matriz de reflexión respecto al centro de la imagen.
+    parser = argparse.ArgumentParser(
+        prog="al5",
+        description="Aplica transformaciones lineales a imágenes por lotes."
+    )
+    comunes = argparse.ArgumentParser(add_help=False)
+    comunes.add_argument("imagenes", nargs="*",
+                         help="Rutas o patrones de las imágenes de entrada, o vídeos y secuencias "
+                              "numeradas (p. ej. f_%%04d.png).")
+    comunes.add_argument("-o", "--salida", default=None,
+                         help="Carpeta raíz de salida (por defecto ./processed).")
+    comunes.add_argument("--mostrar", action="store_true",
+                         help="Muestra cada imagen con matplotlib (requiere pantalla).")
+    comunes.add_argument("-j", "--trabajadores", type=int, default=None,
+                         help="Procesa las imágenes en paralelo con N trabajadores.")
+    comunes.add_argument("--hilos", action="store_true",
+                         help="Usa un pool de hilos en lugar de procesos en modo paralelo.")
+    comunes.add_argument("--flujo", action="store_true",
+                         help="Lee, transforma y escribe a la vez en etapas con hilos (usa -j para el cálculo).")
+    comunes.add_argument("--hilos-lectura", type=int, default=2, help="Hilos de lectura en modo --flujo.")
+    comunes.add_argument("--hilos-escritura", type=int, default=2, help="Hilos de escritura en modo --flujo.")
+    comunes.add_argument("--bloque", type=int, default=None,
+                         help="Transforma por bloques de N píxeles de lado para acotar la memoria.")
+    comunes.add_argument("--metricas", default=None,
+                         help="Guarda un informe de tiempos por etapa en este archivo (.json o .csv).")
+    comunes.add_argument("--interpolacion", choices=INTERPOLACIONES, default="vecino",
+                         help="Método de interpolación (por defecto vecino).")
+    comunes.add_argument("--precision", choices=PRECISIONES, default="doble",
+                         help="'compacta' calcula en float32 y guarda los mapas en punto fijo, con menos "
+                              "memoria y una diferencia de 1 nivel como máximo al interpolar.")
+    comunes.add_argument("--expandir", "--expand", action="store_true",
+                         help="Ajusta el tamaño de salida para que quepa toda la imagen transformada.")
+    comunes.add_argument("--reanudar", "--resume", action="store_true",
+                         help="Salta las imágenes cuya salida ya está al día según el manifiesto.")
+    comunes.add_argument("--codec", default=None, metavar="FOURCC",
+                         help="Códec de los vídeos de salida (por defecto según la extensión, p. ej. mp4v).")
+    comunes.add_argument("--vigilar", "--watch", default=None, metavar="CARPETA",
+                         help="Vigila la carpeta y procesa cada imagen que llega, con un pool que sigue "
+                              "vivo entre lotes (usa -j y --hilos), hasta pulsar Ctrl+C.")
+    comunes.add_argument("--espera-estable", type=float, default=1.0, metavar="SEGUNDOS",
+                         help="Con --vigilar, segundos sin cambios para dar un archivo por completo.")
+    comunes.add_argument("--lote", type=int, default=32,
+                         help="Con --vigilar, imágenes por lote como máximo.")
+    comunes.add_argument("--barrido", "--sweep", action="append", default=[], metavar="PARAMETRO=VALORES",
+                         help="Genera una variante por valor, leyendo cada imagen una sola vez; "
+                              "p. ej. angulo=0:360:5 o factor_x=0.5,1,2. Se puede repetir.")
+
+    subparsers = parser.add_subparsers(dest="tipo", required=True)
+
+    parser_rotar = subparsers.add_parser("rotar", aliases=["rotate"], parents=[comunes],
+                                         help="Rota respecto al centro de la imagen.")
+    parser_rotar.add_argument("--angulo", "--angle", type=float, help="Ángulo de rotación en grados.")
+
+    parser_escalar = subparsers.add_parser("escalar", aliases=["scale"], parents=[comunes],
+                                           help="Escala respecto al centro de la imagen.")
+    parser_escalar.add_argument("--factor-x", type=float, help="Factor de escala en X.")
+    parser_escalar.add_argument("--factor-y", type=float, help="Factor de escala en Y.")
+
+    parser_reflejar = subparsers.add_parser("reflejar", aliases=["reflect"], parents=[comunes],
+                                            help="Refleja respecto al centro de la imagen.")
+    parser_reflejar.add_argument("--eje", "--axis", choices=["horizontal", "vertical"],
+                                 help="Eje de reflexión.")
+
+    parser_trasladar = subparsers.add_parser("trasladar", aliases=["translate"], parents=[comunes],
+                                             help="Desplaza la imagen.")
+    parser_trasladar.add_argument("--dx", type=float, help="Desplazamiento en X.")
+    parser_trasladar.add_argument("--dy", type=float, help="Desplazamiento en Y.")
+
+    parser_compuesta = subparsers.add_parser("compuesta", aliases=["pipeline"], parents=[comunes],
+                                             help="Encadena varias transformaciones en una sola pasada.")
+    parser_compuesta.add_argument("--pasos", "--steps", type=pasos_desde_texto, required=True,
+                                  help="Pasos separados por ';', p. ej. 'rotar:angulo=30;trasladar:dx=5,dy=0'.")
+
+    parser_trabajos = subparsers.add_parser("trabajos", aliases=["jobs"],
+                                            help="Ejecuta los trabajos de un archivo JSON, leyendo cada "
+                                                 "imagen una sola vez (ver el módulo trabajos).")
+    parser_trabajos.add_argument("archivo", help="Archivo JSON con la lista de trabajos.")
+    parser_trabajos.add_argument("-j", "--concurrencia", type=int, default=None,
+                                 help="Imágenes en proceso a la vez para todos los trabajos "
+                                      "(por defecto, la del archivo).")
+    parser_trabajos.add_argument("--hilos", action="store_true",
+                                 help="Usa un pool de hilos en lugar de procesos.")
+    parser_trabajos.add_argument("--reanudar", "--resume", action="store_true",
+                                 help="Salta las imágenes cuya salida ya está al día según el manifiesto.")
+
+    parser_servir = subparsers.add_parser("servir", aliases=["serve"],
+                                          help="Atiende transformaciones por HTTP con el motor en memoria "
+                                               "(ver el módulo servidor).")
+    parser_servir.add_argument("--anfitrion", "--host", default="127.0.0.1",
+                               help="Dirección en la que escucha (por defecto solo la máquina local).")
+    parser_servir.add_argument("--puerto", "--port", type=int, default=8080, help="Puerto TCP (por defecto 8080).")
+    parser_servir.add_argument("--ventana-ms", type=float, default=2.0,
+                               help="Milisegundos que se esperan peticiones iguales para calcularlas juntas.")
+    parser_servir.add_argument("--lote", type=int, default=16, help="Imágenes por lote como máximo.")
+    parser_servir.add_argument("-j", "--hilos", type=int, default=None,
+                               help="Hilos que calculan los lotes (por defecto, uno por núcleo).")
+    parser_servir.add_argument("--registrar", "--log", action="store_true",
+                               help="Muestra cada petición en la consola.")
+
+    return parser
+
+
+def pasos_desde_texto(texto):
+    """
+    Interpreta el argumento --pasos y convierte los errores en mensajes de argparse.
 
     Parámetros:
-        eje (str): Eje de reflexión ('horizontal' o 'vertical').
-        ancho (int): Ancho de la imagen.
-        alto (int): Alto de la imagen.
+        texto (str): Especificación de pasos (ver `interpretar_pasos`).
 
     Retorna:
-        numpy.ndarray: Matriz de reflexión afín (3x3).
+        list: Lista de pares (tipo_transformacion, parametros).
 
     Excepciones:
-        ValueError: Si el eje proporcionado no es 'horizontal' o 'vertical'.
+        argparse.ArgumentTypeError: Si la especificación no es válida.
     """
-    if eje == 'horizontal':
-        matriz_reflexion = np.array([
-            [1, 0, 0],
-            [0, -1, 0],
-            [0, 0, 1]
-        ])
-    elif eje == 'vertical':
-        matriz_reflexion = np.array([
-            [-1, 0, 0],
-            [0, 1, 0],
-            [0, 0, 1]
-        ])
-    else:
-        raise ValueError("Eje no válido. Usa 'horizontal' o 'vertical'.")
-
-    centro_x, centro_y = ancho // 2, alto // 2
-    matriz_traslado_centro = np.array([
-        [1, 0, -centro_x],
-        [0, 1, -centro_y],
-        [0, 0, 1]
-    ])
-    matriz_traslado_origen = np.array([
-        [1, 0, centro_x],
-        [0, 1, centro_y],
-        [0, 0, 1]
-    ])
-
-    return np.dot(np.dot(matriz_traslado_origen, matriz_reflexion), matriz_traslado_centro)
+    try:
+        return interpretar_pasos(texto)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error))
 
 
-def trasladar(dx, dy):
+def parametros_desde_argumentos(tipo, argumentos):
     """
-    Crea una matriz de traslación.
+    Extrae de los argumentos de la línea de comandos los parámetros de la transformación.
 
     Parámetros:
-        dx (float): Desplazamiento en el eje X.
-        dy (float): Desplazamiento en el eje Y.
+        tipo (str): Tipo de transformación ('rotar', 'escalar', 'reflejar', 'trasladar' o 'compuesta').
+        argumentos (argparse.Namespace): Argumentos ya analizados.
 
     Retorna:
-        numpy.ndarray: Matriz de traslación afín (3x3).
-    """
-    return np.array([
-        [1, 0, dx],
-        [0, 1, dy],
-        [0, 0, 1]
-    ])
-
-
-def iniciar_procesamiento():
-    """
-    Inicia el proceso de transformación de imágenes seleccionadas.
-
-    Verifica si el usuario ha seleccionado imágenes. Si no se han seleccionado, muestra un cuadro de advertencia.
-    Si hay imágenes seleccionadas, muestra un cuadro de información con instrucciones sobre cómo proceder.
-
-    Excepciones:
-        Muestra una advertencia si no hay imágenes seleccionadas.
-
-    No retorna ningún valor.
-    """
-    if not imagenes_seleccionadas:
-        messagebox.showwarning("Sin imágenes", "Por favor, selecciona imágenes primero.")
-        return
-
-    messagebox.showinfo(
-        "Instrucciones", 
-        "Selecciona una transformación (Rotar, Escalar, Reflejar o Trasladar) para continuar."
-    )
-
-        
-def mostrar_imagenes(imagen_original, imagen_transformada):
-    """
-    Muestra la imagen original y la imagen transformada en una ventana de visualización.
-
-    Utiliza matplotlib para mostrar ambas imágenes lado a lado, facilitando la comparación
-    entre la imagen original y la transformada.
-
-    Parámetros:
-        imagen_original (numpy.ndarray): Imagen original antes de aplicar la transformación.
-        imagen_transformada (numpy.ndarray): Imagen resultante después de aplicar la transformación.
-
-    No retorna ningún valor.
-    """
-    plt.figure(figsize=(10, 5))
-
-    plt.subplot(1, 2, 1)
-    plt.imshow(cv2.cvtColor(imagen_original, cv2.COLOR_BGR2RGB))
-    plt.title("Imagen Original")
-    plt.axis("off")
-
-    plt.subplot(1, 2, 2)
-    plt.imshow(cv2.cvtColor(imagen_transformada, cv2.COLOR_BGR2RGB))
-    plt.title("Imagen Transformada")
-    plt.axis("off")
-
-    plt.tight_layout()
-    plt.show()
-
-
-def procesar_imagenes(imagenes, tipo_transformacion, **parametros):
-    """
-    Aplica una transformación seleccionada a una lista de imágenes y guarda los resultados.
-
-    Crea directorios para almacenar las imágenes procesadas según el tipo de transformación.
-    Carga cada imagen, aplica la transformación especificada y guarda la imagen resultante
-    en el directorio correspondiente.
-
-    Parámetros:
-        imagenes (list): Lista de rutas de las imágenes a procesar.
-        tipo_transformacion (str): Tipo de transformación a aplicar. Puede ser 'rotar', 'escalar',
-                                   'reflejar' o 'trasladar'.
-        **parametros: Parámetros adicionales necesarios según el tipo de transformación:
-            - Para 'rotar': angulo (float) - Ángulo de rotación en grados.
-            - Para 'escalar': factor_x (float), factor_y (float) - Factores de escala en X e Y.
-            - Para 'reflejar': eje (str) - Eje de reflexión ('horizontal' o 'vertical').
-            - Para 'trasladar': dx (float), dy (float) - Desplazamientos en X e Y.
-
-    Excepciones:
-        ValueError: Si el tipo de transformación no es válido.
-
-    No retorna ningún valor.
-    """
-    upload_path = os.path.join(os.getcwd(), "processed")
-    os.makedirs(upload_path, exist_ok=True)
-
-    carpeta_tipo = os.path.join(upload_path, tipo_transformacion)
-    os.makedirs(carpeta_tipo, exist_ok=True)
-
-    for ruta_entrada in imagenes:
-        imagen_original = cv2.imread(ruta_entrada)
-        if imagen_original is None:
-            print(f"No se pudo cargar la imagen desde {ruta_entrada}.")
-            continue
-
-        filas, columnas = imagen_original.shape[:2]
-
-        if tipo_transformacion == "rotar":
-            angulo = parametros['angulo']
-            matriz = rotar(angulo, columnas, filas)
-        elif tipo_transformacion == "escalar":
-            factor_x = parametros['factor_x']
-            factor_y = parametros['factor_y']
-            matriz = escalar(factor_x, factor_y, columnas, filas)
-        elif tipo_transformacion == "reflejar":
-            eje = parametros['eje']
-            matriz = reflejar(eje, columnas, filas)
-        elif tipo_transformacion == "trasladar":
-            dx = parametros['dx']
-            dy = parametros['dy']
-            matriz = trasladar(dx, dy)
-        else:
-            raise ValueError("Transformación no válida")
-
-        imagen_transformada = aplicar_transformacion(imagen_original, matriz)
-
-        mostrar_imagenes(imagen_original, imagen_transformada)
-
-        nombre_archivo = os.path.basename(ruta_entrada)
-        output_path = os.path.join(carpeta_tipo, nombre_archivo)
-        cv2.imwrite(output_path, imagen_transformada)
-        print(f"Procesada y guardada en: {output_path}")
-
-
-def seleccionar_imagenes():
-    """
-    Abre un cuadro de diálogo para que el usuario seleccione imágenes y almacena las rutas seleccionadas.
-
-    Utiliza un cuadro de diálogo de archivo para permitir al usuario seleccionar múltiples imágenes.
-    Si se seleccionan imágenes, muestra un mensaje informando la cantidad de imágenes cargadas.
-    Si no se seleccionan imágenes, muestra una advertencia.
-
-    No recibe parámetros.
-
-    Variables globales:
-        imagenes_seleccionadas (list): Almacena las rutas de las imágenes seleccionadas por el usuario.
-
-    No retorna ningún valor.
-    """
-    global imagenes_seleccionadas
-    imagenes_seleccionadas = filedialog.askopenfilenames(
-        title="Seleccionar imágenes",
-        filetypes=[("Imágenes", "*.jpeg;*.jpg;*.png")]
-    )
-    if imagenes_seleccionadas:
-        messagebox.showinfo("Imágenes seleccionadas", f"{len(imagenes_seleccionadas)} imágenes cargadas.")
-    else:
-        messagebox.showwarning("Sin selección", "No se seleccionaron imágenes.")
-
-
-
-
-def iniciar_procesamiento():
-    """
-    Solicita al usuario el tipo de transformación a aplicar y procesa las imágenes seleccionadas.
-
-    Verifica si hay imágenes seleccionadas antes de continuar. Si no hay imágenes, muestra una advertencia.
-    Solicita al usuario que elija el tipo de transformación (rotar, escalar, reflejar o trasladar) y los
-    parámetros necesarios según la transformación seleccionada. Luego, llama a la función `procesar_imagenes`
-    para aplicar la transformación.
-
-    Excepciones:
-        Muestra un cuadro de error si el tipo de transformación no es válido.
-        Muestra un cuadro de advertencia si no hay imágenes seleccionadas.
-
-    No recibe parámetros.
-
-    No retorna ningún valor.
+        dict: Parámetros con los nombres que espera `procesar_imagenes`.
     """
-    if not imagenes_seleccionadas:
-        messagebox.showwarning("Sin imágenes", "Por favor, selecciona imágenes primero.")
-        return
-
-    tipo = simpledialog.askstring("Transformación", "Ingresa el tipo de transformación (rotar, escalar, reflejar, trasladar):")
     if tipo == "rotar":
-        angulo = float(simpledialog.askstring("Ángulo", "Ingresa el ángulo de rotación (grados):"))
-        procesar_imagenes(imagenes_seleccionadas, tipo_transformacion="rotar", angulo=angulo)
+        return {"angulo": argumentos.angulo}
     elif tipo == "escalar":
-        factor_x = float(simpledialog.askstring("Escala X", "Ingresa el factor de escalado en X:"))
-        factor_y = float(simpledialog.askstring("Escala Y", "Ingresa el factor de escalado en Y:"))
-        procesar_imagenes(imagenes_seleccionadas, tipo_transformacion="escalar", factor_x=factor_x, factor_y=factor_y)
+        return {"factor_x": argumentos.factor_x, "factor_y": argumentos.factor_y}
     elif tipo == "reflejar":
-        eje = simpledialog.askstring("Reflejo", "Ingresa el eje de reflexión ('horizontal' o 'vertical'):")
-        procesar_imagenes(imagenes_seleccionadas, tipo_transformacion="reflejar", eje=eje)
+        return {"eje": argumentos.eje}
     elif tipo == "trasladar":
-        dx = float(simpledialog.askstring("Desplazamiento X", "Ingresa el desplazamiento en X:"))
-        dy = float(simpledialog.askstring("Desplazamiento Y", "Ingresa el desplazamiento en Y:"))
-        procesar_imagenes(imagenes_seleccionadas, tipo_transformacion="trasladar", dx=dx, dy=dy)
+        return {"dx": argumentos.dx, "dy": argumentos.dy}
     else:
-        messagebox.showerror("Error", "Tipo de transformación no reconocido.")
-        return
-
-    messagebox.showinfo("Procesamiento completo", "Las imágenes se han procesado.")
-
+        return {"pasos": argumentos.pasos}
 
-def abrir_rotar():
-    """
-    Crea una ventana emergente para ingresar el ángulo de rotación de una imagen.
-
-    La ventana incluye una entrada de texto para el ángulo y un botón para aplicar la rotación.
-    Al presionar el botón, se llama a la función `aplicar_rotar` para procesar la imagen seleccionada.
 
-    No recibe parámetros.
-    
-    No retorna ningún valor.
-    """ 
-    ventana = Toplevel()
-    ventana.title("Rotar Imagen")
-    Label(ventana, text="Ángulo de rotación (grados):").pack()
-    angulo = StringVar()
-    Entry(ventana, textvariable=angulo).pack()
-    Button(ventana, text="Aplicar", command=lambda: aplicar_rotar(ventana, angulo)).pack()
-
-def aplicar_rotar(ventana, angulo):
+def expandir_rutas(patrones):
     """
-    Aplica la transformación de rotación a las imágenes seleccionadas según el ángulo proporcionado.
+    Expande los patrones de archivo que el intérprete de comandos no haya expandido.
 
     Parámetros:
-        ventana (tkinter.Toplevel): Ventana emergente que será cerrada después de aplicar la rotación.
-        angulo (tkinter.StringVar): Variable de tipo cadena que contiene el ángulo de rotación ingresado por el usuario.
-
-    Excepciones:
-        ValueError: Muestra un cuadro de error si el valor ingresado no es numérico.
+        patrones (list): Rutas o patrones tipo glob.
 
-    No retorna ningún valor.
-    """
-    try:
-        angulo_valor = float(angulo.get())
-        procesar_imagenes(imagenes_seleccionadas, tipo_transformacion="rotar", angulo=angulo_valor)
-        ventana.destroy()
-    except ValueError:
-        messagebox.showerror("Error", "Por favor, ingresa un valor numérico para el ángulo.")
-
-def abrir_escalar():
+    Retorna:
+        list: Rutas resultantes, en el orden recibido.
     """
-    Crea una ventana emergente para ingresar los factores de escala en los ejes X e Y.
+    rutas = []
+    for patron in patrones:
+        coincidencias = sorted(glob.glob(patron)) if glob.has_magic(patron) else []
+        rutas.extend(coincidencias or [patron])
+    return rutas
 
-    La ventana incluye entradas de texto para los factores de escala y un botón para aplicar la transformación.
-    Al presionar el botón, se llama a la función `aplicar_escalar` para procesar la imagen seleccionada.
 
-    No recibe parámetros.
-    
-    No retorna ningún valor.
-    """
-    ventana = Toplevel()
-    ventana.title("Escalar Imagen")
-    Label(ventana, text="Factor de escala en X:").pack()
-    factor_x = StringVar()
-    Entry(ventana, textvariable=factor_x).pack()
-    Label(ventana, text="Factor de escala en Y:").pack()
-    factor_y = StringVar()
-    Entry(ventana, textvariable=factor_y).pack()
-    Button(ventana, text="Aplicar", command=lambda: aplicar_escalar(ventana, factor_x, factor_y)).pack()
-
-def aplicar_escalar(ventana, factor_x, factor_y):
+def main(argv=None):
     """
-    Aplica la transformación de escalado a las imágenes seleccionadas según los factores proporcionados.
+    Ejecuta la línea de comandos; sin argumentos abre la interfaz gráfica.
 
     Parámetros:
-        ventana (tkinter.Toplevel): Ventana emergente que será cerrada después de aplicar la transformación.
-        factor_x (tkinter.StringVar): Factor de escala en el eje X ingresado por el usuario.
-        factor_y (tkinter.StringVar): Factor de escala en el eje Y ingresado por el usuario.
+        argv (list): Argumentos a analizar. Por defecto se usan los de `sys.argv`.
 
-    Excepciones:
-        ValueError: Muestra un cuadro de error si los valores ingresados no son numéricos.
-
-    No retorna ningún valor.
-    """
+    Retorna:
+        int: Código de salida (0 si todas las imágenes se procesaron, 1 si alguna falló).
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        from interfaz import iniciar_interfaz
+        iniciar_interfaz()
+        return 0
+
+    parser = crear_parser()
+    argumentos = parser.parse_args(argv)
+    if argumentos.tipo in ("servir", "serve"):
+        from servidor import servir
+        try:
+            servir(argumentos.anfitrion, argumentos.puerto, argumentos.ventana_ms / 1000, argumentos.lote,
+                   argumentos.hilos, argumentos.registrar)
+        except (OSError, OverflowError) as error:
+            parser.error(f"no se pudo escuchar en {argumentos.anfitrion}:{argumentos.puerto}: {error}")
+        return 0
+    if argumentos.tipo in ("trabajos", "jobs"):
+        from trabajos import cargar_trabajos, ejecutar_trabajos
+        try:
+            trabajos, concurrencia = cargar_trabajos(argumentos.archivo)
+        except (OSError, ValueError) as error:
+            parser.error(str(error))
+        guardadas = ejecutar_trabajos(trabajos, concurrencia=argumentos.concurrencia or concurrencia,
+                                      ejecutor="hilos" if argumentos.hilos else "procesos",
+                                      reanudar=argumentos.reanudar)
+        return 0 if all(len(guardadas[trabajo.nombre]) == len(trabajo.entradas) for trabajo in trabajos) else 1
+
+    tipo = ALIAS_TRANSFORMACIONES.get(argumentos.tipo, argumentos.tipo)
     try:
-        fx = float(factor_x.get())
-        fy = float(factor_y.get())
-        procesar_imagenes(imagenes_seleccionadas, tipo_transformacion="escalar", factor_x=fx, factor_y=fy)
-        ventana.destroy()
-    except ValueError:
-        messagebox.showerror("Error", "Por favor, ingresa valores numéricos para los factores de escala.")
-
-def abrir_reflejar():
-    """
-    Crea una ventana emergente para seleccionar el eje de reflexión ('horizontal' o 'vertical').
-
-    La ventana incluye una entrada de texto para el eje y un botón para aplicar la reflexión.
-    Al presionar el botón, se llama a la función `aplicar_reflejar` para procesar la imagen seleccionada.
-
-    No recibe parámetros.
-    
-    No retorna ningún valor.
-    """
-    ventana = Toplevel()
-    ventana.title("Reflejar Imagen")
-    Label(ventana, text="Eje de reflexión ('horizontal' o 'vertical')").pack()
-    eje = StringVar()
-    Entry(ventana, textvariable=eje).pack()
-    Button(ventana, text="Aplicar", command=lambda: aplicar_reflejar(ventana, eje)).pack()
-
-def aplicar_reflejar(ventana, eje):
-    """
-    Aplica la transformación de reflexión a las imágenes seleccionadas según el eje proporcionado.
-
-    Parámetros:
-        ventana (tkinter.Toplevel): Ventana emergente que será cerrada después de aplicar la reflexión.
-        eje (tkinter.StringVar): Eje de reflexión ingresado por el usuario ('horizontal' o 'vertical').
-
-    Excepciones:
-        ValueError: Muestra un cuadro de error si el eje ingresado no es válido.
-
-    No retorna ningún valor.
-    """
-    eje_valor = eje.get().strip().lower()
-    if eje_valor in ["horizontal", "vertical"]:
-        procesar_imagenes(imagenes_seleccionadas, tipo_transformacion="reflejar", eje=eje_valor)
-        ventana.destroy()
-    else:
-        messagebox.showerror("Error", "Eje no válido. Usa 'horizontal' o 'vertical'.")
-
-def abrir_trasladar():
-    """
-    Crea una ventana emergente para ingresar los desplazamientos en los ejes X e Y.
-
-    La ventana incluye entradas de texto para los desplazamientos y un botón para aplicar la traslación.
-    Al presionar el botón, se llama a la función `aplicar_trasladar` para procesar la imagen seleccionada.
-
-    No recibe parámetros.
-    
-    No retorna ningún valor.
-    """
-
-    ventana = Toplevel()
-    ventana.title("Trasladar Imagen")
-    Label(ventana, text="Desplazamiento en X:").pack()
-    dx = StringVar()
-    Entry(ventana, textvariable=dx).pack()
-    Label(ventana, text="Desplazamiento en Y:").pack()
-    dy = StringVar()
-    Entry(ventana, textvariable=dy).pack()
-    Button(ventana, text="Aplicar", command=lambda: aplicar_trasladar(ventana, dx, dy)).pack()
-
-def aplicar_trasladar(ventana, dx, dy):
-    """
-    Aplica la transformación de traslación a las imágenes seleccionadas según los desplazamientos proporcionados.
-
-    Parámetros:
-        ventana (tkinter.Toplevel): Ventana emergente que será cerrada después de aplicar la traslación.
-        dx (tkinter.StringVar): Desplazamiento en el eje X ingresado por el usuario.
-        dy (tkinter.StringVar): Desplazamiento en el eje Y ingresado por el usuario.
-
-    Excepciones:
-        ValueError: Muestra un cuadro de error si los valores ingresados no son numéricos.
-
-    No retorna ningún valor.
-    """
+        barrido = interpretar_barrido(argumentos.barrido)
+    except ValueError as error:
+        parser.error(str(error))
+    if barrido and argumentos.reanudar:
+        parser.error("--reanudar no admite --barrido: las variantes no se anotan en el manifiesto")
+    parametros = parametros_desde_argumentos(tipo, argumentos)
+    faltantes = [nombre for nombre, valor in parametros.items() if valor is None and nombre not in barrido]
+    if faltantes:
+        opciones = ", ".join("--" + nombre.replace("_", "-") for nombre in faltantes)
+        parser.error(f"faltan los parámetros {opciones} (o un --barrido de ellos)")
     try:
-        dx_valor = float(dx.get())
-        dy_valor = float(dy.get())
-        procesar_imagenes(imagenes_seleccionadas, tipo_transformacion="trasladar", dx=dx_valor, dy=dy_valor)
-        ventana.destroy()
-    except ValueError:
-        messagebox.showerror("Error", "Por favor, ingresa valores numéricos para el desplazamiento.")
-
-
-imagenes_seleccionadas = []
-"""
-Variable global que almacena las rutas de las imágenes seleccionadas por el usuario.
-"""
-
-def seleccionar_imagenes():
-    """
-    Abre un cuadro de diálogo para que el usuario seleccione imágenes y almacena las rutas seleccionadas.
-
-    Utiliza el cuadro de diálogo de archivo proporcionado por `filedialog` para permitir al usuario
-    seleccionar múltiples imágenes. Si se seleccionan imágenes, muestra un mensaje informando la cantidad
-    de imágenes cargadas. Si no se seleccionan imágenes, muestra una advertencia.
-
-    Variables globales:
-        imagenes_seleccionadas (list): Almacena las rutas de las imágenes seleccionadas por el usuario.
-
-    No recibe parámetros.
-    
-    No retorna ningún valor.
-    """
-
-    global imagenes_seleccionadas
-    imagenes_seleccionadas = filedialog.askopenfilenames(
-        title="Seleccionar imágenes",
-        filetypes=[("Imágenes", "*.jpeg;*.jpg;*.png")]
-    )
-    if imagenes_seleccionadas:
-        messagebox.showinfo("Imágenes seleccionadas", f"{len(imagenes_seleccionadas)} imágenes cargadas.")
+        fijos = {nombre: valor for nombre, valor in parametros.items() if nombre not in barrido}
+        for combinacion in combinaciones_barrido(barrido, **fijos):
+            validar_invertible(tipo, **combinacion)
+    except ValueError as error:
+        parser.error(str(error))
+    if argumentos.vigilar:
+        if argumentos.imagenes or barrido:
+            parser.error("--vigilar no admite rutas de imágenes ni --barrido")
+        from vigilancia import VigilanteCarpeta
+        try:
+            vigilante = VigilanteCarpeta(
+                argumentos.vigilar,
+                tipo_transformacion=tipo,
+                directorio_salida=argumentos.salida,
+                trabajadores=argumentos.trabajadores,
+                ejecutor="hilos" if argumentos.hilos else "procesos",
+                espera_estable=argumentos.espera_estable,
+                tamano_lote=argumentos.lote,
+                tam_bloque=argumentos.bloque,
+                interpolacion=argumentos.interpolacion,
+                expandir=argumentos.expandir,
+                precision=argumentos.precision,
+                **parametros
+            )
+        except ValueError as error:
+            parser.error(str(error))
+        vigilante.ejecutar()
+        return 0
+    if not argumentos.imagenes:
+        parser.error("indica al menos una imagen, o una carpeta con --vigilar")
+    if argumentos.metricas:
+        try:
+            validar_ruta_informe(argumentos.metricas)
+        except ValueError as error:
+            parser.error(str(error))
+
+    imagenes = expandir_rutas(argumentos.imagenes)
+    registro = RegistroMetricas() if argumentos.metricas else None
+
+    from video import es_video, procesar_videos
+    videos = [ruta for ruta in imagenes if es_video(ruta)]
+    if videos:
+        if len(videos) != len(imagenes) or barrido:
+            parser.error("los vídeos y secuencias no se pueden mezclar con imágenes ni con --barrido")
+        try:
+            guardados = procesar_videos(videos, tipo_transformacion=tipo, directorio_salida=argumentos.salida,
+                                        interpolacion=argumentos.interpolacion, expandir=argumentos.expandir,
+                                        codec=argumentos.codec, precision=argumentos.precision, **parametros)
+        except ValueError as error:
+            parser.error(str(error))
+        return 0 if len(guardados) == len(videos) else 1
+
+    if barrido:
+        try:
+            guardadas = procesar_barrido(
+                imagenes,
+                tipo_transformacion=tipo,
+                barrido=barrido,
+                directorio_salida=argumentos.salida,
+                trabajadores=argumentos.trabajadores,
+                ejecutor="hilos" if argumentos.hilos else "procesos",
+                tam_bloque=argumentos.bloque,
+                interpolacion=argumentos.interpolacion,
+                metricas=registro,
+                expandir=argumentos.expandir,
+                precision=argumentos.precision,
+                **parametros
+            )
+        except ValueError as error:
+            parser.error(str(error))
+        if registro is not None:
+            imprimir_resumen(registro.guardar(argumentos.metricas))
+        variantes = math.prod(len(valores) for valores in barrido.values())
+        return 0 if len(guardadas) == len(imagenes) * variantes else 1
+
+    if argumentos.flujo:
+        guardadas = procesar_imagenes_en_flujo(
+            imagenes,
+            tipo_transformacion=tipo,
+            directorio_salida=argumentos.salida,
+            hilos_lectura=argumentos.hilos_lectura,
+            hilos_calculo=argumentos.trabajadores or 2,
+            hilos_escritura=argumentos.hilos_escritura,
+            tam_bloque=argumentos.bloque,
+            interpolacion=argumentos.interpolacion,
+            metricas=registro,
+            expandir=argumentos.expandir,
+            reanudar=argumentos.reanudar,
+            precision=argumentos.precision,
+            **parametros
+        )
     else:
-        messagebox.showwarning("Sin selección", "No se seleccionaron imágenes.")
-
-root = Tk()  # Crear ventana principal
-root.title("Editor de Imágenes")  # Establecer título de la ventana
-root.geometry("300x300")  # Establecer tamaño de la ventana
-
-# Etiqueta descriptiva
-label = Label(root, text="Editor de imágenes\nSelecciona y transforma imágenes fácilmente", wraplength=250, pady=20)
-label.pack()  # Colocar la etiqueta en la ventana
-
-# Botón para seleccionar imágenes
-boton_cargar = Button(root, text="Seleccionar Imágenes", command=seleccionar_imagenes, bg="lightblue", padx=10, pady=5)
-boton_cargar.pack(pady=10)  # Colocar el botón en la ventana
-
-# Botón para abrir la ventana de rotación
-boton_rotar = Button(root, text="Rotar", command=abrir_rotar, bg="lightgreen", padx=10, pady=5)
-boton_rotar.pack(pady=5)  # Colocar el botón en la ventana
-
-# Botón para abrir la ventana de escalado
-boton_escalar = Button(root, text="Escalar", command=abrir_escalar, bg="lightgreen", padx=10, pady=5)
-boton_escalar.pack(pady=5)  # Colocar el botón en la ventana
-
-# Botón para abrir la ventana de reflexión
-boton_reflejar = Button(root, text="Reflejar", command=abrir_reflejar, bg="lightgreen", padx=10, pady=5)
-boton_reflejar.pack(pady=5)  # Colocar el botón en la ventana
-
-# Botón para abrir la ventana de traslación
-boton_trasladar = Button(root, text="Trasladar", command=abrir_trasladar, bg="lightgreen", padx=10, pady=5)
-boton_trasladar.pack(pady=5)  # Colocar el botón en la ventana
-
-root.mainloop()  # Iniciar el bucle principal de la aplicación
+        guardadas = procesar_imagenes(
+            imagenes,
+            tipo_transformacion=tipo,
+            mostrar=argumentos.mostrar,
+            directorio_salida=argumentos.salida,
+            trabajadores=argumentos.trabajadores,
+            ejecutor="hilos" if argumentos.hilos else "procesos",
+            tam_bloque=argumentos.bloque,
+            interpolacion=argumentos.interpolacion,
+            metricas=registro,
+            expandir=argumentos.expandir,
+            reanudar=argumentos.reanudar,
+            precision=argumentos.precision,
+            **parametros
+        )
+
+    if registro is not None:
+        imprimir_resumen(registro.guardar(argumentos.metricas))
+    return 0 if len(guardadas) == len(imagenes) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
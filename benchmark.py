@@ -0,0 +1,307 @@
+"""
+Banco de pruebas de rendimiento del motor de transformaciones y del procesamiento por lotes.
+
+Genera imágenes sintéticas reproducibles (semilla fija) de varios tamaños y canales y mide:
+
+    extremo_a_extremo  construir la matriz y aplicar_transformacion sin caché.
+    solo_remapeo       remapear con el mapa ya calculado (lo que cuesta una imagen repetida).
+    solo_remapeo_compacta  lo mismo con el mapa en precisión 'compacta' (float32 y punto fijo).
+    opencv             cv2.warpAffine con la misma matriz, como referencia externa.
+    lote               procesar_imagenes sobre archivos PNG en disco, por imagen.
+
+Los resultados se guardan en JSON para comparar dos versiones del código:
+
+    python benchmark.py -o antes.json
+    python benchmark.py -o despues.json
+    python benchmark.py --comparar antes.json despues.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from mapas import calcular_mapa, permutacion_entera, remapear, remapear_permutacion
+from procesamiento import procesar_imagenes
+from transformaciones import aplicar_transformacion, construir_matriz
+
+TAMANOS = {
+    "256": (256, 256),
+    "1080p": (1080, 1920),
+    "4k": (2160, 3840),
+    "12mp": (3000, 4000),
+}
+"""
+Tamaños de imagen disponibles, como (filas, columnas).
+"""
+
+CASOS = {
+    "rotar": {"angulo": 30},
+    "escalar": {"factor_x": 1.5, "factor_y": 1.5},
+    "reflejar": {"eje": "horizontal"},
+    "trasladar": {"dx": 13, "dy": -7},
+}
+"""
+Parámetros fijos de cada transformación medida.
+"""
+
+BANDERAS_OPENCV = {
+    "vecino": cv2.INTER_NEAREST,
+    "bilineal": cv2.INTER_LINEAR,
+    "bicubica": cv2.INTER_CUBIC,
+}
+"""
+Interpolación equivalente de OpenCV para cada método del motor.
+"""
+
+
+def imagen_sintetica(filas, columnas, canales, semilla=0):
+    """
+    Genera una imagen uint8 reproducible con degradados y ruido, parecida a una foto.
+
+    Parámetros:
+        filas (int): Alto de la imagen.
+        columnas (int): Ancho de la imagen.
+        canales (int): 1, 3 o 4.
+        semilla (int): Semilla del generador aleatorio.
+
+    Retorna:
+        numpy.ndarray: Imagen de forma (filas, columnas) o (filas, columnas, canales).
+    """
+    generador = np.random.default_rng(semilla)
+    y = np.linspace(0, 255, filas, dtype=np.float32)[:, np.newaxis]
+    x = np.linspace(0, 255, columnas, dtype=np.float32)[np.newaxis, :]
+    planos = []
+    for canal in range(canales):
+        ruido = generador.normal(0, 20, (filas, columnas)).astype(np.float32)
+        planos.append(np.clip((x * (canal + 1) + y) / (canal + 2) + ruido, 0, 255).astype(np.uint8))
+    return planos[0] if canales == 1 else np.stack(planos, axis=-1)
+
+
+def medir(funcion, repeticiones):
+    """
+    Ejecuta una función varias veces y mide cada ejecución.
+
+    Parámetros:
+        funcion (callable): Función sin argumentos a medir.
+        repeticiones (int): Número de ejecuciones.
+
+    Retorna:
+        dict: 'mediana_s' y 'minimo_s' en segundos.
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return {"mediana_s": statistics.median(tiempos), "minimo_s": min(tiempos)}
+
+
+def entorno():
+    """
+    Describe la máquina y las versiones con las que se midió.
+
+    Retorna:
+        dict: Versiones de Python, NumPy y OpenCV, plataforma, núcleos y commit de git.
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "plataforma": platform.platform(),
+        "procesador": platform.processor(),
+        "nucleos": os.cpu_count(),
+        "commit": commit or None,
+    }
+
+
+def ejecutar(tamanos, canales, interpolaciones, repeticiones, imagenes_lote):
+    """
+    Ejecuta todas las mediciones pedidas.
+
+    Parámetros:
+        tamanos (list): Claves de `TAMANOS`.
+        canales (list): Números de canales.
+        interpolaciones (list): Métodos de interpolación del motor.
+        repeticiones (int): Ejecuciones por medición.
+        imagenes_lote (int): Imágenes por lote en la medición 'lote'; 0 la omite.
+
+    Retorna:
+        list: Un diccionario por medición.
+    """
+    resultados = []
+
+    def registrar(tamano, numero_canales, tipo, interpolacion, medida, tiempos, megapixeles):
+        resultado = {
+            "caso": f"{medida}/{tipo}/{interpolacion}/{tamano}/c{numero_canales}",
+            "medida": medida,
+            "transformacion": tipo,
+            "interpolacion": interpolacion,
+            "tamano": tamano,
+            "canales": numero_canales,
+            **tiempos,
+            "megapixeles_por_segundo": megapixeles / tiempos["mediana_s"] if tiempos["mediana_s"] else None,
+        }
+        resultados.append(resultado)
+        print(f"{resultado['caso']:<48} {tiempos['mediana_s'] * 1000:10.2f} ms "
+              f"{resultado['megapixeles_por_segundo'] or 0:9.1f} MP/s")
+
+    for tamano in tamanos:
+        filas, columnas = TAMANOS[tamano]
+        megapixeles = filas * columnas / 1e6
+        for numero_canales in canales:
+            imagen = imagen_sintetica(filas, columnas, numero_canales)
+            for tipo, parametros in CASOS.items():
+                matriz = construir_matriz(tipo, columnas, filas, **parametros)
+                inversa = np.linalg.inv(matriz).astype(np.float64)
+                for interpolacion in interpolaciones:
+                    tiempos = medir(lambda: aplicar_transformacion(
+                        imagen, construir_matriz(tipo, columnas, filas, **parametros),
+                        interpolacion=interpolacion), repeticiones)
+                    registrar(tamano, numero_canales, tipo, interpolacion, "extremo_a_extremo", tiempos, megapixeles)
+
+                    permutacion = permutacion_entera(matriz)
+                    if permutacion is not None:
+                        tiempos = medir(lambda: remapear_permutacion(imagen, permutacion), repeticiones)
+                    else:
+                        mapa = calcular_mapa(matriz, imagen.shape[:2], interpolacion=interpolacion)
+                        tiempos = medir(lambda: remapear(imagen, mapa), repeticiones)
+                    registrar(tamano, numero_canales, tipo, interpolacion, "solo_remapeo", tiempos, megapixeles)
+
+                    if permutacion is None:
+                        mapa = calcular_mapa(matriz, imagen.shape[:2], interpolacion=interpolacion,
+                                             precision="compacta")
+                        tiempos = medir(lambda: remapear(imagen, mapa), repeticiones)
+                        registrar(tamano, numero_canales, tipo, interpolacion, "solo_remapeo_compacta", tiempos,
+                                  megapixeles)
+
+                    bandera = BANDERAS_OPENCV[interpolacion] | cv2.WARP_INVERSE_MAP
+                    tiempos = medir(lambda: cv2.warpAffine(imagen, inversa[:2], (columnas, filas), flags=bandera,
+                                                           borderMode=cv2.BORDER_CONSTANT, borderValue=0),
+                                    repeticiones)
+                    registrar(tamano, numero_canales, tipo, interpolacion, "opencv", tiempos, megapixeles)
+
+            if imagenes_lote:
+                medir_lote(imagen, tamano, numero_canales, imagenes_lote, repeticiones, registrar, megapixeles)
+    return resultados
+
+
+def medir_lote(imagen, tamano, numero_canales, imagenes_lote, repeticiones, registrar, megapixeles):
+    """
+    Mide `procesar_imagenes` de extremo a extremo, con lectura y escritura de PNG en disco.
+
+    El tiempo registrado es por imagen, para poder compararlo con las demás medidas. Los
+    resultados se añaden mediante `registrar`.
+
+    No retorna ningún valor.
+    """
+    carpeta = tempfile.mkdtemp(prefix="benchmark_al5_")
+    try:
+        rutas = []
+        for indice in range(imagenes_lote):
+            ruta = os.path.join(carpeta, f"entrada_{indice:04d}.png")
+            cv2.imwrite(ruta, imagen)
+            rutas.append(ruta)
+        salida = os.path.join(carpeta, "processed")
+        for tipo, parametros in CASOS.items():
+            with contextlib.redirect_stdout(io.StringIO()):
+                tiempos = medir(lambda: procesar_imagenes(rutas, tipo, mostrar=False, directorio_salida=salida,
+                                                          **parametros), repeticiones)
+            por_imagen = {clave: valor / imagenes_lote for clave, valor in tiempos.items()}
+            registrar(tamano, numero_canales, tipo, "vecino", "lote", por_imagen, megapixeles)
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+
+def comparar(ruta_antes, ruta_despues, umbral):
+    """
+    Compara dos archivos de resultados e informa de los casos más lentos que el umbral.
+
+    Parámetros:
+        ruta_antes (str): Resultados de la versión de referencia.
+        ruta_despues (str): Resultados de la versión nueva.
+        umbral (float): Fracción de empeoramiento a partir de la cual se marca regresión.
+
+    Retorna:
+        int: 1 si hay alguna regresión, 0 si no.
+    """
+    with open(ruta_antes, encoding="utf-8") as archivo:
+        antes = {resultado["caso"]: resultado for resultado in json.load(archivo)["resultados"]}
+    with open(ruta_despues, encoding="utf-8") as archivo:
+        despues = {resultado["caso"]: resultado for resultado in json.load(archivo)["resultados"]}
+
+    regresiones = 0
+    for caso in sorted(antes.keys() & despues.keys()):
+        razon = despues[caso]["mediana_s"] / antes[caso]["mediana_s"]
+        marca = ""
+        if razon > 1 + umbral and not caso.startswith("opencv/"):
+            marca = "  <-- REGRESIÓN"
+            regresiones += 1
+        print(f"{caso:<48} {antes[caso]['mediana_s'] * 1000:10.2f} ms -> "
+              f"{despues[caso]['mediana_s'] * 1000:10.2f} ms  x{razon:5.2f}{marca}")
+    print(f"{regresiones} regresiones por encima del {umbral:.0%}.")
+    return 1 if regresiones else 0
+
+
+def main(argv=None):
+    """
+    Ejecuta el banco de pruebas desde la línea de comandos.
+
+    Parámetros:
+        argv (list): Argumentos a analizar. Por defecto se usan los de `sys.argv`.
+
+    Retorna:
+        int: Código de salida.
+    """
+    parser = argparse.ArgumentParser(description="Banco de pruebas del motor de transformaciones.")
+    parser.add_argument("-o", "--salida", default="benchmark.json", help="Archivo JSON de resultados.")
+    parser.add_argument("--tamanos", nargs="+", choices=list(TAMANOS), default=list(TAMANOS))
+    parser.add_argument("--canales", nargs="+", type=int, choices=[1, 3, 4], default=[1, 3])
+    parser.add_argument("--interpolaciones", nargs="+", choices=list(BANDERAS_OPENCV),
+                        default=list(BANDERAS_OPENCV))
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--imagenes-lote", type=int, default=8,
+                        help="Imágenes por lote en la medición de procesar_imagenes (0 la omite).")
+    parser.add_argument("--rapido", action="store_true",
+                        help="Solo 256 y 1080p, 3 canales, vecino y 3 repeticiones.")
+    parser.add_argument("--comparar", nargs=2, metavar=("ANTES", "DESPUES"),
+                        help="Compara dos archivos de resultados en lugar de medir.")
+    parser.add_argument("--umbral", type=float, default=0.10,
+                        help="Empeoramiento relativo que se considera regresión al comparar.")
+    argumentos = parser.parse_args(argv)
+
+    if argumentos.comparar:
+        return comparar(*argumentos.comparar, argumentos.umbral)
+
+    if argumentos.rapido:
+        argumentos.tamanos, argumentos.canales = ["256", "1080p"], [3]
+        argumentos.interpolaciones, argumentos.repeticiones = ["vecino"], 3
+
+    resultados = ejecutar(argumentos.tamanos, argumentos.canales, argumentos.interpolaciones,
+                          argumentos.repeticiones, argumentos.imagenes_lote)
+    configuracion = {clave: valor for clave, valor in vars(argumentos).items()
+                     if clave not in ("salida", "comparar", "umbral")}
+    with open(argumentos.salida, "w", encoding="utf-8") as archivo:
+        json.dump({"entorno": entorno(), "configuracion": configuracion, "resultados": resultados},
+                  archivo, indent=2)
+    print(f"Resultados guardados en {argumentos.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Prueba de carga del servicio HTTP de transformaciones (ver `servidor`).
+
+Varios clientes envían a la vez la misma imagen con la misma transformación, cada uno por su
+propia conexión persistente, y al final se informan las peticiones por segundo, los percentiles
+de latencia vistos por el cliente y cuántas imágenes agrupó el servicio en cada lote.
+
+Sin --url se arranca un servicio en un proceso aparte, en un puerto libre, y se detiene al
+terminar; así cliente y servidor no compiten por el mismo intérprete:
+
+    python carga.py --peticiones 2000 --concurrencia 32
+    python carga.py --url http://127.0.0.1:8080 --consulta "tipo=escalar&factor_x=2&factor_y=2"
+    python carga.py --imagen foto.jpg --ventana-ms 0 -o carga.json
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import cv2
+
+from benchmark import entorno, imagen_sintetica
+from metricas import percentil
+
+
+def puerto_libre():
+    """
+    Pide al sistema un puerto TCP libre en la máquina local.
+
+    Retorna:
+        int: Número de puerto.
+    """
+    with socket.socket() as conexion:
+        conexion.bind(("127.0.0.1", 0))
+        return conexion.getsockname()[1]
+
+
+def arrancar_servidor(puerto, ventana_ms, lote, hilos, espera=30.0):
+    """
+    Arranca `al5 servir` en otro proceso y espera a que responda.
+
+    Parámetros:
+        puerto (int): Puerto en el que debe escuchar.
+        ventana_ms (float): Ventana de agrupación en milisegundos.
+        lote (int): Imágenes por lote como máximo.
+        hilos (int): Hilos de cálculo, o None para uno por núcleo.
+        espera (float): Segundos como máximo hasta que `/estado` responda.
+
+    Retorna:
+        subprocess.Popen: Proceso del servicio.
+
+    Excepciones:
+        RuntimeError: Si el servicio termina o no responde a tiempo.
+    """
+    orden = [sys.executable, "-m", "al5", "servir", "--puerto", str(puerto), "--ventana-ms", str(ventana_ms),
+             "--lote", str(lote)]
+    if hilos:
+        orden += ["--hilos", str(hilos)]
+    proceso = subprocess.Popen(orden, cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.DEVNULL)
+    limite = time.monotonic() + espera
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError(f"El servicio terminó al arrancar (código {proceso.returncode}).")
+        try:
+            consultar_estado("127.0.0.1", puerto)
+            return proceso
+        except OSError:
+            time.sleep(0.1)
+    proceso.terminate()
+    raise RuntimeError(f"El servicio no respondió en {espera:.0f} s.")
+
+
+def consultar_estado(anfitrion, puerto):
+    """
+    Obtiene las estadísticas del servicio.
+
+    Retorna:
+        dict: Respuesta JSON de `/estado`.
+    """
+    conexion = http.client.HTTPConnection(anfitrion, puerto, timeout=5)
+    try:
+        conexion.request("GET", "/estado")
+        return json.loads(conexion.getresponse().read())
+    finally:
+        conexion.close()
+
+
+def ejecutar_carga(anfitrion, puerto, cuerpo, consulta, peticiones, concurrencia, calentamiento=10):
+    """
+    Envía las peticiones desde varios hilos y mide la latencia de cada una.
+
+    Parámetros:
+        anfitrion (str): Dirección del servicio.
+        puerto (int): Puerto del servicio.
+        cuerpo (bytes): Imagen codificada que se envía en cada petición.
+        consulta (str): Transformación, p. ej. 'tipo=rotar&angulo=30'.
+        peticiones (int): Peticiones medidas en total.
+        concurrencia (int): Clientes simultáneos, cada uno con su conexión.
+        calentamiento (int): Peticiones previas, sin medir, para llenar la caché de mapas.
+
+    Retorna:
+        dict: 'peticiones', 'errores', 'duracion_s', 'peticiones_por_s', 'bytes_respuesta' y
+              'latencia_ms' (p50, p90, p99, p99.9 y máximo).
+    """
+    ruta = "/transformar?" + consulta
+    cabeceras = {"Content-Type": "application/octet-stream"}
+    latencias = []
+    errores = []
+    bytes_respuesta = [0]
+    restantes = [peticiones]
+    candado = threading.Lock()
+
+    conexion = http.client.HTTPConnection(anfitrion, puerto, timeout=60)
+    for _ in range(calentamiento):
+        conexion.request("POST", ruta, body=cuerpo, headers=cabeceras)
+        respuesta = conexion.getresponse()
+        datos = respuesta.read()
+        if respuesta.status != 200:
+            raise RuntimeError(f"El servicio respondió {respuesta.status}: {datos.decode('utf-8', 'replace')}")
+    conexion.close()
+
+    def cliente():
+        conexion = http.client.HTTPConnection(anfitrion, puerto, timeout=60)
+        propias, fallidas, recibidos = [], [], 0
+        while True:
+            with candado:
+                if restantes[0] == 0:
+                    break
+                restantes[0] -= 1
+            inicio = time.perf_counter()
+            try:
+                conexion.request("POST", ruta, body=cuerpo, headers=cabeceras)
+                respuesta = conexion.getresponse()
+                datos = respuesta.read()
+            except (OSError, http.client.HTTPException) as error:
+                fallidas.append(f"{type(error).__name__}: {error}")
+                conexion.close()
+                continue
+            if respuesta.status == 200:
+                propias.append(time.perf_counter() - inicio)
+                recibidos += len(datos)
+            else:
+                fallidas.append(f"HTTP {respuesta.status}")
+        conexion.close()
+        with candado:
+            latencias.extend(propias)
+            errores.extend(fallidas)
+            bytes_respuesta[0] += recibidos
+
+    hilos = [threading.Thread(target=cliente) for _ in range(concurrencia)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+
+    latencias_ms = [latencia * 1000 for latencia in latencias]
+    return {
+        "peticiones": len(latencias),
+        "errores": len(errores),
+        "primer_error": errores[0] if errores else None,
+        "duracion_s": duracion,
+        "peticiones_por_s": len(latencias) / duracion if duracion else 0.0,
+        "bytes_respuesta": bytes_respuesta[0],
+        "latencia_ms": {
+            "p50": percentil(latencias_ms, 50),
+            "p90": percentil(latencias_ms, 90),
+            "p99": percentil(latencias_ms, 99),
+            "p99.9": percentil(latencias_ms, 99.9),
+            "maxima": max(latencias_ms, default=0.0),
+        },
+    }
+
+
+def main(argv=None):
+    """
+    Ejecuta la prueba de carga desde la línea de comandos.
+
+    Parámetros:
+        argv (list): Argumentos a analizar. Por defecto se usan los de `sys.argv`.
+
+    Retorna:
+        int: Código de salida (1 si alguna petición falló).
+    """
+    parser = argparse.ArgumentParser(description="Prueba de carga del servicio HTTP de transformaciones.")
+    parser.add_argument("--url", default=None,
+                        help="Servicio ya en marcha, p. ej. http://127.0.0.1:8080. Sin ella se arranca uno.")
+    parser.add_argument("--consulta", default="tipo=rotar&angulo=30&interpolacion=bilineal",
+                        help="Transformación pedida en cada petición (ver el módulo servidor).")
+    parser.add_argument("--imagen", default=None, help="Imagen a enviar. Por defecto, una sintética.")
+    parser.add_argument("--tamano", default="640x480", metavar="ANCHOxALTO",
+                        help="Tamaño de la imagen sintética.")
+    parser.add_argument("-n", "--peticiones", type=int, default=1000)
+    parser.add_argument("-c", "--concurrencia", type=int, default=16)
+    parser.add_argument("--calentamiento", type=int, default=10,
+                        help="Peticiones previas sin medir.")
+    parser.add_argument("--ventana-ms", type=float, default=2.0, help="Ventana del servicio que se arranca.")
+    parser.add_argument("--lote", type=int, default=16, help="Lote máximo del servicio que se arranca.")
+    parser.add_argument("--hilos", type=int, default=None, help="Hilos de cálculo del servicio que se arranca.")
+    parser.add_argument("-o", "--salida", default=None, help="Guarda los resultados en este archivo JSON.")
+    argumentos = parser.parse_args(argv)
+
+    if argumentos.imagen:
+        with open(argumentos.imagen, "rb") as archivo:
+            cuerpo = archivo.read()
+    else:
+        try:
+            ancho, alto = (int(valor) for valor in argumentos.tamano.lower().split("x"))
+        except ValueError:
+            parser.error("--tamano debe tener la forma ANCHOxALTO, p. ej. 640x480")
+        cuerpo = cv2.imencode(".png", imagen_sintetica(alto, ancho, 3))[1].tobytes()
+
+    proceso = None
+    if argumentos.url:
+        direccion = urlsplit(argumentos.url)
+        anfitrion, puerto = direccion.hostname, direccion.port or 80
+    else:
+        anfitrion, puerto = "127.0.0.1", puerto_libre()
+        proceso = arrancar_servidor(puerto, argumentos.ventana_ms, argumentos.lote, argumentos.hilos)
+    try:
+        resultados = ejecutar_carga(anfitrion, puerto, cuerpo, argumentos.consulta, argumentos.peticiones,
+                                    argumentos.concurrencia, argumentos.calentamiento)
+        estado = consultar_estado(anfitrion, puerto)
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait()
+
+    latencia = resultados["latencia_ms"]
+    agrupador = estado["agrupador"]
+    print(f"{resultados['peticiones']} peticiones en {resultados['duracion_s']:.2f} s con "
+          f"{argumentos.concurrencia} clientes: {resultados['peticiones_por_s']:.1f} peticiones/s")
+    print(f"Latencia p50 {latencia['p50']:.1f} ms · p90 {latencia['p90']:.1f} ms · p99 {latencia['p99']:.1f} ms · "
+          f"p99.9 {latencia['p99.9']:.1f} ms · máx. {latencia['maxima']:.1f} ms")
+    print(f"Servicio: {agrupador['imagenes_por_lote']:.1f} imágenes por lote (máx. {agrupador['lote_maximo']}), "
+          f"{estado['cache_mapas']['aciertos']} aciertos de caché")
+    if resultados["errores"]:
+        print(f"{resultados['errores']} peticiones fallidas; la primera: {resultados['primer_error']}")
+
+    if argumentos.salida:
+        configuracion = {clave: valor for clave, valor in vars(argumentos).items() if clave != "salida"}
+        with open(argumentos.salida, "w", encoding="utf-8") as archivo:
+            json.dump({"entorno": entorno(), "configuracion": configuracion, "resultados": resultados,
+                       "servicio": estado}, archivo, indent=2)
+        print(f"Resultados guardados en {argumentos.salida}")
+    return 1 if resultados["errores"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,679 @@
+"""
+Interfaz gráfica (Tk) del editor de imágenes.
+
+Solo se importa al abrir la ventana; el núcleo de transformaciones y el procesamiento por
+lotes viven en `transformaciones` y `procesamiento`. Los lotes se procesan en un hilo aparte,
+así que la ventana sigue respondiendo, muestra el avance y permite cancelar.
+"""
+import base64
+import itertools
+import os
+import queue
+import threading
+import time
+from tkinter import (Tk, Label, Button, Checkbutton, Frame, BooleanVar, DoubleVar, PhotoImage, Scale, filedialog,
+                     messagebox, simpledialog, Toplevel, Entry, StringVar)
+from tkinter import ttk
+
+import cv2
+import numpy as np
+
+from procesamiento import procesar_imagenes_en_flujo
+from transformaciones import aplicar_transformacion, construir_matriz
+
+INTERVALO_REVISION_MS = 100
+"""
+Cada cuántos milisegundos la ventana recoge los avisos del lote en curso.
+"""
+
+LIMITE_GALERIA = 48
+"""
+Miniaturas que muestra como máximo la galería de un lote.
+"""
+
+LADO_MINIATURA = 160
+"""
+Lado mayor, en píxeles, de cada miniatura de la galería.
+"""
+
+COLUMNAS_GALERIA = 4
+"""
+Miniaturas por fila en la galería.
+"""
+
+LADO_VISTA_PREVIA = 320
+"""
+Lado mayor, en píxeles, de la copia reducida que se transforma en la vista previa.
+"""
+
+
+def iniciar_procesamiento():
+    """
+    Solicita al usuario el tipo de transformación a aplicar y procesa las imágenes seleccionadas.
+
+    Verifica si hay imágenes seleccionadas antes de continuar. Si no hay imágenes, muestra una advertencia.
+    Solicita al usuario que elija el tipo de transformación (rotar, escalar, reflejar o trasladar) y los
+    parámetros necesarios según la transformación seleccionada. Luego, lanza el lote en segundo plano
+    con `lanzar_lote`.
+
+    Excepciones:
+        Muestra un cuadro de error si el tipo de transformación no es válido.
+        Muestra un cuadro de advertencia si no hay imágenes seleccionadas.
+
+    No recibe parámetros.
+
+    No retorna ningún valor.
+    """
+    if not imagenes_seleccionadas:
+        messagebox.showwarning("Sin imágenes", "Por favor, selecciona imágenes primero.")
+        return
+
+    tipo = simpledialog.askstring("Transformación", "Ingresa el tipo de transformación (rotar, escalar, reflejar, trasladar):")
+    if tipo == "rotar":
+        angulo = float(simpledialog.askstring("Ángulo", "Ingresa el ángulo de rotación (grados):"))
+        lanzar_lote("rotar", angulo=angulo)
+    elif tipo == "escalar":
+        factor_x = float(simpledialog.askstring("Escala X", "Ingresa el factor de escalado en X:"))
+        factor_y = float(simpledialog.askstring("Escala Y", "Ingresa el factor de escalado en Y:"))
+        lanzar_lote("escalar", factor_x=factor_x, factor_y=factor_y)
+    elif tipo == "reflejar":
+        eje = simpledialog.askstring("Reflejo", "Ingresa el eje de reflexión ('horizontal' o 'vertical'):")
+        lanzar_lote("reflejar", eje=eje)
+    elif tipo == "trasladar":
+        dx = float(simpledialog.askstring("Desplazamiento X", "Ingresa el desplazamiento en X:"))
+        dy = float(simpledialog.askstring("Desplazamiento Y", "Ingresa el desplazamiento en Y:"))
+        lanzar_lote("trasladar", dx=dx, dy=dy)
+    else:
+        messagebox.showerror("Error", "Tipo de transformación no reconocido.")
+
+
+def abrir_rotar():
+    """
+    Crea una ventana emergente para ingresar el ángulo de rotación de una imagen.
+
+    La ventana incluye un deslizador y una entrada de texto para el ángulo, una vista previa que
+    se actualiza con cada cambio y un botón para aplicar la rotación. Al presionar el botón, se
+    llama a la función `aplicar_rotar` para procesar las imágenes seleccionadas a resolución completa.
+
+    No recibe parámetros.
+    
+    No retorna ningún valor.
+    """ 
+    ventana = Toplevel()
+    ventana.title("Rotar Imagen")
+    angulo = StringVar(value="0")
+    actualizar = crear_vista_previa(ventana, "rotar", lambda: {"angulo": float(angulo.get())})
+    Label(ventana, text="Ángulo de rotación (grados):").pack()
+    crear_deslizador(ventana, angulo, -180, 180, 0.5).pack()
+    Entry(ventana, textvariable=angulo).pack()
+    angulo.trace_add("write", lambda *_: actualizar())
+    Button(ventana, text="Aplicar", command=lambda: aplicar_rotar(ventana, angulo)).pack()
+    actualizar()
+
+def aplicar_rotar(ventana, angulo):
+    """
+    Aplica la transformación de rotación a las imágenes seleccionadas según el ángulo proporcionado.
+
+    Parámetros:
+        ventana (tkinter.Toplevel): Ventana emergente que se cierra al lanzar el lote.
+        angulo (tkinter.StringVar): Variable de tipo cadena que contiene el ángulo de rotación ingresado por el usuario.
+
+    Excepciones:
+        ValueError: Muestra un cuadro de error si el valor ingresado no es numérico.
+
+    No retorna ningún valor.
+    """
+    try:
+        angulo_valor = float(angulo.get())
+        if lanzar_lote("rotar", angulo=angulo_valor):
+            ventana.destroy()
+    except ValueError:
+        messagebox.showerror("Error", "Por favor, ingresa un valor numérico para el ángulo.")
+
+def abrir_escalar():
+    """
+    Crea una ventana emergente para ingresar los factores de escala en los ejes X e Y.
+
+    La ventana incluye deslizadores y entradas de texto para los factores de escala, una vista
+    previa que se actualiza con cada cambio y un botón para aplicar la transformación. Al presionar
+    el botón, se llama a la función `aplicar_escalar` para procesar las imágenes seleccionadas a
+    resolución completa.
+
+    No recibe parámetros.
+    
+    No retorna ningún valor.
+    """
+    ventana = Toplevel()
+    ventana.title("Escalar Imagen")
+    factor_x = StringVar(value="1")
+    factor_y = StringVar(value="1")
+    actualizar = crear_vista_previa(ventana, "escalar",
+                                    lambda: {"factor_x": float(factor_x.get()), "factor_y": float(factor_y.get())})
+    for texto, factor in (("Factor de escala en X:", factor_x), ("Factor de escala en Y:", factor_y)):
+        Label(ventana, text=texto).pack()
+        crear_deslizador(ventana, factor, 0.1, 3, 0.05).pack()
+        Entry(ventana, textvariable=factor).pack()
+        factor.trace_add("write", lambda *_: actualizar())
+    Button(ventana, text="Aplicar", command=lambda: aplicar_escalar(ventana, factor_x, factor_y)).pack()
+    actualizar()
+
+def aplicar_escalar(ventana, factor_x, factor_y):
+    """
+    Aplica la transformación de escalado a las imágenes seleccionadas según los factores proporcionados.
+
+    Parámetros:
+        ventana (tkinter.Toplevel): Ventana emergente que se cierra al lanzar el lote.
+        factor_x (tkinter.StringVar): Factor de escala en el eje X ingresado por el usuario.
+        factor_y (tkinter.StringVar): Factor de escala en el eje Y ingresado por el usuario.
+
+    Excepciones:
+        ValueError: Muestra un cuadro de error si los valores ingresados no son numéricos.
+
+    No retorna ningún valor.
+    """
+    try:
+        fx = float(factor_x.get())
+        fy = float(factor_y.get())
+        if fx == 0 or fy == 0:
+            messagebox.showerror("Error", "Los factores de escala no pueden ser 0.")
+            return
+        if lanzar_lote("escalar", factor_x=fx, factor_y=fy):
+            ventana.destroy()
+    except ValueError:
+        messagebox.showerror("Error", "Por favor, ingresa valores numéricos para los factores de escala.")
+
+def abrir_reflejar():
+    """
+    Crea una ventana emergente para seleccionar el eje de reflexión ('horizontal' o 'vertical').
+
+    La ventana incluye una entrada de texto para el eje y un botón para aplicar la reflexión.
+    Al presionar el botón, se llama a la función `aplicar_reflejar` para procesar la imagen seleccionada.
+
+    No recibe parámetros.
+    
+    No retorna ningún valor.
+    """
+    ventana = Toplevel()
+    ventana.title("Reflejar Imagen")
+    Label(ventana, text="Eje de reflexión ('horizontal' o 'vertical')").pack()
+    eje = StringVar()
+    Entry(ventana, textvariable=eje).pack()
+    Button(ventana, text="Aplicar", command=lambda: aplicar_reflejar(ventana, eje)).pack()
+
+def aplicar_reflejar(ventana, eje):
+    """
+    Aplica la transformación de reflexión a las imágenes seleccionadas según el eje proporcionado.
+
+    Parámetros:
+        ventana (tkinter.Toplevel): Ventana emergente que se cierra al lanzar el lote.
+        eje (tkinter.StringVar): Eje de reflexión ingresado por el usuario ('horizontal' o 'vertical').
+
+    Excepciones:
+        ValueError: Muestra un cuadro de error si el eje ingresado no es válido.
+
+    No retorna ningún valor.
+    """
+    eje_valor = eje.get().strip().lower()
+    if eje_valor in ["horizontal", "vertical"]:
+        if lanzar_lote("reflejar", eje=eje_valor):
+            ventana.destroy()
+    else:
+        messagebox.showerror("Error", "Eje no válido. Usa 'horizontal' o 'vertical'.")
+
+def abrir_trasladar():
+    """
+    Crea una ventana emergente para ingresar los desplazamientos en los ejes X e Y.
+
+    La ventana incluye entradas de texto para los desplazamientos y un botón para aplicar la traslación.
+    Al presionar el botón, se llama a la función `aplicar_trasladar` para procesar la imagen seleccionada.
+
+    No recibe parámetros.
+    
+    No retorna ningún valor.
+    """
+
+    ventana = Toplevel()
+    ventana.title("Trasladar Imagen")
+    Label(ventana, text="Desplazamiento en X:").pack()
+    dx = StringVar()
+    Entry(ventana, textvariable=dx).pack()
+    Label(ventana, text="Desplazamiento en Y:").pack()
+    dy = StringVar()
+    Entry(ventana, textvariable=dy).pack()
+    Button(ventana, text="Aplicar", command=lambda: aplicar_trasladar(ventana, dx, dy)).pack()
+
+def aplicar_trasladar(ventana, dx, dy):
+    """
+    Aplica la transformación de traslación a las imágenes seleccionadas según los desplazamientos proporcionados.
+
+    Parámetros:
+        ventana (tkinter.Toplevel): Ventana emergente que se cierra al lanzar el lote.
+        dx (tkinter.StringVar): Desplazamiento en el eje X ingresado por el usuario.
+        dy (tkinter.StringVar): Desplazamiento en el eje Y ingresado por el usuario.
+
+    Excepciones:
+        ValueError: Muestra un cuadro de error si los valores ingresados no son numéricos.
+
+    No retorna ningún valor.
+    """
+    try:
+        dx_valor = float(dx.get())
+        dy_valor = float(dy.get())
+        if lanzar_lote("trasladar", dx=dx_valor, dy=dy_valor):
+            ventana.destroy()
+    except ValueError:
+        messagebox.showerror("Error", "Por favor, ingresa valores numéricos para el desplazamiento.")
+
+
+imagenes_seleccionadas = []
+"""
+Variable global que almacena las rutas de las imágenes seleccionadas por el usuario.
+"""
+
+def seleccionar_imagenes():
+    """
+    Abre un cuadro de diálogo para que el usuario seleccione imágenes y almacena las rutas seleccionadas.
+
+    Utiliza el cuadro de diálogo de archivo proporcionado por `filedialog` para permitir al usuario
+    seleccionar múltiples imágenes. Si se seleccionan imágenes, muestra un mensaje informando la cantidad
+    de imágenes cargadas. Si no se seleccionan imágenes, muestra una advertencia.
+
+    Variables globales:
+        imagenes_seleccionadas (list): Almacena las rutas de las imágenes seleccionadas por el usuario.
+
+    No recibe parámetros.
+    
+    No retorna ningún valor.
+    """
+
+    global imagenes_seleccionadas
+    imagenes_seleccionadas = filedialog.askopenfilenames(
+        title="Seleccionar imágenes",
+        filetypes=[("Imágenes", "*.jpeg;*.jpg;*.png")]
+    )
+    if imagenes_seleccionadas:
+        messagebox.showinfo("Imágenes seleccionadas", f"{len(imagenes_seleccionadas)} imágenes cargadas.")
+    else:
+        messagebox.showwarning("Sin selección", "No se seleccionaron imágenes.")
+
+
+trabajo_actual = None
+"""
+Lote en curso (avisos, evento de cancelación, galería e instante de inicio), o None si no hay ninguno.
+"""
+
+ventana_principal = None
+barra_progreso = None
+etiqueta_estado = None
+boton_cancelar = None
+mostrar_galeria = None
+"""
+Ventana principal y controles de avance; se crean en `iniciar_interfaz`.
+"""
+
+
+def lanzar_lote(tipo_transformacion, **parametros):
+    """
+    Procesa las imágenes seleccionadas en un hilo aparte, sin bloquear la ventana.
+
+    El lote usa el procesamiento en flujo (lectura, cálculo y escritura a la vez, con un hilo de
+    cálculo por núcleo), igual que la línea de comandos. Los hilos del lote solo dejan avisos en
+    una cola; la ventana los recoge con `revisar_lote` para actualizar la barra de progreso, el
+    ritmo y la galería, ya que Tk solo puede tocarse desde su propio hilo.
+
+    Parámetros:
+        tipo_transformacion (str): 'rotar', 'escalar', 'reflejar' o 'trasladar'.
+        **parametros: Parámetros de la transformación (ver `procesar_imagenes`).
+
+    Retorna:
+        bool: True si el lote se lanzó; False si no hay imágenes o ya hay otro lote en curso.
+    """
+    global trabajo_actual
+    if not imagenes_seleccionadas:
+        messagebox.showwarning("Sin imágenes", "Por favor, selecciona imágenes primero.")
+        return False
+    if trabajo_actual is not None:
+        messagebox.showwarning("Lote en curso", "Espera a que termine el lote actual o cancélalo.")
+        return False
+
+    imagenes = list(imagenes_seleccionadas)
+    avisos = queue.Queue()
+    cancelar = threading.Event()
+    galeria = abrir_galeria(tipo_transformacion) if mostrar_galeria.get() else None
+    miniaturas = itertools.count()
+
+    def progreso(hechas, total, ruta_salida):
+        # Las miniaturas se preparan aquí, fuera del hilo de Tk, y solo las primeras.
+        miniatura = None
+        if galeria is not None and ruta_salida is not None and next(miniaturas) < LIMITE_GALERIA:
+            miniatura = miniatura_png(ruta_salida)
+        avisos.put(("progreso", hechas, total, ruta_salida, miniatura))
+
+    def ejecutar():
+        try:
+            guardadas = procesar_imagenes_en_flujo(imagenes, tipo_transformacion, hilos_calculo=os.cpu_count() or 2,
+                                                   progreso=progreso, cancelar=cancelar, **parametros)
+            avisos.put(("fin", guardadas))
+        except Exception as error:
+            avisos.put(("error", f"{type(error).__name__}: {error}"))
+
+    trabajo_actual = {"avisos": avisos, "cancelar": cancelar, "galeria": galeria,
+                      "total": len(imagenes), "inicio": time.perf_counter()}
+    barra_progreso.config(maximum=len(imagenes), value=0)
+    etiqueta_estado.config(text=f"Procesando 0/{len(imagenes)} imágenes...")
+    boton_cancelar.config(state="normal")
+    threading.Thread(target=ejecutar, daemon=True).start()
+    ventana_principal.after(INTERVALO_REVISION_MS, revisar_lote)
+    return True
+
+
+def revisar_lote():
+    """
+    Recoge los avisos del lote en curso y actualiza la barra, el ritmo y la galería.
+
+    Se vuelve a programar con `after` mientras el lote no termine; al terminar informa cuántas
+    imágenes se guardaron y libera la ventana para otro lote.
+
+    No recibe parámetros.
+
+    No retorna ningún valor.
+    """
+    global trabajo_actual
+    trabajo = trabajo_actual
+    final = None
+    while True:
+        try:
+            aviso = trabajo["avisos"].get_nowait()
+        except queue.Empty:
+            break
+        if aviso[0] != "progreso":
+            final = aviso
+            continue
+        _, hechas, total, ruta_salida, miniatura = aviso
+        transcurrido = time.perf_counter() - trabajo["inicio"]
+        ritmo = hechas / transcurrido if transcurrido > 0 else 0.0
+        barra_progreso.config(value=hechas)
+        etiqueta_estado.config(text=f"{hechas}/{total} imágenes · {ritmo:.1f} img/s")
+        if miniatura is not None:
+            agregar_miniatura(trabajo["galeria"], ruta_salida, miniatura)
+
+    if final is None:
+        ventana_principal.after(INTERVALO_REVISION_MS, revisar_lote)
+        return
+
+    trabajo_actual = None
+    boton_cancelar.config(state="disabled")
+    if final[0] == "error":
+        etiqueta_estado.config(text="El lote se detuvo por un error.")
+        messagebox.showerror("Error", final[1])
+        return
+    guardadas = len(final[1])
+    transcurrido = time.perf_counter() - trabajo["inicio"]
+    if trabajo["cancelar"].is_set():
+        etiqueta_estado.config(text=f"Cancelado: {guardadas} de {trabajo['total']} imágenes guardadas.")
+    else:
+        etiqueta_estado.config(text=f"Listo: {guardadas} de {trabajo['total']} imágenes en {transcurrido:.1f} s "
+                                    f"({guardadas / max(transcurrido, 1e-9):.1f} img/s).")
+
+
+def cancelar_lote():
+    """
+    Pide al lote en curso que no empiece más imágenes; las que ya se están guardando terminan.
+
+    No recibe parámetros.
+
+    No retorna ningún valor.
+    """
+    if trabajo_actual is not None:
+        trabajo_actual["cancelar"].set()
+        boton_cancelar.config(state="disabled")
+        etiqueta_estado.config(text="Cancelando...")
+
+
+def miniatura_png(ruta, lado=LADO_MINIATURA):
+    """
+    Lee una imagen guardada y la reduce a una miniatura PNG que Tk puede mostrar sin Pillow.
+
+    Parámetros:
+        ruta (str): Ruta de la imagen.
+        lado (int): Lado mayor de la miniatura en píxeles.
+
+    Retorna:
+        bytes: PNG codificado en base64, o None si la imagen no se pudo leer.
+    """
+    imagen = cv2.imread(ruta)
+    if imagen is None:
+        return None
+    escala = lado / max(imagen.shape[:2])
+    if escala < 1:
+        imagen = cv2.resize(imagen, None, fx=escala, fy=escala, interpolation=cv2.INTER_AREA)
+    correcto, datos = cv2.imencode(".png", imagen)
+    return base64.b64encode(datos.tobytes()) if correcto else None
+
+
+proxy_vista_previa = {}
+"""
+Copia reducida de la imagen usada en la vista previa, por ruta. Solo se guarda la última, para
+no volver a leerla ni reducirla con cada cambio de los deslizadores.
+"""
+
+
+def obtener_proxy(ruta, lado=LADO_VISTA_PREVIA):
+    """
+    Lee una imagen y la reduce para la vista previa, o reutiliza la copia ya reducida.
+
+    Parámetros:
+        ruta (str): Ruta de la imagen.
+        lado (int): Lado mayor de la copia reducida en píxeles.
+
+    Retorna:
+        numpy.ndarray: Copia reducida, o None si la imagen no se pudo leer.
+    """
+    clave = (ruta, lado)
+    if clave not in proxy_vista_previa:
+        imagen = cv2.imread(ruta)
+        if imagen is None:
+            return None
+        escala = lado / max(imagen.shape[:2])
+        if escala < 1:
+            imagen = cv2.resize(imagen, None, fx=escala, fy=escala, interpolation=cv2.INTER_AREA)
+        proxy_vista_previa.clear()
+        proxy_vista_previa[clave] = imagen
+    return proxy_vista_previa[clave]
+
+
+def crear_deslizador(ventana, variable, desde, hasta, resolucion):
+    """
+    Crea un deslizador enlazado en ambos sentidos con la variable de texto de una entrada.
+
+    Al mover el deslizador, su valor se escribe en la entrada; al escribir un número en la
+    entrada, el deslizador se mueve a esa posición (o al extremo, si queda fuera del rango). El
+    deslizador tiene su propia variable numérica: si compartiera la de texto, Tk reemplazaría lo
+    que se está escribiendo (un '-' suelto, el campo vacío, un valor fuera del rango) por su propio
+    valor redondeado.
+
+    Parámetros:
+        ventana (tkinter.Toplevel): Ventana donde se coloca el deslizador.
+        variable (tkinter.StringVar): Variable de la entrada de texto.
+        desde (float): Valor mínimo del deslizador.
+        hasta (float): Valor máximo del deslizador.
+        resolucion (float): Paso del deslizador.
+
+    Retorna:
+        tkinter.Scale: Deslizador sin colocar, ya en la posición del valor actual.
+    """
+    posicion = DoubleVar(ventana)
+    desde_entrada = []
+
+    def copiar_a_deslizador(*_):
+        try:
+            valor = float(variable.get())
+        except ValueError:
+            return
+        desde_entrada.append(True)
+        try:
+            posicion.set(valor)
+        finally:
+            desde_entrada.pop()
+
+    def copiar_a_entrada(*_):
+        # Tk reescribe la posición al ajustarla al rango; ese cambio no debe volver a la entrada.
+        if not desde_entrada:
+            variable.set(format(posicion.get(), "g"))
+
+    deslizador = Scale(ventana, from_=desde, to=hasta, resolution=resolucion, orient="horizontal",
+                       length=LADO_VISTA_PREVIA, showvalue=False, variable=posicion)
+    deslizador.posicion = posicion  # Sin esta referencia, Python libera la variable de Tk.
+    copiar_a_deslizador()
+    posicion.trace_add("write", copiar_a_entrada)
+    variable.trace_add("write", copiar_a_deslizador)
+    return deslizador
+
+
+def crear_vista_previa(ventana, tipo_transformacion, leer_parametros):
+    """
+    Añade a una ventana emergente la vista previa de una transformación sobre la primera imagen
+    seleccionada.
+
+    La transformación se aplica a una copia reducida de la imagen (ver `obtener_proxy`), con la
+    matriz construida para ese tamaño, así que cada actualización tarda unos pocos milisegundos.
+    Los cambios que llegan juntos (por ejemplo, al arrastrar un deslizador) se agrupan en una
+    sola actualización. La imagen a resolución completa solo se procesa al aplicar.
+
+    Parámetros:
+        ventana (tkinter.Toplevel): Ventana emergente donde se coloca la vista previa.
+        tipo_transformacion (str): Tipo de transformación que se previsualiza.
+        leer_parametros (callable): Devuelve los parámetros actuales como diccionario; lanza
+                                    ValueError si aún no son válidos.
+
+    Retorna:
+        callable: Función sin argumentos que programa una actualización de la vista previa.
+    """
+    vista = Label(ventana, text="Selecciona imágenes para ver la vista previa.")
+    vista.pack(padx=5, pady=5)
+    tiempo = Label(ventana, text="")
+    tiempo.pack()
+    pendiente = []
+
+    def dibujar():
+        pendiente.clear()
+        if not imagenes_seleccionadas or not vista.winfo_exists():
+            return
+        proxy = obtener_proxy(imagenes_seleccionadas[0])
+        if proxy is None:
+            vista.config(text="No se pudo leer la imagen.")
+            return
+        inicio = time.perf_counter()
+        filas, columnas = proxy.shape[:2]
+        try:
+            parametros = leer_parametros()
+            resultado = aplicar_transformacion(proxy, construir_matriz(tipo_transformacion, columnas, filas,
+                                                                       **parametros))
+        except (ValueError, np.linalg.LinAlgError):
+            # Un valor a medio escribir o un factor de escala 0: se conserva la última vista previa.
+            return
+        correcto, datos = cv2.imencode(".png", resultado, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+        if not correcto:
+            return
+        foto = PhotoImage(data=base64.b64encode(datos.tobytes()))
+        vista.config(image=foto, text="")
+        vista.imagen = foto  # Tk no guarda la referencia; sin esto la imagen se libera.
+        tiempo.config(text=f"Vista previa: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    def actualizar():
+        if not pendiente:
+            pendiente.append(ventana.after_idle(dibujar))
+
+    return actualizar
+
+
+def abrir_galeria(tipo_transformacion):
+    """
+    Crea la ventana de galería de un lote, que se va llenando con las miniaturas de los
+    resultados sin detener el procesamiento. Puede cerrarse en cualquier momento.
+
+    Parámetros:
+        tipo_transformacion (str): Transformación del lote, usada en el título.
+
+    Retorna:
+        dict: Ventana, marco de miniaturas y lista de imágenes mostradas.
+    """
+    ventana = Toplevel()
+    ventana.title(f"Galería: {tipo_transformacion}")
+    marco = Frame(ventana)
+    marco.pack(padx=5, pady=5)
+    # Tk no guarda una referencia a las PhotoImage; la lista evita que se liberen.
+    return {"ventana": ventana, "marco": marco, "imagenes": []}
+
+
+def agregar_miniatura(galeria, ruta, miniatura):
+    """
+    Añade una miniatura a la galería, si la ventana sigue abierta.
+
+    Parámetros:
+        galeria (dict): Galería creada con `abrir_galeria`.
+        ruta (str): Ruta de la imagen guardada.
+        miniatura (bytes): PNG en base64 creado con `miniatura_png`.
+
+    No retorna ningún valor.
+    """
+    if galeria is None or not galeria["ventana"].winfo_exists():
+        return
+    foto = PhotoImage(data=miniatura)
+    posicion = len(galeria["imagenes"])
+    galeria["imagenes"].append(foto)
+    Label(galeria["marco"], image=foto, text=os.path.basename(ruta), compound="top").grid(
+        row=posicion // COLUMNAS_GALERIA, column=posicion % COLUMNAS_GALERIA, padx=2, pady=2)
+
+
+def iniciar_interfaz():
+    """
+    Crea la ventana principal del editor con sus botones e inicia el bucle de eventos de Tk.
+
+    No recibe parámetros.
+
+    No retorna ningún valor.
+    """
+    global ventana_principal, barra_progreso, etiqueta_estado, boton_cancelar, mostrar_galeria
+    root = Tk()  # Crear ventana principal
+    root.title("Editor de Imágenes")  # Establecer título de la ventana
+    root.geometry("320x460")  # Establecer tamaño de la ventana
+    ventana_principal = root
+
+    # Etiqueta descriptiva
+    label = Label(root, text="Editor de imágenes\nSelecciona y transforma imágenes fácilmente", wraplength=250, pady=20)
+    label.pack()  # Colocar la etiqueta en la ventana
+
+    # Botón para seleccionar imágenes
+    boton_cargar = Button(root, text="Seleccionar Imágenes", command=seleccionar_imagenes, bg="lightblue", padx=10, pady=5)
+    boton_cargar.pack(pady=10)  # Colocar el botón en la ventana
+
+    # Botón para abrir la ventana de rotación
+    boton_rotar = Button(root, text="Rotar", command=abrir_rotar, bg="lightgreen", padx=10, pady=5)
+    boton_rotar.pack(pady=5)  # Colocar el botón en la ventana
+
+    # Botón para abrir la ventana de escalado
+    boton_escalar = Button(root, text="Escalar", command=abrir_escalar, bg="lightgreen", padx=10, pady=5)
+    boton_escalar.pack(pady=5)  # Colocar el botón en la ventana
+
+    # Botón para abrir la ventana de reflexión
+    boton_reflejar = Button(root, text="Reflejar", command=abrir_reflejar, bg="lightgreen", padx=10, pady=5)
+    boton_reflejar.pack(pady=5)  # Colocar el botón en la ventana
+
+    # Botón para abrir la ventana de traslación
+    boton_trasladar = Button(root, text="Trasladar", command=abrir_trasladar, bg="lightgreen", padx=10, pady=5)
+    boton_trasladar.pack(pady=5)  # Colocar el botón en la ventana
+
+    # Opción para ver los resultados en una galería que no detiene el lote
+    mostrar_galeria = BooleanVar(value=False)
+    Checkbutton(root, text="Mostrar galería de resultados", variable=mostrar_galeria).pack(pady=5)
+
+    # Avance del lote en curso
+    barra_progreso = ttk.Progressbar(root, length=260, mode="determinate")
+    barra_progreso.pack(pady=5)
+    etiqueta_estado = Label(root, text="Sin lotes en curso.", wraplength=280)
+    etiqueta_estado.pack()
+    boton_cancelar = Button(root, text="Cancelar", command=cancelar_lote, state="disabled", padx=10, pady=5)
+    boton_cancelar.pack(pady=5)
+
+    root.mainloop()  # Iniciar el bucle principal de la aplicación
@@ -0,0 +1,221 @@
+"""
+Manifiesto de un lote para reanudarlo sin repetir trabajo.
+
+Junto a los resultados de cada tipo (`processed/<tipo>/manifiesto.jsonl`) se anota, por cada
+imagen guardada, el hash del contenido de la entrada, los parámetros de la transformación y la
+versión del motor. Al volver a lanzar el lote, las salidas que siguen al día se saltan sin
+decodificar la entrada y solo se procesan las imágenes nuevas o modificadas.
+
+El archivo es de líneas JSON y solo se le añaden líneas, de modo que una caída a mitad del lote
+deja anotado todo lo que ya se había guardado; si una entrada aparece varias veces, vale la
+última.
+"""
+import hashlib
+import json
+import os
+import threading
+
+from transformaciones import VERSION_MOTOR
+
+NOMBRE_MANIFIESTO = "manifiesto.jsonl"
+"""
+Nombre del manifiesto dentro de la carpeta de cada tipo de transformación.
+"""
+
+
+def hash_archivo(ruta, tam_lectura=1024 * 1024):
+    """
+    Calcula el hash SHA-256 del contenido de un archivo, leyéndolo por partes.
+
+    Parámetros:
+        ruta (str): Ruta del archivo.
+        tam_lectura (int): Bytes leídos en cada paso.
+
+    Retorna:
+        str: Hash en hexadecimal.
+    """
+    resumen = hashlib.sha256()
+    with open(ruta, "rb") as archivo:
+        for parte in iter(lambda: archivo.read(tam_lectura), b""):
+            resumen.update(parte)
+    return resumen.hexdigest()
+
+
+def huella_entrada(ruta):
+    """
+    Obtiene el hash, el tamaño y la fecha de modificación de una imagen de entrada.
+
+    Parámetros:
+        ruta (str): Ruta de la imagen.
+
+    Retorna:
+        dict: 'hash', 'tamano' (bytes) y 'modificado' (nanosegundos), o None si no se puede leer.
+    """
+    try:
+        estado = os.stat(ruta)
+        return {"hash": hash_archivo(ruta), "tamano": estado.st_size, "modificado": estado.st_mtime_ns}
+    except OSError:
+        return None
+
+
+def huella_contenido(contenido, estado):
+    """
+    Obtiene la huella de una entrada a partir de los bytes ya leídos para decodificarla, sin
+    volver a abrir el archivo.
+
+    Parámetros:
+        contenido (bytes): Contenido completo del archivo.
+        estado (os.stat_result): Estado del archivo, tomado antes de leerlo.
+
+    Retorna:
+        dict: 'hash', 'tamano' y 'modificado', como `huella_entrada`.
+    """
+    return {"hash": hashlib.sha256(contenido).hexdigest(), "tamano": estado.st_size,
+            "modificado": estado.st_mtime_ns}
+
+
+def firma_transformacion(tipo_transformacion, interpolacion, parametros, expandir=False, precision="doble"):
+    """
+    Describe lo que determina el contenido de una salida, aparte de la imagen de entrada.
+
+    El tamaño de bloque no forma parte de la firma porque no cambia el resultado. La precisión
+    solo se anota si no es la exacta, para que los manifiestos anteriores sigan al día.
+
+    Parámetros:
+        tipo_transformacion (str): Tipo de transformación.
+        interpolacion (str): Método de interpolación.
+        parametros (dict): Parámetros de la transformación.
+        expandir (bool): Si el destino se ajusta a la imagen transformada completa.
+        precision (str): Precisión de los mapas de coordenadas.
+
+    Retorna:
+        dict: Tipo, interpolación, ajuste del lienzo, parámetros (normalizados como JSON),
+              versión del motor y, si no es 'doble', precisión.
+    """
+    firma = {
+        "tipo": tipo_transformacion,
+        "interpolacion": interpolacion,
+        "expandir": bool(expandir),
+        "parametros": json.loads(json.dumps(parametros, sort_keys=True)),
+        "version": VERSION_MOTOR,
+    }
+    if precision != "doble":
+        firma["precision"] = precision
+    return firma
+
+
+class Manifiesto:
+    """
+    Registro de las salidas de una carpeta y de la entrada y la firma que las produjeron.
+
+    Las anotaciones las hace un solo proceso (el que reparte el lote); es seguro usarlo desde
+    varios hilos de ese proceso.
+    """
+
+    def __init__(self, carpeta_tipo):
+        self.carpeta = carpeta_tipo
+        self.ruta = os.path.join(carpeta_tipo, NOMBRE_MANIFIESTO)
+        self._entradas = {}
+        self._candado = threading.Lock()
+        self._cargar()
+
+    def _cargar(self):
+        """
+        Lee el manifiesto existente. Si tiene líneas repetidas o rotas (por ejemplo, la última
+        de un lote que se cayó), se reescribe solo con la última anotación de cada salida.
+        """
+        if not os.path.exists(self.ruta):
+            return
+        lineas = 0
+        with open(self.ruta, encoding="utf-8") as archivo:
+            for linea in archivo:
+                lineas += 1
+                try:
+                    entrada = json.loads(linea)
+                    self._entradas[entrada["salida"]] = entrada
+                except (ValueError, KeyError, TypeError):
+                    continue
+        if lineas != len(self._entradas):
+            temporal = self.ruta + ".tmp"
+            with open(temporal, "w", encoding="utf-8") as archivo:
+                for entrada in self._entradas.values():
+                    archivo.write(json.dumps(entrada) + "\n")
+            os.replace(temporal, self.ruta)
+
+    def al_dia(self, ruta_entrada, firma):
+        """
+        Indica si la salida de una imagen ya existe y corresponde a su contenido y firma actuales.
+
+        Si el tamaño y la fecha de modificación de la entrada no cambiaron, se da por bueno el
+        hash anotado sin volver a leer el archivo; si cambiaron, se recalcula el hash, y una
+        entrada solo tocada pero con el mismo contenido sigue al día.
+
+        Parámetros:
+            ruta_entrada (str): Ruta de la imagen de entrada.
+            firma (dict): Resultado de `firma_transformacion`.
+
+        Retorna:
+            bool: True si la imagen puede saltarse.
+        """
+        nombre = os.path.basename(ruta_entrada)
+        anotada = self._entradas.get(nombre)
+        if anotada is None or anotada.get("firma") != firma:
+            return False
+        if anotada.get("entrada") != os.path.abspath(ruta_entrada):
+            return False
+        if not os.path.exists(os.path.join(self.carpeta, nombre)):
+            return False
+        try:
+            estado = os.stat(ruta_entrada)
+        except OSError:
+            return False
+        if (estado.st_size, estado.st_mtime_ns) == (anotada.get("tamano"), anotada.get("modificado")):
+            return True
+        huella = huella_entrada(ruta_entrada)
+        if huella is None or huella["hash"] != anotada.get("hash"):
+            return False
+        self.anotar(ruta_entrada, firma, huella)
+        return True
+
+    def anotar(self, ruta_entrada, firma, huella):
+        """
+        Añade al manifiesto la salida recién guardada de una imagen.
+
+        Parámetros:
+            ruta_entrada (str): Ruta de la imagen de entrada.
+            firma (dict): Resultado de `firma_transformacion`.
+            huella (dict): Resultado de `huella_entrada` o `huella_contenido` de la entrada procesada.
+
+        No retorna ningún valor.
+        """
+        if huella is None:
+            return
+        entrada = {
+            "salida": os.path.basename(ruta_entrada),
+            "entrada": os.path.abspath(ruta_entrada),
+            "firma": firma,
+        }
+        entrada.update(huella)
+        with self._candado:
+            self._entradas[entrada["salida"]] = entrada
+            with open(self.ruta, "a", encoding="utf-8") as archivo:
+                archivo.write(json.dumps(entrada) + "\n")
+
+    def separar(self, imagenes, firma):
+        """
+        Separa un lote en imágenes pendientes e imágenes cuya salida ya está al día.
+
+        Parámetros:
+            imagenes (list): Rutas de las imágenes del lote.
+            firma (dict): Resultado de `firma_transformacion`.
+
+        Retorna:
+            tuple: (índices pendientes, {índice: ruta de salida} de las que se saltan).
+        """
+        pendientes, al_dia = [], {}
+        for indice, ruta_entrada in enumerate(imagenes):
+            if self.al_dia(ruta_entrada, firma):
+                al_dia[indice] = os.path.join(self.carpeta, os.path.basename(ruta_entrada))
+            else:
+                pendientes.append(indice)
+        return pendientes, al_dia
@@ -0,0 +1,238 @@
+"""
+Medición por etapas del procesamiento por lotes.
+
+Registra cuánto tarda cada imagen en cargarse, construir su matriz, invertirla, transformarse,
+mostrarse y guardarse, junto con los bytes leídos y escritos. Al final genera un informe con
+latencias p50/p95, megapíxeles por segundo y el pico de memoria, en JSON o CSV. Solo se usa si
+se pide; sin registro, el procesamiento no guarda nada.
+"""
+import csv
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows no tiene el módulo resource.
+    resource = None
+
+ETAPAS = ("cargar", "matriz", "inversa", "transformar", "mostrar", "guardar")
+"""
+Etapas medidas para cada imagen, en el orden en que ocurren.
+"""
+
+FORMATOS_INFORME = (".json", ".csv")
+"""
+Extensiones admitidas para el informe de `RegistroMetricas.guardar`.
+"""
+
+
+def pico_memoria_mb():
+    """
+    Obtiene el pico de memoria residente del proceso y de sus procesos hijos ya terminados.
+
+    Retorna:
+        dict: 'proceso' e 'hijos' en megabytes, o None si el sistema no lo permite.
+    """
+    if resource is None:
+        return None
+    # Linux informa en kilobytes y macOS en bytes.
+    unidad = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "proceso": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unidad,
+        "hijos": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unidad,
+    }
+
+
+def nueva_medicion(ruta_entrada):
+    """
+    Crea el registro vacío de una imagen.
+
+    Parámetros:
+        ruta_entrada (str): Ruta de la imagen medida.
+
+    Retorna:
+        dict: Registro con la ruta y cada etapa en cero segundos.
+    """
+    medicion = {"ruta": ruta_entrada}
+    medicion.update({etapa: 0.0 for etapa in ETAPAS})
+    medicion.update({"bytes_leidos": 0, "bytes_escritos": 0, "megapixeles": 0.0})
+    return medicion
+
+
+def tamano_archivo(ruta):
+    """
+    Devuelve el tamaño de un archivo en bytes, o 0 si no existe.
+    """
+    try:
+        return os.path.getsize(ruta)
+    except OSError:
+        return 0
+
+
+def percentil(valores, porcentaje):
+    """
+    Calcula un percentil de una lista de valores, o 0 si está vacía.
+    """
+    return float(np.percentile(valores, porcentaje)) if len(valores) else 0.0
+
+
+def validar_ruta_informe(ruta):
+    """
+    Comprueba que el informe de métricas se pueda guardar con el formato de su extensión.
+
+    Conviene llamarla antes de procesar un lote: así una extensión no admitida se detecta al
+    principio y no después de transformar todas las imágenes.
+
+    Parámetros:
+        ruta (str): Ruta del informe.
+
+    Excepciones:
+        ValueError: Si la extensión no es .json ni .csv.
+
+    Retorna:
+        str: La extensión en minúsculas.
+    """
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension not in FORMATOS_INFORME:
+        raise ValueError(f"El informe de métricas debe terminar en .json o .csv, no '{ruta}'.")
+    return extension
+
+
+class RegistroMetricas:
+    """
+    Acumula las mediciones de un lote y genera el informe.
+
+    Es segura para usarse desde varios hilos. Las mediciones hechas en otros procesos llegan
+    como diccionarios y se añaden con `agregar`.
+    """
+
+    def __init__(self):
+        self._mediciones = []
+        self._candado = threading.Lock()
+        self._inicio = time.perf_counter()
+        self._fin = None
+
+    def agregar(self, medicion):
+        """
+        Añade la medición de una imagen al registro.
+
+        Parámetros:
+            medicion (dict): Registro creado con `nueva_medicion`.
+
+        No retorna ningún valor.
+        """
+        medicion["total"] = sum(medicion[etapa] for etapa in ETAPAS)
+        with self._candado:
+            self._mediciones.append(medicion)
+
+    def finalizar(self):
+        """
+        Marca el fin del lote; el tiempo total se mide hasta aquí.
+
+        No retorna ningún valor.
+        """
+        self._fin = time.perf_counter()
+
+    @property
+    def mediciones(self):
+        """
+        Copia de las mediciones registradas.
+        """
+        with self._candado:
+            return list(self._mediciones)
+
+    def resumen(self):
+        """
+        Calcula las cifras agregadas del lote.
+
+        Retorna:
+            dict: Imágenes, tiempo total, latencias por etapa y totales (media, p50, p95),
+                  megapíxeles por segundo, bytes leídos y escritos y pico de memoria.
+        """
+        mediciones = self.mediciones
+        tiempo_total = (self._fin or time.perf_counter()) - self._inicio
+        megapixeles = sum(medicion["megapixeles"] for medicion in mediciones)
+
+        etapas = {}
+        for etapa in ETAPAS + ("total",):
+            valores = [medicion[etapa] for medicion in mediciones]
+            etapas[etapa] = {
+                "suma": float(sum(valores)),
+                "media": float(np.mean(valores)) if valores else 0.0,
+                "p50": percentil(valores, 50),
+                "p95": percentil(valores, 95),
+            }
+
+        return {
+            "imagenes": len(mediciones),
+            "tiempo_total": tiempo_total,
+            "megapixeles": megapixeles,
+            "megapixeles_por_segundo": megapixeles / tiempo_total if tiempo_total > 0 else 0.0,
+            "bytes_leidos": sum(medicion["bytes_leidos"] for medicion in mediciones),
+            "bytes_escritos": sum(medicion["bytes_escritos"] for medicion in mediciones),
+            "etapas": etapas,
+            "pico_memoria_mb": pico_memoria_mb(),
+        }
+
+    def guardar(self, ruta):
+        """
+        Escribe el informe en JSON o CSV según la extensión de `ruta`.
+
+        En JSON se guarda un único documento con las mediciones por imagen y el resumen. En CSV
+        se guarda una fila por imagen en `ruta` y el resumen por etapa en `<ruta>_resumen.csv`.
+
+        Parámetros:
+            ruta (str): Ruta del informe, terminada en .json o .csv.
+
+        Excepciones:
+            ValueError: Si la extensión no es .json ni .csv.
+
+        Retorna:
+            dict: El resumen guardado.
+        """
+        extension = validar_ruta_informe(ruta)
+        resumen = self.resumen()
+        base = os.path.splitext(ruta)[0]
+        if extension == ".json":
+            with open(ruta, "w", encoding="utf-8") as archivo:
+                json.dump({"resumen": resumen, "imagenes": self.mediciones}, archivo, indent=2)
+        elif extension == ".csv":
+            columnas = ["ruta"] + list(ETAPAS) + ["total", "bytes_leidos", "bytes_escritos", "megapixeles"]
+            with open(ruta, "w", newline="", encoding="utf-8") as archivo:
+                escritor = csv.DictWriter(archivo, fieldnames=columnas, extrasaction="ignore")
+                escritor.writeheader()
+                escritor.writerows(self.mediciones)
+            with open(f"{base}_resumen.csv", "w", newline="", encoding="utf-8") as archivo:
+                escritor = csv.writer(archivo)
+                escritor.writerow(["etapa", "suma", "media", "p50", "p95"])
+                for etapa, valores in resumen["etapas"].items():
+                    escritor.writerow([etapa, valores["suma"], valores["media"], valores["p50"], valores["p95"]])
+                for clave in ("imagenes", "tiempo_total", "megapixeles", "megapixeles_por_segundo",
+                              "bytes_leidos", "bytes_escritos"):
+                    escritor.writerow([clave, resumen[clave]])
+                for clave, valor in (resumen["pico_memoria_mb"] or {}).items():
+                    escritor.writerow([f"pico_memoria_mb_{clave}", valor])
+        return resumen
+
+
+def imprimir_resumen(resumen):
+    """
+    Muestra en consola las cifras principales de un resumen de métricas.
+
+    Parámetros:
+        resumen (dict): Resultado de `RegistroMetricas.resumen`.
+
+    No retorna ningún valor.
+    """
+    print(f"Imágenes: {resumen['imagenes']} en {resumen['tiempo_total']:.3f} s "
+          f"({resumen['megapixeles_por_segundo']:.2f} MP/s)")
+    for etapa, valores in resumen["etapas"].items():
+        print(f"  {etapa:<12} p50 {valores['p50'] * 1000:9.2f} ms   p95 {valores['p95'] * 1000:9.2f} ms")
+    if resumen["pico_memoria_mb"]:
+        print(f"  Pico de memoria: {resumen['pico_memoria_mb']['proceso']:.1f} MB "
+              f"(hijos {resumen['pico_memoria_mb']['hijos']:.1f} MB)")
@@ -0,0 +1,777 @@
+"""
+Procesamiento por lotes de imágenes en disco.
+
+Carga cada imagen con OpenCV, aplica la transformación pedida y guarda el resultado en
+`processed/<tipo>/`. matplotlib solo se importa si se pide mostrar las imágenes.
+"""
+import contextlib
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from manifiesto import Manifiesto, firma_transformacion, huella_contenido
+from mapas import INTERPOLACIONES, PRECISIONES, cache_mapas
+from metricas import nueva_medicion, tamano_archivo
+from transformaciones import (
+    PARAMETROS_TRANSFORMACION,
+    TIPOS_TRANSFORMACION,
+    aplicar_transformacion,
+    aplicar_transformacion_por_bloques,
+    ajustar_lienzo,
+    combinaciones_barrido,
+    construir_matriz,
+    sufijo_parametros,
+)
+
+
+def mostrar_imagenes(imagen_original, imagen_transformada):
+    """
+    Muestra la imagen original y la imagen transformada en una ventana de visualización.
+
+    Utiliza matplotlib para mostrar ambas imágenes lado a lado, facilitando la comparación
+    entre la imagen original y la transformada.
+
+    Parámetros:
+        imagen_original (numpy.ndarray): Imagen original antes de aplicar la transformación.
+        imagen_transformada (numpy.ndarray): Imagen resultante después de aplicar la transformación.
+
+    No retorna ningún valor.
+    """
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10, 5))
+
+    plt.subplot(1, 2, 1)
+    plt.imshow(cv2.cvtColor(imagen_original, cv2.COLOR_BGR2RGB))
+    plt.title("Imagen Original")
+    plt.axis("off")
+
+    plt.subplot(1, 2, 2)
+    plt.imshow(cv2.cvtColor(imagen_transformada, cv2.COLOR_BGR2RGB))
+    plt.title("Imagen Transformada")
+    plt.axis("off")
+
+    plt.tight_layout()
+    plt.show()
+
+
+def transformar_imagen(imagen_original, tipo_transformacion, tam_bloque=None, interpolacion="vecino",
+                       medicion=None, expandir=False, precision="doble", **parametros):
+    """
+    Construye la matriz de la transformación para el tamaño de la imagen y la aplica.
+
+    Usa la caché de mapas del proceso, salvo en modo por bloques.
+
+    Parámetros:
+        imagen_original (numpy.ndarray): Imagen ya cargada.
+        tipo_transformacion (str): 'rotar', 'escalar', 'reflejar', 'trasladar' o 'compuesta'.
+        tam_bloque (int): Si se indica, transforma por bloques de ese lado para acotar la memoria.
+        interpolacion (str): 'vecino' (por defecto), 'bilineal' o 'bicubica'.
+        medicion (dict): Si se indica, se le suman los tiempos de las etapas 'matriz', 'inversa'
+                         y 'transformar' y los megapíxeles procesados (ver `metricas`).
+        expandir (bool): Si es True, el destino se agranda o se reduce para que quepa la imagen
+                         transformada completa (ver `transformaciones.ajustar_lienzo`).
+        precision (str): 'doble' (por defecto) o 'compacta' (ver `procesar_imagenes`). No se
+                         usa en modo por bloques, que ya acota la memoria.
+        **parametros: Parámetros de la transformación (ver `procesar_imagenes`).
+
+    Retorna:
+        numpy.ndarray: Imagen transformada.
+    """
+    filas, columnas = imagen_original.shape[:2]
+    inicio = time.perf_counter()
+    matriz = construir_matriz(tipo_transformacion, columnas, filas, **parametros)
+    forma_salida = None
+    if expandir:
+        matriz, forma_salida = ajustar_lienzo(matriz, columnas, filas)
+    fin_matriz = time.perf_counter()
+
+    if tam_bloque:
+        # El modo por bloques invierte la matriz por su cuenta; su tiempo cuenta como 'transformar'.
+        fin_inversa = fin_matriz
+        salida = None if forma_salida is None else np.zeros(forma_salida + imagen_original.shape[2:],
+                                                            dtype=imagen_original.dtype)
+        imagen_transformada = aplicar_transformacion_por_bloques(imagen_original, matriz, salida=salida,
+                                                                 tam_bloque=tam_bloque, interpolacion=interpolacion)
+    else:
+        matriz_inversa = np.linalg.inv(matriz)
+        fin_inversa = time.perf_counter()
+        imagen_transformada = aplicar_transformacion(imagen_original, matriz, cache=cache_mapas,
+                                                     interpolacion=interpolacion, matriz_inversa=matriz_inversa,
+                                                     forma_salida=forma_salida, precision=precision)
+
+    if medicion is not None:
+        medicion["matriz"] += fin_matriz - inicio
+        medicion["inversa"] += fin_inversa - fin_matriz
+        medicion["transformar"] += time.perf_counter() - fin_inversa
+        medicion["megapixeles"] += filas * columnas / 1e6
+    return imagen_transformada
+
+
+def cargar_imagen(ruta_entrada):
+    """
+    Lee una imagen de disco una sola vez y obtiene de los mismos bytes su huella para el
+    manifiesto.
+
+    El hash se calcula sobre el contenido que se decodifica, sin volver a abrir el archivo, así
+    que cada entrada se lee una sola vez y la huella anotada corresponde justo a la imagen
+    procesada aunque el archivo cambie durante el lote.
+
+    Parámetros:
+        ruta_entrada (str): Ruta de la imagen.
+
+    Retorna:
+        tuple: (imagen decodificada como con `cv2.imread`, huella de la entrada), o (None, None)
+               si no se pudo leer o decodificar.
+    """
+    try:
+        estado = os.stat(ruta_entrada)
+        with open(ruta_entrada, "rb") as archivo:
+            contenido = archivo.read()
+    except OSError:
+        return None, None
+    imagen = cv2.imdecode(np.frombuffer(contenido, dtype=np.uint8), cv2.IMREAD_COLOR) if contenido else None
+    if imagen is None:
+        return None, None
+    return imagen, huella_contenido(contenido, estado)
+
+
+def procesar_imagen(ruta_entrada, carpeta_tipo, tipo_transformacion, mostrar=False, tam_bloque=None,
+                    interpolacion="vecino", medicion=None, expandir=False, precision="doble", huella=None,
+                    **parametros):
+    """
+    Carga una imagen, le aplica la transformación indicada y guarda el resultado.
+
+    Parámetros:
+        ruta_entrada (str): Ruta de la imagen a procesar.
+        carpeta_tipo (str): Carpeta donde se guarda la imagen transformada.
+        tipo_transformacion (str): 'rotar', 'escalar', 'reflejar', 'trasladar' o 'compuesta'.
+        mostrar (bool): Si es True, muestra el par original/transformada con matplotlib.
+        tam_bloque (int): Si se indica, transforma por bloques de ese lado para acotar la memoria.
+        interpolacion (str): 'vecino' (por defecto), 'bilineal' o 'bicubica'.
+        medicion (dict): Si se indica, registra el tiempo de cada etapa y los bytes leídos y
+                         escritos (ver `metricas.nueva_medicion`).
+        expandir (bool): Si es True, el destino se agranda o se reduce para que quepa la imagen
+                         transformada completa (ver `transformaciones.ajustar_lienzo`).
+        precision (str): 'doble' (por defecto) o 'compacta' (ver `procesar_imagenes`).
+        huella (dict): Si se indica, se llena con la huella de la entrada para el manifiesto,
+                       tomada de los mismos bytes que se decodifican (ver `cargar_imagen`).
+        **parametros: Parámetros de la transformación (ver `procesar_imagenes`).
+
+    Retorna:
+        str: Ruta de la imagen guardada, o None si no se pudo cargar.
+
+    Excepciones:
+        OSError: Si no se pudo escribir la imagen de salida.
+    """
+    inicio = time.perf_counter()
+    imagen_original, huella_leida = cargar_imagen(ruta_entrada)
+    if imagen_original is None:
+        print(f"No se pudo cargar la imagen desde {ruta_entrada}.")
+        return None
+    if medicion is not None:
+        medicion["cargar"] += time.perf_counter() - inicio
+        medicion["bytes_leidos"] += tamano_archivo(ruta_entrada)
+    if huella is not None:
+        huella.update(huella_leida)
+
+    imagen_transformada = transformar_imagen(imagen_original, tipo_transformacion, tam_bloque=tam_bloque,
+                                             interpolacion=interpolacion, medicion=medicion, expandir=expandir,
+                                             precision=precision, **parametros)
+
+    if mostrar:
+        inicio = time.perf_counter()
+        mostrar_imagenes(imagen_original, imagen_transformada)
+        if medicion is not None:
+            medicion["mostrar"] += time.perf_counter() - inicio
+
+    nombre_archivo = os.path.basename(ruta_entrada)
+    output_path = os.path.join(carpeta_tipo, nombre_archivo)
+    inicio = time.perf_counter()
+    if not cv2.imwrite(output_path, imagen_transformada):
+        raise OSError(f"cv2.imwrite no pudo escribir {output_path}")
+    if medicion is not None:
+        medicion["guardar"] += time.perf_counter() - inicio
+        medicion["bytes_escritos"] += tamano_archivo(output_path)
+    print(f"Procesada y guardada en: {output_path}")
+    return output_path
+
+
+def _procesar_imagen_en_trabajador(argumentos):
+    """
+    Envoltorio de `procesar_imagen` para el pool: captura cualquier error de la imagen para que
+    no detenga el resto del lote.
+
+    Parámetros:
+        argumentos (tuple): (ruta_entrada, carpeta_tipo, tipo_transformacion, opciones, parametros),
+                            donde opciones son los argumentos con nombre de `procesar_imagen`
+                            más 'medir', que indica si hay que devolver la medición.
+
+    Retorna:
+        tuple: (ruta de salida o None, mensaje de error o None, medición o None, huella de la
+               entrada para el manifiesto o None).
+    """
+    ruta_entrada, carpeta_tipo, tipo_transformacion, opciones, parametros = argumentos
+    opciones = dict(opciones)
+    medicion = nueva_medicion(ruta_entrada) if opciones.pop("medir", False) else None
+    huella = {}
+    try:
+        output_path = procesar_imagen(ruta_entrada, carpeta_tipo, tipo_transformacion, medicion=medicion,
+                                      huella=huella, **opciones, **parametros)
+        return output_path, None, medicion, huella or None
+    except Exception as error:
+        return None, f"{type(error).__name__}: {error}", None, None
+
+
+def preparar_carpeta(directorio_salida, tipo_transformacion, interpolacion="vecino", precision="doble", crear=True):
+    """
+    Valida el tipo de transformación, la interpolación y la precisión y crea la carpeta
+    `<raíz>/<tipo>/`.
+
+    Parámetros:
+        directorio_salida (str): Carpeta raíz de salida, o None para `processed/` en el
+                                 directorio actual.
+        tipo_transformacion (str): Tipo de transformación.
+        interpolacion (str): Método de interpolación.
+        precision (str): Precisión de los mapas de coordenadas.
+        crear (bool): Si es False, solo se valida y se calcula la ruta, sin crear nada.
+
+    Excepciones:
+        ValueError: Si el tipo de transformación, la interpolación o la precisión no son válidos.
+
+    Retorna:
+        str: Ruta de la carpeta donde se guardan los resultados de ese tipo.
+    """
+    if tipo_transformacion not in TIPOS_TRANSFORMACION:
+        raise ValueError("Transformación no válida")
+    if interpolacion not in INTERPOLACIONES:
+        raise ValueError(f"Interpolación no válida. Usa una de: {', '.join(INTERPOLACIONES)}.")
+    if precision not in PRECISIONES:
+        raise ValueError(f"Precisión no válida. Usa una de: {', '.join(PRECISIONES)}.")
+
+    upload_path = directorio_salida or os.path.join(os.getcwd(), "processed")
+    carpeta_tipo = os.path.join(upload_path, tipo_transformacion)
+    if crear:
+        os.makedirs(carpeta_tipo, exist_ok=True)
+    return carpeta_tipo
+
+
+def procesar_imagenes(imagenes, tipo_transformacion, mostrar=True, directorio_salida=None,
+                      trabajadores=None, ejecutor="procesos", tam_bloque=None, interpolacion="vecino",
+                      metricas=None, reanudar=False, expandir=False, progreso=None, cancelar=None, precision="doble",
+                      **parametros):
+    """
+    Aplica una transformación seleccionada a una lista de imágenes y guarda los resultados.
+
+    Crea directorios para almacenar las imágenes procesadas según el tipo de transformación.
+    Carga cada imagen, aplica la transformación especificada y guarda la imagen resultante
+    en el directorio correspondiente.
+
+    Con `trabajadores` mayor que 1 las imágenes se reparten entre un pool de procesos (o de
+    hilos) y no se muestra ninguna imagen. Un error en una imagen se informa y no detiene el
+    resto del lote; los nombres de salida son los mismos que en modo secuencial.
+
+    Cada imagen guardada se anota en `<raíz>/<tipo>/manifiesto.jsonl` con el hash de la entrada,
+    los parámetros y la versión del motor (ver `manifiesto`). Con `reanudar` las imágenes cuya
+    salida sigue al día se saltan sin decodificarlas, de modo que un lote interrumpido solo
+    procesa lo que faltaba y lo que cambió.
+
+    Parámetros:
+        imagenes (list): Lista de rutas de las imágenes a procesar.
+        tipo_transformacion (str): Tipo de transformación a aplicar. Puede ser 'rotar', 'escalar',
+                                   'reflejar', 'trasladar' o 'compuesta'.
+        mostrar (bool): Si es True, muestra cada par original/transformada con matplotlib.
+                        Se ignora en modo paralelo.
+        directorio_salida (str): Carpeta raíz de salida. Por defecto `processed/` en el
+                                 directorio actual; los resultados van a `<raíz>/<tipo>/`.
+        trabajadores (int): Número de trabajadores en paralelo. None o 1 procesa en secuencia.
+        ejecutor (str o concurrent.futures.Executor): 'procesos' (por defecto) o 'hilos' para
+                                                      crear un pool para este lote, o un pool ya
+                                                      creado, que se usa tal cual y no se cierra;
+                                                      así varios lotes comparten trabajadores ya
+                                                      arrancados y sus cachés de mapas.
+        tam_bloque (int): Si se indica, cada imagen se transforma por bloques de ese lado, con
+                          memoria de trabajo acotada (ver `aplicar_transformacion_por_bloques`).
+        interpolacion (str): 'vecino' (por defecto, el comportamiento original), 'bilineal' o
+                             'bicubica'. Las dos últimas suavizan giros y ampliaciones a cambio
+                             de más tiempo de cálculo.
+        metricas (metricas.RegistroMetricas): Si se indica, registra el tiempo de cada etapa
+                                              por imagen; con `metricas.guardar()` se obtiene
+                                              el informe.
+        reanudar (bool): Si es True, salta las imágenes cuya salida ya está al día según el
+                         manifiesto.
+        expandir (bool): Si es True, el destino se agranda o se reduce para que quepa la imagen
+                         transformada completa (ver `transformaciones.ajustar_lienzo`).
+        progreso (callable): Si se indica, se llama como `progreso(hechas, total, ruta_salida)`
+                             cada vez que termina una imagen; `ruta_salida` es None si falló.
+                             Las imágenes ya al día cuentan como hechas desde el principio.
+        cancelar (threading.Event): Si se indica y se activa, no se empiezan más imágenes y se
+                                    devuelven las guardadas hasta ese momento.
+        precision (str): 'doble' (por defecto, exacta) o 'compacta', que calcula las coordenadas
+                         en float32 y guarda los mapas en punto fijo: menos memoria y más mapas
+                         en la caché, con diferencias de 1 nivel como máximo al interpolar (ver
+                         `mapas.calcular_mapa`).
+        **parametros: Parámetros adicionales necesarios según el tipo de transformación:
+            - Para 'rotar': angulo (float) - Ángulo de rotación en grados.
+            - Para 'escalar': factor_x (float), factor_y (float) - Factores de escala en X e Y.
+            - Para 'reflejar': eje (str) - Eje de reflexión ('horizontal' o 'vertical').
+            - Para 'trasladar': dx (float), dy (float) - Desplazamientos en X e Y.
+            - Para 'compuesta': pasos (list) - Pares (tipo, parametros) que se aplican en orden
+              y se remuestrean en una sola pasada (ver `componer_transformaciones`).
+
+    Excepciones:
+        ValueError: Si el tipo de transformación, el ejecutor, la interpolación o la precisión no
+                    son válidos.
+
+    Retorna:
+        list: Rutas de las imágenes guardadas (o ya al día), en el mismo orden que `imagenes`.
+    """
+    carpeta_tipo = preparar_carpeta(directorio_salida, tipo_transformacion, interpolacion, precision)
+    manifiesto, firma, pendientes, guardadas = _preparar_manifiesto(carpeta_tipo, imagenes, tipo_transformacion,
+                                                                    interpolacion, parametros, reanudar, expandir,
+                                                                    precision)
+    avance = _Avance(len(imagenes), len(guardadas), progreso)
+
+    if not trabajadores or trabajadores <= 1:
+        for indice in pendientes:
+            if cancelar is not None and cancelar.is_set():
+                break
+            ruta_entrada = imagenes[indice]
+            medicion = nueva_medicion(ruta_entrada) if metricas is not None else None
+            huella = {}
+            try:
+                output_path = procesar_imagen(ruta_entrada, carpeta_tipo, tipo_transformacion,
+                                              mostrar=mostrar, tam_bloque=tam_bloque, interpolacion=interpolacion,
+                                              medicion=medicion, expandir=expandir, precision=precision,
+                                              huella=huella, **parametros)
+            except Exception as error:
+                # Igual que en modo paralelo: el error se informa y el lote sigue.
+                print(f"Error al procesar {ruta_entrada}: {type(error).__name__}: {error}")
+                output_path = None
+            avance.marcar(output_path)
+            if output_path is not None:
+                guardadas[indice] = output_path
+                manifiesto.anotar(ruta_entrada, firma, huella)
+                if metricas is not None:
+                    metricas.agregar(medicion)
+        if metricas is not None:
+            metricas.finalizar()
+        return [guardadas[indice] for indice in sorted(guardadas)]
+
+    propio = not isinstance(ejecutor, Executor)
+    if not propio:
+        pool = ejecutor
+    elif ejecutor == "procesos":
+        pool = ProcessPoolExecutor(max_workers=trabajadores)
+    elif ejecutor == "hilos":
+        pool = ThreadPoolExecutor(max_workers=trabajadores)
+    else:
+        raise ValueError("Ejecutor no válido. Usa 'procesos' o 'hilos'.")
+
+    opciones = {"tam_bloque": tam_bloque, "interpolacion": interpolacion, "expandir": expandir,
+                "precision": precision, "medir": metricas is not None}
+    tareas = [(imagenes[indice], carpeta_tipo, tipo_transformacion, opciones, parametros) for indice in pendientes]
+    # Bloques de varias imágenes por envío para no pagar la comunicación entre procesos
+    # en cada archivo cuando el lote es grande.
+    tamano_bloque = max(1, len(tareas) // (trabajadores * 8))
+
+    with pool if propio else contextlib.nullcontext():
+        resultados = pool.map(_procesar_imagen_en_trabajador, tareas, chunksize=tamano_bloque)
+        for indice, (output_path, error, medicion, huella) in zip(pendientes, resultados):
+            ruta_entrada = imagenes[indice]
+            avance.marcar(output_path)
+            if error is not None:
+                print(f"Error al procesar {ruta_entrada}: {error}")
+            elif output_path is not None:
+                guardadas[indice] = output_path
+                manifiesto.anotar(ruta_entrada, firma, huella)
+                if medicion is not None:
+                    metricas.agregar(medicion)
+            if cancelar is not None and cancelar.is_set():
+                # Se descartan las imágenes que aún no empezaron; las que están en curso terminan.
+                # Un pool ajeno no se cierra: sus tareas pendientes terminan sin anotarse.
+                if propio:
+                    pool.shutdown(wait=True, cancel_futures=True)
+                break
+
+    if metricas is not None:
+        metricas.finalizar()
+    return [guardadas[indice] for indice in sorted(guardadas)]
+
+
+class _Avance:
+    """
+    Cuenta las imágenes terminadas de un lote y avisa a la función de progreso, si la hay.
+    Es segura para usarse desde varios hilos.
+    """
+
+    def __init__(self, total, hechas, progreso):
+        self.total = total
+        self.hechas = hechas
+        self.progreso = progreso
+        self._candado = threading.Lock()
+
+    def marcar(self, ruta_salida):
+        """
+        Registra una imagen terminada; `ruta_salida` es None si falló.
+
+        No retorna ningún valor.
+        """
+        with self._candado:
+            self.hechas += 1
+            hechas = self.hechas
+        if self.progreso is not None:
+            self.progreso(hechas, self.total, ruta_salida)
+
+
+def _preparar_manifiesto(carpeta_tipo, imagenes, tipo_transformacion, interpolacion, parametros, reanudar,
+                         expandir=False, precision="doble"):
+    """
+    Abre el manifiesto de la carpeta y decide qué imágenes del lote hay que procesar.
+
+    Retorna:
+        tuple: (manifiesto, firma de la transformación, índices pendientes,
+               {índice: ruta de salida} de las imágenes que ya están al día).
+    """
+    manifiesto = Manifiesto(carpeta_tipo)
+    firma = firma_transformacion(tipo_transformacion, interpolacion, parametros, expandir, precision)
+    if not reanudar:
+        return manifiesto, firma, list(range(len(imagenes))), {}
+    pendientes, al_dia = manifiesto.separar(imagenes, firma)
+    if al_dia:
+        print(f"{len(al_dia)} imágenes ya están al día; se procesan {len(pendientes)}.")
+    return manifiesto, firma, pendientes, al_dia
+
+
+def barrer_imagen(ruta_entrada, carpeta_tipo, tipo_transformacion, barrido, tam_bloque=None,
+                  interpolacion="vecino", medicion=None, expandir=False, precision="doble", **parametros):
+    """
+    Carga una imagen una sola vez y guarda una versión transformada por cada combinación de
+    parámetros del barrido.
+
+    Las matrices de todas las combinaciones se construyen juntas y se invierten en una sola
+    llamada. Cada resultado se guarda como `<nombre>_<parametros><extensión>`, por ejemplo
+    `foto_angulo=30.png`.
+
+    Parámetros:
+        ruta_entrada (str): Ruta de la imagen a procesar.
+        carpeta_tipo (str): Carpeta donde se guardan las imágenes transformadas.
+        tipo_transformacion (str): 'rotar', 'escalar', 'reflejar' o 'trasladar'.
+        barrido (dict): Nombre de cada parámetro barrido y la lista de valores que toma.
+        tam_bloque (int): Si se indica, transforma por bloques de ese lado para acotar la memoria.
+        interpolacion (str): 'vecino' (por defecto), 'bilineal' o 'bicubica'.
+        medicion (dict): Si se indica, acumula los tiempos de todas las variantes de la imagen
+                         (ver `metricas.nueva_medicion`).
+        expandir (bool): Si es True, el destino se agranda o se reduce para que quepa la imagen
+                         transformada completa (ver `transformaciones.ajustar_lienzo`).
+        precision (str): 'doble' (por defecto) o 'compacta' (ver `procesar_imagenes`).
+        **parametros: Parámetros fijos de la transformación, comunes a todas las variantes.
+
+    Retorna:
+        list: Rutas de las variantes guardadas, o None si la imagen no se pudo cargar.
+    """
+    inicio = time.perf_counter()
+    imagen_original = cv2.imread(ruta_entrada)
+    if imagen_original is None:
+        print(f"No se pudo cargar la imagen desde {ruta_entrada}.")
+        return None
+    if medicion is not None:
+        medicion["cargar"] += time.perf_counter() - inicio
+        medicion["bytes_leidos"] += tamano_archivo(ruta_entrada)
+
+    filas, columnas = imagen_original.shape[:2]
+    combinaciones = combinaciones_barrido(barrido)
+    inicio = time.perf_counter()
+    matrices = [construir_matriz(tipo_transformacion, columnas, filas, **dict(parametros, **combinacion))
+                for combinacion in combinaciones]
+    formas_salida = [None] * len(matrices)
+    if expandir:
+        matrices, formas_salida = zip(*(ajustar_lienzo(matriz, columnas, filas) for matriz in matrices))
+    matrices = np.stack(matrices)
+    fin_matriz = time.perf_counter()
+    inversas = [None] * len(matrices) if tam_bloque else np.linalg.inv(matrices)
+    fin_inversa = time.perf_counter()
+    if medicion is not None:
+        medicion["matriz"] += fin_matriz - inicio
+        medicion["inversa"] += fin_inversa - fin_matriz
+
+    nombre, extension = os.path.splitext(os.path.basename(ruta_entrada))
+    guardadas = []
+    for combinacion, matriz, matriz_inversa, forma_salida in zip(combinaciones, matrices, inversas, formas_salida):
+        inicio = time.perf_counter()
+        if tam_bloque:
+            salida = None if forma_salida is None else np.zeros(forma_salida + imagen_original.shape[2:],
+                                                                dtype=imagen_original.dtype)
+            imagen_transformada = aplicar_transformacion_por_bloques(imagen_original, matriz, salida=salida,
+                                                                     tam_bloque=tam_bloque, interpolacion=interpolacion)
+        else:
+            imagen_transformada = aplicar_transformacion(imagen_original, matriz, cache=cache_mapas,
+                                                         interpolacion=interpolacion, matriz_inversa=matriz_inversa,
+                                                         forma_salida=forma_salida, precision=precision)
+        fin_transformar = time.perf_counter()
+
+        output_path = os.path.join(carpeta_tipo, f"{nombre}_{sufijo_parametros(combinacion)}{extension}")
+        if not cv2.imwrite(output_path, imagen_transformada):
+            print(f"No se pudo guardar {output_path}.")
+            continue
+        guardadas.append(output_path)
+        if medicion is not None:
+            medicion["transformar"] += fin_transformar - inicio
+            medicion["guardar"] += time.perf_counter() - fin_transformar
+            medicion["bytes_escritos"] += tamano_archivo(output_path)
+            medicion["megapixeles"] += filas * columnas / 1e6
+
+    print(f"{ruta_entrada}: {len(guardadas)} variantes guardadas en {carpeta_tipo}")
+    return guardadas
+
+
+def _barrer_imagen_en_trabajador(argumentos):
+    """
+    Envoltorio de `barrer_imagen` para el pool, análogo a `_procesar_imagen_en_trabajador`.
+
+    Parámetros:
+        argumentos (tuple): (ruta_entrada, carpeta_tipo, tipo_transformacion, barrido, opciones,
+                            parametros).
+
+    Retorna:
+        tuple: (rutas guardadas o None, mensaje de error o None, medición o None).
+    """
+    ruta_entrada, carpeta_tipo, tipo_transformacion, barrido, opciones, parametros = argumentos
+    opciones = dict(opciones)
+    medicion = nueva_medicion(ruta_entrada) if opciones.pop("medir", False) else None
+    try:
+        guardadas = barrer_imagen(ruta_entrada, carpeta_tipo, tipo_transformacion, barrido, medicion=medicion,
+                                  **opciones, **parametros)
+        return guardadas, None, medicion
+    except Exception as error:
+        return None, f"{type(error).__name__}: {error}", None
+
+
+def procesar_barrido(imagenes, tipo_transformacion, barrido, directorio_salida=None, trabajadores=None,
+                     ejecutor="procesos", tam_bloque=None, interpolacion="vecino", metricas=None, expandir=False,
+                     precision="doble", **parametros):
+    """
+    Aplica a cada imagen todas las combinaciones de un barrido de parámetros.
+
+    Cada imagen se lee y decodifica una sola vez, sin importar cuántas variantes se generen
+    (ver `barrer_imagen`). Los resultados van a `<raíz>/<tipo>/` con el valor de los
+    parámetros barridos en el nombre. Con `trabajadores` mayor que 1 las imágenes se reparten
+    entre un pool, cada una con todas sus variantes.
+
+    Parámetros:
+        imagenes (list): Lista de rutas de las imágenes a procesar.
+        tipo_transformacion (str): 'rotar', 'escalar', 'reflejar' o 'trasladar'.
+        barrido (dict): Nombre de cada parámetro barrido y la lista de valores que toma (ver
+                        `transformaciones.interpretar_barrido`), p. ej. {'angulo': [0, 5, 10]}.
+        directorio_salida (str): Carpeta raíz de salida (ver `procesar_imagenes`).
+        trabajadores (int): Número de trabajadores en paralelo. None o 1 procesa en secuencia.
+        ejecutor (str): 'procesos' (por defecto) o 'hilos'.
+        tam_bloque (int): Si se indica, transforma por bloques de ese lado.
+        interpolacion (str): 'vecino' (por defecto), 'bilineal' o 'bicubica'.
+        metricas (metricas.RegistroMetricas): Si se indica, registra una medición por imagen
+                                              con los tiempos de todas sus variantes.
+        expandir (bool): Si es True, el destino se agranda o se reduce para que quepa la imagen
+                         transformada completa (ver `transformaciones.ajustar_lienzo`).
+        precision (str): 'doble' (por defecto) o 'compacta' (ver `procesar_imagenes`).
+        **parametros: Parámetros fijos de la transformación, que no se barren.
+
+    Excepciones:
+        ValueError: Si el tipo, el ejecutor o la interpolación no son válidos, si se barre un
+                    parámetro que el tipo no usa o si falta alguno.
+
+    Retorna:
+        list: Rutas de las imágenes guardadas, agrupadas por imagen en el orden de `imagenes`.
+    """
+    if tipo_transformacion not in TIPOS_TRANSFORMACION or tipo_transformacion == "compuesta":
+        raise ValueError("El barrido admite 'rotar', 'escalar', 'reflejar' o 'trasladar'.")
+    nombres = PARAMETROS_TRANSFORMACION[tipo_transformacion]
+    sobrantes = [nombre for nombre in barrido if nombre not in nombres]
+    if sobrantes:
+        raise ValueError(f"'{tipo_transformacion}' no usa los parámetros: {', '.join(sobrantes)}.")
+    faltantes = [nombre for nombre in nombres if nombre not in barrido and parametros.get(nombre) is None]
+    if faltantes:
+        raise ValueError(f"Faltan los parámetros: {', '.join(faltantes)}.")
+    parametros = {nombre: valor for nombre, valor in parametros.items() if nombre not in barrido}
+    carpeta_tipo = preparar_carpeta(directorio_salida, tipo_transformacion, interpolacion, precision)
+    opciones = {"tam_bloque": tam_bloque, "interpolacion": interpolacion, "expandir": expandir,
+                "precision": precision, "medir": metricas is not None}
+    tareas = [(ruta, carpeta_tipo, tipo_transformacion, barrido, opciones, parametros) for ruta in imagenes]
+
+    if not trabajadores or trabajadores <= 1:
+        pool = None
+    elif ejecutor == "procesos":
+        pool = ProcessPoolExecutor(max_workers=trabajadores)
+    elif ejecutor == "hilos":
+        pool = ThreadPoolExecutor(max_workers=trabajadores)
+    else:
+        raise ValueError("Ejecutor no válido. Usa 'procesos' o 'hilos'.")
+
+    guardadas = []
+    with pool if pool is not None else contextlib.nullcontext():
+        ejecutar = pool.map if pool is not None else map
+        resultados = ejecutar(_barrer_imagen_en_trabajador, tareas)
+        for ruta_entrada, (rutas, error, medicion) in zip(imagenes, resultados):
+            if error is not None:
+                print(f"Error al procesar {ruta_entrada}: {error}")
+            elif rutas is not None:
+                guardadas.extend(rutas)
+                if medicion is not None:
+                    metricas.agregar(medicion)
+
+    if metricas is not None:
+        metricas.finalizar()
+    return guardadas
+
+
+_FIN = object()
+"""
+Marca que indica a los hilos de una etapa que no quedan más elementos.
+"""
+
+
+def procesar_imagenes_en_flujo(imagenes, tipo_transformacion, directorio_salida=None, hilos_lectura=2,
+                               hilos_calculo=2, hilos_escritura=2, capacidad_cola=8, tam_bloque=None,
+                               interpolacion="vecino", metricas=None, reanudar=False, expandir=False,
+                               progreso=None, cancelar=None, precision="doble", **parametros):
+    """
+    Procesa un lote como una cadena de tres etapas que trabajan a la vez: lectura, cálculo y
+    escritura.
+
+    Cada etapa tiene sus propios hilos y entre etapas hay colas de capacidad limitada. Mientras
+    una imagen se decodifica, otra se transforma y otra se codifica y escribe; OpenCV y NumPy
+    liberan el GIL en esas operaciones, así que los hilos avanzan en paralelo. Si una etapa va
+    más lenta, las colas llenas frenan a la anterior, de modo que en memoria nunca hay más de
+    unas pocas imágenes, sin importar el tamaño del lote. No se muestra ninguna imagen.
+
+    Parámetros:
+        imagenes (list): Lista de rutas de las imágenes a procesar.
+        tipo_transformacion (str): Tipo de transformación (ver `procesar_imagenes`).
+        directorio_salida (str): Carpeta raíz de salida (ver `procesar_imagenes`).
+        hilos_lectura (int): Hilos que leen y decodifican imágenes.
+        hilos_calculo (int): Hilos que aplican la transformación.
+        hilos_escritura (int): Hilos que codifican y guardan los resultados.
+        capacidad_cola (int): Imágenes que caben en cada cola entre etapas.
+        tam_bloque (int): Si se indica, transforma por bloques de ese lado.
+        interpolacion (str): 'vecino' (por defecto), 'bilineal' o 'bicubica'.
+        metricas (metricas.RegistroMetricas): Si se indica, registra el tiempo de cada etapa.
+        reanudar (bool): Si es True, salta las imágenes cuya salida ya está al día según el
+                         manifiesto (ver `procesar_imagenes`).
+        expandir (bool): Si es True, el destino se agranda o se reduce para que quepa la imagen
+                         transformada completa (ver `transformaciones.ajustar_lienzo`).
+        progreso (callable): Si se indica, se llama desde los hilos del lote como
+                             `progreso(hechas, total, ruta_salida)` (ver `procesar_imagenes`).
+        cancelar (threading.Event): Si se indica y se activa, no se leen más imágenes y las que
+                                    ya se leyeron no se transforman.
+        precision (str): 'doble' (por defecto) o 'compacta' (ver `procesar_imagenes`).
+        **parametros: Parámetros de la transformación (ver `procesar_imagenes`).
+
+    Excepciones:
+        ValueError: Si el tipo de transformación o la interpolación no son válidos.
+
+    Retorna:
+        list: Rutas de las imágenes guardadas (o ya al día), en el mismo orden que `imagenes`.
+    """
+    carpeta_tipo = preparar_carpeta(directorio_salida, tipo_transformacion, interpolacion, precision)
+    manifiesto, firma, pendientes, guardadas = _preparar_manifiesto(carpeta_tipo, imagenes, tipo_transformacion,
+                                                                    interpolacion, parametros, reanudar, expandir,
+                                                                    precision)
+    avance = _Avance(len(imagenes), len(guardadas), progreso)
+    cancelar = cancelar or threading.Event()
+
+    cola_rutas = queue.Queue(maxsize=capacidad_cola)
+    cola_imagenes = queue.Queue(maxsize=capacidad_cola)
+    cola_resultados = queue.Queue(maxsize=capacidad_cola)
+
+    def leer():
+        while True:
+            elemento = cola_rutas.get()
+            if elemento is _FIN:
+                return
+            indice, ruta_entrada = elemento
+            if cancelar.is_set():
+                continue
+            medicion = nueva_medicion(ruta_entrada) if metricas is not None else None
+            inicio = time.perf_counter()
+            imagen_original, huella = cargar_imagen(ruta_entrada)
+            if imagen_original is None:
+                print(f"No se pudo cargar la imagen desde {ruta_entrada}.")
+                avance.marcar(None)
+                continue
+            if medicion is not None:
+                medicion["cargar"] += time.perf_counter() - inicio
+                medicion["bytes_leidos"] += tamano_archivo(ruta_entrada)
+            cola_imagenes.put((indice, ruta_entrada, imagen_original, medicion, huella))
+
+    def calcular():
+        while True:
+            elemento = cola_imagenes.get()
+            if elemento is _FIN:
+                return
+            indice, ruta_entrada, imagen_original, medicion, huella = elemento
+            if cancelar.is_set():
+                continue
+            try:
+                imagen_transformada = transformar_imagen(imagen_original, tipo_transformacion,
+                                                         tam_bloque=tam_bloque, interpolacion=interpolacion,
+                                                         medicion=medicion, expandir=expandir, precision=precision,
+                                                         **parametros)
+            except Exception as error:
+                print(f"Error al procesar {ruta_entrada}: {type(error).__name__}: {error}")
+                avance.marcar(None)
+                continue
+            cola_resultados.put((indice, ruta_entrada, imagen_transformada, medicion, huella))
+
+    def escribir():
+        while True:
+            elemento = cola_resultados.get()
+            if elemento is _FIN:
+                return
+            indice, ruta_entrada, imagen_transformada, medicion, huella = elemento
+            output_path = os.path.join(carpeta_tipo, os.path.basename(ruta_entrada))
+            inicio = time.perf_counter()
+            try:
+                if not cv2.imwrite(output_path, imagen_transformada):
+                    raise OSError("cv2.imwrite no pudo escribir el archivo")
+            except Exception as error:
+                print(f"Error al guardar {output_path}: {type(error).__name__}: {error}")
+                avance.marcar(None)
+                continue
+            print(f"Procesada y guardada en: {output_path}")
+            guardadas[indice] = output_path
+            manifiesto.anotar(ruta_entrada, firma, huella)
+            avance.marcar(output_path)
+            if medicion is not None:
+                medicion["guardar"] += time.perf_counter() - inicio
+                medicion["bytes_escritos"] += tamano_archivo(output_path)
+                metricas.agregar(medicion)
+
+    def iniciar(funcion, cantidad):
+        hilos = [threading.Thread(target=funcion, daemon=True) for _ in range(max(1, cantidad))]
+        for hilo in hilos:
+            hilo.start()
+        return hilos
+
+    lectores = iniciar(leer, hilos_lectura)
+    calculadores = iniciar(calcular, hilos_calculo)
+    escritores = iniciar(escribir, hilos_escritura)
+
+    for indice in pendientes:
+        if cancelar.is_set():
+            break
+        cola_rutas.put((indice, imagenes[indice]))
+
+    # Cada etapa se cierra cuando la anterior ha terminado: una marca de fin por hilo.
+    for cola, hilos in ((cola_rutas, lectores), (cola_imagenes, calculadores), (cola_resultados, escritores)):
+        for _ in hilos:
+            cola.put(_FIN)
+        for hilo in hilos:
+            hilo.join()
+
+    if metricas is not None:
+        metricas.finalizar()
+    return [guardadas[indice] for indice in sorted(guardadas)]
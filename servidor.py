@@ -0,0 +1,532 @@
+"""
+Servicio HTTP local para transformar imágenes desde otros programas.
+
+Un único proceso de larga duración recibe las imágenes por HTTP, de modo que el motor, sus
+tablas y la caché de mapas se quedan en memoria entre peticiones y no hay que lanzar un proceso
+por imagen. Solo usa la biblioteca estándar (`http.server`), además de NumPy y OpenCV.
+
+Una petición es un POST a `/transformar` con los bytes de la imagen (PNG, JPEG, WebP...) como
+cuerpo y la transformación en la consulta; la respuesta es la imagen transformada, codificada en
+el formato pedido (PNG por defecto):
+
+    curl --data-binary @foto.png -o girada.png \\
+        "http://127.0.0.1:8080/transformar?tipo=rotar&angulo=30&interpolacion=bilineal"
+
+La consulta acepta `tipo` (también en inglés), los parámetros de ese tipo con los nombres de
+`construir_matriz` (`pasos` con la sintaxis de `interpretar_pasos`), `interpolacion`,
+`precision`, `expandir` (1 o 0) y `formato`. Un GET a `/estado` devuelve en JSON los contadores
+del servicio y de la caché de mapas.
+
+Las peticiones que llegan a la vez con imágenes del mismo tamaño y la misma transformación se
+agrupan durante una ventana de pocos milisegundos y se calculan juntas con
+`aplicar_transformacion_lote`, en un solo indexado sobre la pila. El servicio no tiene
+autenticación: por defecto solo escucha en 127.0.0.1.
+"""
+import collections
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import cv2
+import numpy as np
+
+from mapas import INTERPOLACIONES, PRECISIONES, cache_mapas
+from metricas import percentil
+from transformaciones import (
+    ALIAS_TRANSFORMACIONES,
+    PARAMETROS_TRANSFORMACION,
+    ajustar_lienzo,
+    aplicar_transformacion_lote,
+    construir_matriz,
+    interpretar_pasos,
+)
+
+FORMATOS_RESPUESTA = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+    "bmp": "image/bmp",
+    "tif": "image/tiff",
+    "tiff": "image/tiff",
+}
+"""
+Formatos en los que se puede pedir el resultado y su tipo MIME.
+"""
+
+MAXIMO_BYTES_PETICION = 64 * 1024 * 1024
+"""
+Tamaño máximo del cuerpo de una petición; las mayores se rechazan sin leerlas.
+"""
+
+TIEMPO_ESPERA_CONEXION = 30
+"""
+Segundos que una conexión puede pasar sin enviar datos antes de cerrarse, para que un cliente
+que anuncia más bytes de los que envía no retenga un hilo indefinidamente.
+"""
+
+MUESTRAS_LATENCIA = 1000
+"""
+Latencias más recientes que se conservan para calcular los percentiles de `/estado`.
+"""
+
+
+def interpretar_consulta(consulta):
+    """
+    Convierte la consulta de una petición en la transformación a aplicar.
+
+    Parámetros:
+        consulta (str): Parte de la URL tras el '?', p. ej. 'tipo=rotar&angulo=30'.
+
+    Retorna:
+        dict: 'tipo', 'parametros', 'interpolacion', 'expandir', 'precision' y 'formato'.
+
+    Excepciones:
+        ValueError: Si falta el tipo o alguno de sus parámetros, o si algún valor no es válido.
+    """
+    valores = {nombre: lista[-1] for nombre, lista in parse_qs(consulta).items()}
+    tipo = valores.get("tipo", "").lower()
+    tipo = ALIAS_TRANSFORMACIONES.get(tipo, tipo)
+    if tipo not in PARAMETROS_TRANSFORMACION:
+        raise ValueError(f"Tipo de transformación no válido: '{valores.get('tipo', '')}'.")
+    faltantes = [nombre for nombre in PARAMETROS_TRANSFORMACION[tipo] if nombre not in valores]
+    if faltantes:
+        raise ValueError(f"Faltan los parámetros {', '.join(faltantes)}.")
+
+    parametros = {}
+    for nombre in PARAMETROS_TRANSFORMACION[tipo]:
+        if nombre == "pasos":
+            parametros[nombre] = interpretar_pasos(valores[nombre])
+        elif nombre == "eje":
+            if valores[nombre] not in ("horizontal", "vertical"):
+                raise ValueError("Eje no válido. Usa 'horizontal' o 'vertical'.")
+            parametros[nombre] = valores[nombre]
+        else:
+            try:
+                parametros[nombre] = float(valores[nombre])
+            except ValueError:
+                raise ValueError(f"El parámetro {nombre} debe ser un número.")
+
+    interpolacion = valores.get("interpolacion", "vecino")
+    if interpolacion not in INTERPOLACIONES:
+        raise ValueError(f"Interpolación no válida. Usa una de: {', '.join(INTERPOLACIONES)}.")
+    precision = valores.get("precision", "doble")
+    if precision not in PRECISIONES:
+        raise ValueError(f"Precisión no válida. Usa una de: {', '.join(PRECISIONES)}.")
+    formato = valores.get("formato", "png").lower().lstrip(".")
+    if formato not in FORMATOS_RESPUESTA:
+        raise ValueError(f"Formato no válido. Usa uno de: {', '.join(FORMATOS_RESPUESTA)}.")
+    expandir = valores.get("expandir", "0").lower() in ("1", "true", "si", "sí")
+    return {"tipo": tipo, "parametros": parametros, "interpolacion": interpolacion, "expandir": expandir,
+            "precision": precision, "formato": formato}
+
+
+class AgrupadorPeticiones:
+    """
+    Agrupa las transformaciones que piden varios hilos a la vez y las calcula por lotes.
+
+    Las imágenes con la misma forma y tipo, la misma matriz, el mismo destino, la misma
+    interpolación y la misma precisión forman un grupo. Un grupo se calcula cuando pasa
+    `ventana` segundos desde su primera imagen o cuando reúne `tamano_lote` imágenes, lo que
+    ocurra antes; mientras todos los hilos de cálculo están ocupados los grupos siguen creciendo,
+    así que con mucha carga los lotes se agrandan solos. Es segura para usarse desde varios hilos.
+
+    Atributos:
+        ventana (float): Segundos que se espera a más imágenes antes de calcular un grupo.
+        tamano_lote (int): Imágenes por lote como máximo.
+        cache (mapas.CacheMapas): Caché de mapas compartida por todos los lotes.
+    """
+
+    def __init__(self, ventana=0.002, tamano_lote=16, hilos=None, cache=cache_mapas):
+        """
+        Parámetros:
+            ventana (float): Segundos de espera de cada grupo; 0 solo agrupa lo que llega
+                             mientras los hilos de cálculo están ocupados.
+            tamano_lote (int): Imágenes por lote como máximo.
+            hilos (int): Hilos que calculan los lotes. Por defecto, uno por núcleo.
+            cache (mapas.CacheMapas): Caché de mapas de coordenadas.
+        """
+        self.ventana = ventana
+        self.tamano_lote = max(1, tamano_lote)
+        self.cache = cache
+        # Grupos que aún aceptan imágenes: clave -> [límite, matriz, forma_salida, interpolación,
+        # precisión, imágenes, futuros].
+        self._abiertos = {}
+        self._completos = collections.deque()
+        self._condicion = threading.Condition()
+        self._cerrado = False
+        self.imagenes = 0
+        self.lotes = 0
+        self.lote_maximo = 0
+        self._hilos = [threading.Thread(target=self._calcular, daemon=True)
+                       for _ in range(hilos or os.cpu_count() or 1)]
+        for hilo in self._hilos:
+            hilo.start()
+
+    def enviar(self, imagen, matriz, forma_salida=None, interpolacion="vecino", precision="doble"):
+        """
+        Encola una imagen en el grupo que le corresponde.
+
+        Parámetros:
+            imagen (numpy.ndarray): Imagen a transformar.
+            matriz (numpy.ndarray): Matriz de transformación afín (3x3).
+            forma_salida (tuple): (filas, columnas) del destino. Por defecto, las de la imagen.
+            interpolacion (str): 'vecino' (por defecto), 'bilineal' o 'bicubica'.
+            precision (str): 'doble' (por defecto) o 'compacta'.
+
+        Retorna:
+            concurrent.futures.Future: Se completa con la imagen transformada.
+
+        Excepciones:
+            RuntimeError: Si el agrupador ya se cerró.
+        """
+        forma_salida = tuple(forma_salida) if forma_salida is not None else imagen.shape[:2]
+        matriz = np.ascontiguousarray(matriz, dtype=np.float64)
+        clave = (imagen.shape, imagen.dtype.str, matriz.tobytes(), forma_salida, interpolacion, precision)
+        futuro = Future()
+        with self._condicion:
+            if self._cerrado:
+                raise RuntimeError("El agrupador está cerrado.")
+            grupo = self._abiertos.get(clave)
+            if grupo is None:
+                grupo = [time.monotonic() + self.ventana, matriz, forma_salida, interpolacion, precision, [], []]
+                self._abiertos[clave] = grupo
+            grupo[5].append(imagen)
+            grupo[6].append(futuro)
+            if len(grupo[5]) >= self.tamano_lote:
+                del self._abiertos[clave]
+                self._completos.append(grupo)
+            self._condicion.notify()
+        return futuro
+
+    def transformar(self, imagen, matriz, forma_salida=None, interpolacion="vecino", precision="doble"):
+        """
+        Transforma una imagen junto con las que lleguen a la vez y espera el resultado.
+
+        Parámetros:
+            Los mismos que `enviar`.
+
+        Retorna:
+            numpy.ndarray: Imagen transformada, idéntica a la de `aplicar_transformacion`.
+        """
+        return self.enviar(imagen, matriz, forma_salida, interpolacion, precision).result()
+
+    def _siguiente(self):
+        """
+        Espera el siguiente grupo listo para calcular; None si el agrupador se cerró y no
+        quedan grupos.
+        """
+        with self._condicion:
+            while True:
+                if self._completos:
+                    return self._completos.popleft()
+                ahora = time.monotonic()
+                limite = None
+                for clave, grupo in self._abiertos.items():
+                    if grupo[0] <= ahora or self._cerrado:
+                        del self._abiertos[clave]
+                        return grupo
+                    limite = grupo[0] if limite is None else min(limite, grupo[0])
+                if self._cerrado:
+                    return None
+                self._condicion.wait(None if limite is None else limite - ahora)
+
+    def _calcular(self):
+        """
+        Bucle de un hilo de cálculo: toma grupos y los transforma como una pila.
+        """
+        while True:
+            grupo = self._siguiente()
+            if grupo is None:
+                return
+            _, matriz, forma_salida, interpolacion, precision, imagenes, futuros = grupo
+            try:
+                pila = imagenes[0][np.newaxis] if len(imagenes) == 1 else np.stack(imagenes)
+                resultado = aplicar_transformacion_lote(pila, matriz, cache=self.cache, interpolacion=interpolacion,
+                                                        precision=precision, forma_salida=forma_salida)
+            except Exception as error:
+                for futuro in futuros:
+                    futuro.set_exception(error)
+                continue
+            with self._condicion:
+                self.imagenes += len(imagenes)
+                self.lotes += 1
+                self.lote_maximo = max(self.lote_maximo, len(imagenes))
+            for futuro, imagen_transformada in zip(futuros, resultado):
+                futuro.set_result(imagen_transformada)
+
+    def estadisticas(self):
+        """
+        Resume la actividad del agrupador.
+
+        Retorna:
+            dict: 'imagenes' y 'lotes' calculados, 'imagenes_por_lote' (media), 'lote_maximo'
+                  y 'en_espera' (imágenes encoladas que aún no se calculan).
+        """
+        with self._condicion:
+            en_espera = sum(len(grupo[5]) for grupo in self._abiertos.values())
+            en_espera += sum(len(grupo[5]) for grupo in self._completos)
+            return {
+                "imagenes": self.imagenes,
+                "lotes": self.lotes,
+                "imagenes_por_lote": self.imagenes / self.lotes if self.lotes else 0.0,
+                "lote_maximo": self.lote_maximo,
+                "en_espera": en_espera,
+            }
+
+    def cerrar(self):
+        """
+        Calcula los grupos pendientes y detiene los hilos de cálculo.
+
+        No retorna ningún valor.
+        """
+        with self._condicion:
+            self._cerrado = True
+            self._condicion.notify_all()
+        for hilo in self._hilos:
+            hilo.join()
+
+
+class ManejadorTransformaciones(BaseHTTPRequestHandler):
+    """
+    Atiende las peticiones HTTP del servicio (ver la documentación del módulo).
+    """
+
+    protocol_version = "HTTP/1.1"
+    server_version = "al5"
+    timeout = TIEMPO_ESPERA_CONEXION
+
+    def do_GET(self):
+        """
+        Responde a `/estado` con los contadores del servicio en JSON.
+        """
+        if urlsplit(self.path).path.rstrip("/") not in ("/estado", "/status"):
+            self._responder_error(404, "Ruta no encontrada. Usa POST /transformar o GET /estado.")
+            return
+        self._responder(200, "application/json", json.dumps(self.server.estadisticas(), indent=2).encode("utf-8"))
+
+    def do_POST(self):
+        """
+        Transforma la imagen del cuerpo de la petición y responde con el resultado codificado.
+        """
+        inicio = time.perf_counter()
+        partes = urlsplit(self.path)
+        if partes.path.rstrip("/") not in ("/transformar", "/transform"):
+            self.close_connection = True  # El cuerpo no se lee.
+            self._responder_error(404, "Ruta no encontrada. Usa POST /transformar o GET /estado.")
+            return
+        longitud = self.headers.get("Content-Length")
+        if longitud is None:
+            self.close_connection = True
+            self._responder_error(411, "Falta la cabecera Content-Length.")
+            return
+        try:
+            longitud = int(longitud)
+        except ValueError:
+            longitud = -1
+        if longitud < 0:
+            # Con una longitud no válida no se sabe dónde termina el cuerpo: se cierra la conexión.
+            self.close_connection = True
+            self._responder_error(400, "La cabecera Content-Length no es un número de bytes válido.")
+            return
+        if longitud > MAXIMO_BYTES_PETICION:
+            self.close_connection = True
+            self._responder_error(413, f"La imagen supera los {MAXIMO_BYTES_PETICION} bytes.")
+            return
+        cuerpo = self.rfile.read(longitud)
+        if len(cuerpo) < longitud:
+            # El cliente cerró o dejó de enviar antes de completar el cuerpo.
+            self.close_connection = True
+            self._responder_error(400, "El cuerpo de la petición está incompleto.")
+            return
+
+        try:
+            especificacion = interpretar_consulta(partes.query)
+        except ValueError as error:
+            self._responder_error(400, str(error))
+            return
+        imagen = cv2.imdecode(np.frombuffer(cuerpo, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+        if imagen is None:
+            self._responder_error(400, "El cuerpo de la petición no es una imagen que OpenCV pueda leer.")
+            return
+
+        try:
+            filas, columnas = imagen.shape[:2]
+            matriz = construir_matriz(especificacion["tipo"], columnas, filas, **especificacion["parametros"])
+            forma_salida = None
+            if especificacion["expandir"]:
+                matriz, forma_salida = ajustar_lienzo(matriz, columnas, filas)
+            imagen_transformada = self.server.agrupador.transformar(imagen, matriz, forma_salida,
+                                                                    especificacion["interpolacion"],
+                                                                    especificacion["precision"])
+            correcto, codificada = cv2.imencode("." + especificacion["formato"], imagen_transformada)
+        except ValueError as error:
+            self._responder_error(400, str(error))
+            return
+        except Exception as error:
+            self._responder_error(500, f"{type(error).__name__}: {error}")
+            return
+        if not correcto:
+            self._responder_error(500, f"No se pudo codificar el resultado como {especificacion['formato']}.")
+            return
+        self._responder(200, FORMATOS_RESPUESTA[especificacion["formato"]], codificada.tobytes())
+        self.server.anotar(time.perf_counter() - inicio)
+
+    def _responder(self, estado, tipo_contenido, cuerpo):
+        """
+        Envía una respuesta completa con su longitud, para mantener viva la conexión.
+        """
+        self.send_response(estado)
+        self.send_header("Content-Type", tipo_contenido)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _responder_error(self, estado, mensaje):
+        """
+        Responde con un error en JSON y lo cuenta en las estadísticas del servicio.
+        """
+        self.server.anotar(None)
+        self._responder(estado, "application/json", json.dumps({"error": mensaje}).encode("utf-8"))
+
+    def log_message(self, formato, *argumentos):
+        """
+        Registra cada petición en la consola solo si el servidor se creó con `registrar`.
+        """
+        if self.server.registrar:
+            super().log_message(formato, *argumentos)
+
+
+class ServidorTransformaciones(ThreadingHTTPServer):
+    """
+    Servidor HTTP con un hilo por conexión y un `AgrupadorPeticiones` compartido.
+
+    Atributos:
+        agrupador (AgrupadorPeticiones): Agrupa y calcula las transformaciones.
+        registrar (bool): Si es True, cada petición se muestra en la consola.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, direccion, agrupador, registrar=False):
+        """
+        Parámetros:
+            direccion (tuple): (anfitrión, puerto); el puerto 0 elige uno libre.
+            agrupador (AgrupadorPeticiones): Agrupador que calcula las transformaciones.
+            registrar (bool): Si es True, cada petición se muestra en la consola.
+        """
+        # Antes de abrir el socket: si falla, `server_close` ya necesita el agrupador.
+        self.agrupador = agrupador
+        self.registrar = registrar
+        self.respondidas = 0
+        self.errores = 0
+        self._latencias = collections.deque(maxlen=MUESTRAS_LATENCIA)
+        self._candado = threading.Lock()
+        super().__init__(direccion, ManejadorTransformaciones)
+
+    def anotar(self, latencia):
+        """
+        Cuenta una petición respondida y su latencia en segundos, o un error si es None.
+
+        No retorna ningún valor.
+        """
+        with self._candado:
+            if latencia is None:
+                self.errores += 1
+            else:
+                self.respondidas += 1
+                self._latencias.append(latencia)
+
+    def estadisticas(self):
+        """
+        Resume el estado del servicio.
+
+        Retorna:
+            dict: 'respondidas', 'errores', 'latencia' (p50, p95, p99 y máximo en segundos de
+                  las últimas `MUESTRAS_LATENCIA` peticiones, desde que se leyó la cabecera
+                  hasta que se envió la imagen), 'agrupador' y 'cache_mapas'.
+        """
+        with self._candado:
+            latencias = list(self._latencias)
+            respondidas, errores = self.respondidas, self.errores
+        return {
+            "respondidas": respondidas,
+            "errores": errores,
+            "latencia": {
+                "p50": percentil(latencias, 50),
+                "p95": percentil(latencias, 95),
+                "p99": percentil(latencias, 99),
+                "maxima": max(latencias, default=0.0),
+            },
+            "agrupador": self.agrupador.estadisticas(),
+            "cache_mapas": self.agrupador.cache.estadisticas(),
+        }
+
+    def server_close(self):
+        """
+        Cierra el socket y detiene los hilos de cálculo del agrupador.
+        """
+        super().server_close()
+        self.agrupador.cerrar()
+
+
+def calentar(cache=cache_mapas):
+    """
+    Ejecuta una transformación mínima con cada interpolación y precisión para que la primera
+    petición real no pague la inicialización del motor (tablas de pesos, funciones de NumPy).
+
+    No retorna ningún valor.
+    """
+    imagen = np.zeros((1, 8, 8, 3), dtype=np.uint8)
+    matriz = construir_matriz("rotar", 8, 8, angulo=1.0)
+    for interpolacion in INTERPOLACIONES:
+        for precision in PRECISIONES:
+            aplicar_transformacion_lote(imagen, matriz, cache=cache, interpolacion=interpolacion, precision=precision)
+    cv2.imencode(".png", imagen[0])
+
+
+def crear_servidor(anfitrion="127.0.0.1", puerto=8080, ventana=0.002, tamano_lote=16, hilos=None, registrar=False):
+    """
+    Crea el servicio con el motor ya caliente, listo para `serve_forever`.
+
+    Parámetros:
+        anfitrion (str): Dirección en la que escucha (por defecto solo la máquina local).
+        puerto (int): Puerto TCP; 0 elige uno libre (ver `server_address`).
+        ventana (float): Segundos que se esperan peticiones para agrupar (ver `AgrupadorPeticiones`).
+        tamano_lote (int): Imágenes por lote como máximo.
+        hilos (int): Hilos de cálculo. Por defecto, uno por núcleo.
+        registrar (bool): Si es True, cada petición se muestra en la consola.
+
+    Retorna:
+        ServidorTransformaciones: Servidor escuchando, aún sin atender peticiones.
+    """
+    calentar()
+    agrupador = AgrupadorPeticiones(ventana=ventana, tamano_lote=tamano_lote, hilos=hilos)
+    return ServidorTransformaciones((anfitrion, puerto), agrupador, registrar)
+
+
+def servir(anfitrion="127.0.0.1", puerto=8080, ventana=0.002, tamano_lote=16, hilos=None, registrar=False):
+    """
+    Atiende peticiones hasta que se pulse Ctrl+C.
+
+    Parámetros:
+        Los mismos que `crear_servidor`.
+
+    No retorna ningún valor.
+    """
+    servidor = crear_servidor(anfitrion, puerto, ventana, tamano_lote, hilos, registrar)
+    anfitrion, puerto = servidor.server_address[:2]
+    print(f"Sirviendo en http://{anfitrion}:{puerto}/transformar (Ctrl+C para terminar).")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        resumen = servidor.estadisticas()
+        print(f"Respondidas {resumen['respondidas']} · errores {resumen['errores']} · "
+              f"{resumen['agrupador']['imagenes_por_lote']:.1f} imágenes por lote")
@@ -0,0 +1,100 @@
+"""
+Pruebas del procesamiento por lotes: en paralelo se deben guardar los mismos archivos, con los
+mismos bytes, que en secuencia, y una imagen que no se puede leer no debe detener el resto.
+
+    python -m pytest -q
+"""
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from procesamiento import procesar_imagenes
+
+
+def escribir_imagenes(carpeta, cantidad=6):
+    """
+    Guarda imágenes PNG aleatorias y reproducibles de tamaños distintos.
+
+    Retorna:
+        list: Rutas de las imágenes escritas.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    generador = np.random.default_rng(0)
+    rutas = []
+    for indice in range(cantidad):
+        ruta = os.path.join(carpeta, f"imagen_{indice}.png")
+        forma = (20 + indice, 30 - indice, 3) if indice % 2 else (20 + indice, 30 - indice)
+        cv2.imwrite(ruta, generador.integers(0, 256, size=forma, dtype=np.uint8))
+        rutas.append(ruta)
+    return rutas
+
+
+def leer_salidas(carpeta):
+    """
+    Lee los archivos guardados en una carpeta, sin el manifiesto.
+
+    Retorna:
+        dict: Nombre de archivo -> contenido en bytes.
+    """
+    salidas = {}
+    for nombre in sorted(os.listdir(carpeta)):
+        if nombre != "manifiesto.jsonl":
+            with open(os.path.join(carpeta, nombre), "rb") as archivo:
+                salidas[nombre] = archivo.read()
+    return salidas
+
+
+@pytest.mark.parametrize("ejecutor", ["procesos", "hilos"])
+@pytest.mark.parametrize("tipo, parametros", [
+    ("rotar", {"angulo": 30}),
+    ("escalar", {"factor_x": 1.5, "factor_y": 0.5}),
+    ("reflejar", {"eje": "vertical"}),
+], ids=["rotar", "escalar", "reflejar"])
+def test_paralelo_igual_a_secuencial(tmp_path, ejecutor, tipo, parametros):
+    imagenes = escribir_imagenes(str(tmp_path / "entrada"))
+    secuencial = procesar_imagenes(imagenes, tipo, mostrar=False, directorio_salida=str(tmp_path / "secuencial"),
+                                   **parametros)
+    paralelo = procesar_imagenes(imagenes, tipo, directorio_salida=str(tmp_path / "paralelo"), trabajadores=2,
+                                 ejecutor=ejecutor, **parametros)
+
+    assert [os.path.basename(ruta) for ruta in paralelo] == [os.path.basename(ruta) for ruta in secuencial]
+    assert len(paralelo) == len(imagenes)
+    salidas_secuencial = leer_salidas(os.path.dirname(secuencial[0]))
+    assert salidas_secuencial == leer_salidas(os.path.dirname(paralelo[0]))
+
+
+@pytest.mark.parametrize("trabajadores", [1, 2])
+def test_imagen_ilegible_no_detiene_el_lote(tmp_path, trabajadores):
+    imagenes = escribir_imagenes(str(tmp_path / "entrada"))
+    ilegible = str(tmp_path / "entrada" / "ilegible.png")
+    with open(ilegible, "wb") as archivo:
+        archivo.write(b"esto no es una imagen")
+    inexistente = str(tmp_path / "entrada" / "inexistente.png")
+    lote = imagenes[:2] + [ilegible] + imagenes[2:4] + [inexistente] + imagenes[4:]
+
+    guardadas = procesar_imagenes(lote, "rotar", mostrar=False, directorio_salida=str(tmp_path / "salida"),
+                                  trabajadores=trabajadores, angulo=30)
+
+    assert [os.path.basename(ruta) for ruta in guardadas] == [os.path.basename(ruta) for ruta in imagenes]
+    assert all(os.path.getsize(ruta) > 0 for ruta in guardadas)
+
+
+@pytest.mark.parametrize("trabajadores", [1, 2])
+def test_escritura_fallida_no_se_anota(tmp_path, trabajadores):
+    imagenes = escribir_imagenes(str(tmp_path / "entrada"), cantidad=3)
+    salida = str(tmp_path / "salida")
+    # Una carpeta con el nombre de la salida hace fallar a cv2.imwrite.
+    bloqueada = os.path.join(salida, "rotar", "imagen_1.png")
+    os.makedirs(bloqueada)
+
+    guardadas = procesar_imagenes(imagenes, "rotar", mostrar=False, directorio_salida=salida,
+                                  trabajadores=trabajadores, angulo=30)
+    assert [os.path.basename(ruta) for ruta in guardadas] == ["imagen_0.png", "imagen_2.png"]
+
+    # Al reanudar, la imagen que no se guardó se vuelve a procesar.
+    os.rmdir(bloqueada)
+    guardadas = procesar_imagenes(imagenes, "rotar", mostrar=False, directorio_salida=salida,
+                                  trabajadores=trabajadores, reanudar=True, angulo=30)
+    assert len(guardadas) == 3 and os.path.isfile(bloqueada)
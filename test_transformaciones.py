@@ -0,0 +1,259 @@
+"""
+Pruebas de exactitud del motor frente al recorrido píxel por píxel original.
+
+Con interpolación 'vecino' y precisión 'doble' el motor vectorizado, la caché de mapas, los
+atajos sin mapa (reflexiones, giros de 90 grados, traslaciones enteras), el modo por bloques y
+las pilas deben dar exactamente los mismos píxeles que `aplicar_transformacion_referencia`. Las
+imágenes son pequeñas porque la referencia recorre cada píxel en Python.
+
+    python -m pytest -q
+"""
+import numpy as np
+import pytest
+
+from mapas import CacheMapas, coordenadas_origen, permutacion_entera, remapear_permutacion
+from transformaciones import (
+    aplicar_transformacion,
+    aplicar_transformacion_lote,
+    aplicar_transformacion_por_bloques,
+    aplicar_transformacion_referencia,
+    combinaciones_barrido,
+    construir_matriz,
+    interpretar_barrido,
+    interpretar_pasos,
+    sufijo_parametros,
+)
+
+FORMAS = [(23, 31, 3), (31, 23), (1, 17), (17, 1), (1, 17, 3), (17, 1, 3), (1, 1)]
+"""
+Formas de imagen probadas: color y gris, apaisada y vertical, y los casos de una sola fila,
+una sola columna y un solo píxel.
+"""
+
+TRANSFORMACIONES = [
+    ("rotar", {"angulo": 0}),
+    ("rotar", {"angulo": 17}),
+    ("rotar", {"angulo": 30}),
+    ("rotar", {"angulo": 45}),
+    ("rotar", {"angulo": -123.4}),
+    ("rotar", {"angulo": 90}),
+    ("rotar", {"angulo": 180}),
+    ("rotar", {"angulo": 270}),
+    ("rotar", {"angulo": -90}),
+    ("rotar", {"angulo": 450}),
+    ("escalar", {"factor_x": 2, "factor_y": 2}),
+    ("escalar", {"factor_x": 0.5, "factor_y": 1.5}),
+    ("escalar", {"factor_x": 3, "factor_y": 0.3}),
+    ("escalar", {"factor_x": -1, "factor_y": 1}),
+    ("reflejar", {"eje": "horizontal"}),
+    ("reflejar", {"eje": "vertical"}),
+    ("trasladar", {"dx": 3, "dy": -2}),
+    ("trasladar", {"dx": 0.5, "dy": -1.25}),
+    ("trasladar", {"dx": -2.7, "dy": 4.1}),
+    ("trasladar", {"dx": 1000, "dy": 0}),
+    ("compuesta", {"pasos": [("rotar", {"angulo": 90}), ("trasladar", {"dx": 2.5, "dy": 1})]}),
+    ("compuesta", {"pasos": [("escalar", {"factor_x": 1.5, "factor_y": 0.75}), ("rotar", {"angulo": 30})]}),
+]
+"""
+Transformaciones probadas, como pares (tipo, parámetros) de `construir_matriz`.
+"""
+
+PERMUTACIONES = [
+    ("rotar", {"angulo": 90}),
+    ("rotar", {"angulo": 180}),
+    ("rotar", {"angulo": 270}),
+    ("rotar", {"angulo": -90}),
+    ("rotar", {"angulo": 450}),
+    ("escalar", {"factor_x": -1, "factor_y": 1}),
+    ("reflejar", {"eje": "horizontal"}),
+    ("reflejar", {"eje": "vertical"}),
+    ("trasladar", {"dx": 3, "dy": -2}),
+    ("trasladar", {"dx": 1000, "dy": 0}),
+]
+"""
+Transformaciones que solo reordenan píxeles enteros y deben resolverse sin mapa.
+"""
+
+TAMANOS_BLOQUE = [1, 3, 7, 64]
+"""
+Lados de bloque del modo por bloques: de un píxel, que no dividen la imagen y mayor que ella.
+"""
+
+
+def imagen_prueba(forma, semilla=0):
+    """
+    Genera una imagen uint8 aleatoria y reproducible.
+    """
+    return np.random.default_rng(semilla).integers(0, 256, size=forma, dtype=np.uint8)
+
+
+def caso(forma, tipo, parametros):
+    """
+    Prepara la imagen, la matriz y el resultado esperado de un caso.
+
+    Retorna:
+        tuple: (imagen, matriz, resultado de la referencia).
+    """
+    imagen = imagen_prueba(forma)
+    matriz = construir_matriz(tipo, forma[1], forma[0], **parametros)
+    return imagen, matriz, aplicar_transformacion_referencia(imagen, matriz)
+
+
+def identificador(valor):
+    """
+    Nombre legible de cada transformación en la salida de pytest.
+    """
+    if isinstance(valor, dict):
+        return ",".join(f"{nombre}={dato}" for nombre, dato in valor.items())
+    return str(valor)
+
+
+parametrizar = pytest.mark.parametrize(
+    "forma, tipo, parametros",
+    [(forma, tipo, parametros) for forma in FORMAS for tipo, parametros in TRANSFORMACIONES],
+    ids=identificador,
+)
+
+
+@parametrizar
+def test_vectorizado_igual_a_referencia(forma, tipo, parametros):
+    imagen, matriz, esperada = caso(forma, tipo, parametros)
+    np.testing.assert_array_equal(aplicar_transformacion(imagen, matriz), esperada)
+
+
+@parametrizar
+def test_cache_igual_a_referencia(forma, tipo, parametros):
+    imagen, matriz, esperada = caso(forma, tipo, parametros)
+    cache = CacheMapas()
+    # La primera llamada calcula y guarda el mapa; la segunda lo reutiliza.
+    np.testing.assert_array_equal(aplicar_transformacion(imagen, matriz, cache=cache), esperada)
+    np.testing.assert_array_equal(aplicar_transformacion(imagen, matriz, cache=cache), esperada)
+
+
+@pytest.mark.parametrize("forma", FORMAS)
+@pytest.mark.parametrize("tipo, parametros", PERMUTACIONES, ids=identificador)
+def test_permutacion_igual_a_referencia(forma, tipo, parametros):
+    imagen, matriz, esperada = caso(forma, tipo, parametros)
+    permutacion = permutacion_entera(matriz)
+    assert permutacion is not None
+    np.testing.assert_array_equal(remapear_permutacion(imagen, permutacion), esperada)
+
+
+GIROS_EXACTOS = {
+    90: [[5, 10, 15, 20, 0],
+         [4, 9, 14, 19, 0],
+         [3, 8, 13, 18, 0],
+         [2, 7, 12, 17, 0]],
+    180: [[0, 0, 0, 0, 0],
+          [20, 19, 18, 17, 16],
+          [15, 14, 13, 12, 11],
+          [10, 9, 8, 7, 6]],
+    270: [[0, 16, 11, 6, 1],
+          [0, 17, 12, 7, 2],
+          [0, 18, 13, 8, 3],
+          [0, 19, 14, 9, 4]],
+}
+"""
+Resultado de girar la imagen 4x5 con los valores 1..20 respecto a su centro (2, 2).
+"""
+
+
+@pytest.mark.parametrize("angulo", GIROS_EXACTOS)
+def test_giros_de_90_grados_exactos(angulo):
+    # Cambio deliberado frente al motor original: con cos y sin exactos cada píxel se mueve
+    # entero. Antes el residuo de np.cos(np.radians(90)) = 6e-17 repetía y perdía columnas
+    # (a 90 grados la primera fila era [5, 5, 10, 15, 20]). La comparación con la referencia
+    # no lo detectaría, porque ambas usan la misma matriz.
+    imagen = np.arange(1, 21, dtype=np.uint8).reshape(4, 5)
+    matriz = construir_matriz("rotar", 5, 4, angulo=angulo)
+    np.testing.assert_array_equal(aplicar_transformacion(imagen, matriz), GIROS_EXACTOS[angulo])
+    np.testing.assert_array_equal(aplicar_transformacion_referencia(imagen, matriz), GIROS_EXACTOS[angulo])
+    np.testing.assert_array_equal(construir_matriz("rotar", 5, 4, angulo=angulo + 360), matriz)
+
+
+@pytest.mark.parametrize("tipo, parametros", [
+    ("rotar", {"angulo": 30}),
+    ("escalar", {"factor_x": 2, "factor_y": 2}),
+    ("trasladar", {"dx": 0.5, "dy": -1.25}),
+], ids=identificador)
+def test_permutacion_descarta_el_resto(tipo, parametros):
+    assert permutacion_entera(construir_matriz(tipo, 31, 23, **parametros)) is None
+
+
+@parametrizar
+@pytest.mark.parametrize("tam_bloque", TAMANOS_BLOQUE)
+def test_por_bloques_igual_a_referencia(forma, tipo, parametros, tam_bloque):
+    imagen, matriz, esperada = caso(forma, tipo, parametros)
+    resultado = aplicar_transformacion_por_bloques(imagen, matriz, tam_bloque=tam_bloque)
+    np.testing.assert_array_equal(resultado, esperada)
+
+
+@parametrizar
+def test_lote_igual_a_referencia(forma, tipo, parametros):
+    imagen, matriz, esperada = caso(forma, tipo, parametros)
+    pila = np.stack([imagen, imagen[::-1, ::-1].copy()])
+    esperadas = [esperada, aplicar_transformacion_referencia(pila[1], matriz)]
+    np.testing.assert_array_equal(aplicar_transformacion_lote(pila, matriz), esperadas)
+
+
+def test_lote_con_una_matriz_por_imagen():
+    forma = (23, 31, 3)
+    pila = np.stack([imagen_prueba(forma, semilla) for semilla in range(len(TRANSFORMACIONES))])
+    matrices = np.stack([construir_matriz(tipo, forma[1], forma[0], **parametros)
+                         for tipo, parametros in TRANSFORMACIONES])
+    esperadas = [aplicar_transformacion_referencia(imagen, matriz) for imagen, matriz in zip(pila, matrices)]
+    np.testing.assert_array_equal(aplicar_transformacion_lote(pila, matrices), esperadas)
+
+
+@pytest.mark.parametrize("tipo, parametros", [
+    ("escalar", {"factor_x": 1.5, "factor_y": 1.5}),
+    ("escalar", {"factor_x": 0.3, "factor_y": -2.7}),
+    ("reflejar", {"eje": "vertical"}),
+    ("trasladar", {"dx": -2.7, "dy": 4.1}),
+    ("compuesta", {"pasos": [("escalar", {"factor_x": 1.1, "factor_y": 0.9}), ("trasladar", {"dx": 0.5, "dy": 0})]}),
+], ids=identificador)
+@pytest.mark.parametrize("fila_inicio, columna_inicio", [(0, 0), (5, 11)])
+def test_coordenadas_separables_igual_a_producto_completo(tipo, parametros, fila_inicio, columna_inicio):
+    # Con ejes separados se calcula una fila y una columna; cada píxel debe coincidir con el
+    # producto matriz-vector y el truncamiento del recorrido de referencia.
+    matriz_inversa = np.linalg.inv(construir_matriz(tipo, 31, 23, **parametros))
+    assert matriz_inversa[0, 1] == 0 and matriz_inversa[1, 0] == 0
+    x_original, y_original = coordenadas_origen(matriz_inversa, 23, 31, fila_inicio, columna_inicio)
+    for i in range(23):
+        for j in range(31):
+            x, y, _ = np.dot(matriz_inversa, [j + columna_inicio, i + fila_inicio, 1])
+            assert (x_original[i, j], y_original[i, j]) == (int(x), int(y))
+
+
+@pytest.mark.parametrize("especificacion", [
+    "rotar:factor_x=2",
+    "escalar:factor_x=2",
+    "reflejar:eje=diagonal",
+    "rotar:angulo=treinta",
+    "cizallar:k=1",
+    "rotar:angulo",
+    "",
+])
+def test_pasos_no_validos(especificacion):
+    with pytest.raises(ValueError):
+        interpretar_pasos(especificacion)
+
+
+def test_pasos_validos():
+    pasos = interpretar_pasos("rotate:angulo=30; reflejar:eje=vertical;trasladar:dx=1,dy=-2.5")
+    assert pasos == [("rotar", {"angulo": 30.0}), ("reflejar", {"eje": "vertical"}),
+                     ("trasladar", {"dx": 1.0, "dy": -2.5})]
+
+
+def test_sufijos_de_barrido_distintos():
+    barrido = interpretar_barrido(["angulo=0:1:0.1", "factor_x=1.0000001,1.0000002"])
+    sufijos = [sufijo_parametros(combinacion) for combinacion in combinaciones_barrido(barrido)]
+    assert len(set(sufijos)) == len(sufijos) == 20
+    assert "angulo=0.3_factor_x=1.0000001" in sufijos
+
+
+@pytest.mark.parametrize("especificacion", ["angulo=30,30", "angulo=1:1.0000000000000004:0.0000000000000001",
+                                            "eje=vertical,vertical"])
+def test_barrido_con_nombres_repetidos(especificacion):
+    with pytest.raises(ValueError):
+        interpretar_barrido([especificacion])
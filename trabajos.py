@@ -0,0 +1,378 @@
+"""
+Varios trabajos de transformación descritos en un archivo JSON y ejecutados juntos.
+
+Cada trabajo indica sus entradas, su transformación y su carpeta de salida, por ejemplo:
+
+    {
+      "concurrencia": 4,
+      "trabajos": [
+        {"nombre": "giro", "entradas": ["a/*.png"], "tipo": "rotar",
+         "parametros": {"angulo": 30}, "salida": "resultados", "prioridad": 1},
+        {"nombre": "escala", "entradas": ["a/*.png"], "tipo": "escalar",
+         "parametros": {"factor_x": 2, "factor_y": 2}, "salida": "resultados"},
+        {"nombre": "espejo", "entradas": ["a/*.png", "b/*.png"], "tipo": "reflejar",
+         "parametros": {"eje": "horizontal"}, "salida": "resultados",
+         "interpolacion": "vecino", "expandir": false, "precision": "doble"}
+      ]
+    }
+
+Los `pasos` de una transformación compuesta se escriben como en `--pasos`
+("rotar:angulo=30;trasladar:dx=5,dy=0") o como lista de pares [tipo, parámetros]. Todos los
+parámetros se comprueban al cargar el archivo, antes de procesar ninguna imagen.
+
+El planificador agrupa el trabajo por imagen de entrada: cada imagen se lee y decodifica una
+sola vez y todos los trabajos que la usan se calculan desde memoria. Las imágenes se reparten
+entre un pool con `concurrencia` trabajadores, que acota también cuántas hay en memoria a la
+vez, y se envían en orden de prioridad: primero las que usa el trabajo de mayor prioridad.
+"""
+import glob
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import cv2
+
+from manifiesto import Manifiesto, firma_transformacion
+from procesamiento import cargar_imagen, preparar_carpeta, transformar_imagen
+from transformaciones import (
+    ALIAS_TRANSFORMACIONES,
+    PARAMETROS_TRANSFORMACION,
+    TRANSFORMACIONES,
+    interpretar_pasos,
+    validar_invertible,
+)
+
+
+class Trabajo:
+    """
+    Un trabajo del archivo: una transformación aplicada a un conjunto de imágenes.
+
+    Atributos:
+        nombre (str): Nombre del trabajo, usado en los mensajes.
+        entradas (list): Rutas de las imágenes, ya expandidas y sin repetir.
+        tipo (str): Tipo de transformación.
+        parametros (dict): Parámetros de la transformación.
+        salida (str): Carpeta raíz de salida, o None para `processed/`.
+        prioridad (int): Los trabajos de mayor prioridad se atienden antes.
+        interpolacion (str): Método de interpolación.
+        expandir (bool): Si el destino se ajusta a la imagen transformada completa.
+        precision (str): Precisión de los mapas de coordenadas.
+        carpeta (str): Carpeta donde se guardan sus resultados (`<salida>/<tipo>/`).
+    """
+
+    def __init__(self, nombre, entradas, tipo, parametros, salida=None, prioridad=0, interpolacion="vecino",
+                 expandir=False, precision="doble"):
+        self.nombre = nombre
+        self.entradas = entradas
+        self.tipo = tipo
+        self.parametros = parametros
+        self.salida = salida
+        self.prioridad = prioridad
+        self.interpolacion = interpolacion
+        self.expandir = expandir
+        self.precision = precision
+        # Solo se valida y se calcula la ruta; la carpeta se crea al ejecutar (ver `ejecutar_trabajos`).
+        self.carpeta = preparar_carpeta(salida, tipo, interpolacion, precision, crear=False)
+
+    def opciones(self):
+        """
+        Todo lo que necesita un trabajador para calcular y guardar una imagen de este trabajo.
+
+        Retorna:
+            dict: Carpeta, tipo, interpolación, ajuste del lienzo, precisión y parámetros.
+        """
+        return {"carpeta": self.carpeta, "tipo": self.tipo, "interpolacion": self.interpolacion,
+                "expandir": self.expandir, "precision": self.precision, "parametros": self.parametros}
+
+    def firma(self):
+        """
+        Firma del trabajo para el manifiesto de su carpeta (ver `manifiesto.firma_transformacion`).
+        """
+        return firma_transformacion(self.tipo, self.interpolacion, self.parametros, self.expandir, self.precision)
+
+
+def expandir_entradas(patrones, base="."):
+    """
+    Expande las rutas y patrones de un trabajo, relativos a la carpeta del archivo de trabajos.
+
+    Parámetros:
+        patrones (list): Rutas o patrones tipo glob.
+        base (str): Carpeta respecto a la que se interpretan las rutas relativas.
+
+    Retorna:
+        list: Rutas sin repetir, en el orden en que aparecen.
+    """
+    rutas = []
+    for patron in patrones:
+        patron = os.path.join(base, patron)
+        coincidencias = sorted(glob.glob(patron)) if glob.has_magic(patron) else [patron]
+        rutas.extend(os.path.normpath(ruta) for ruta in coincidencias)
+    return list(dict.fromkeys(rutas))
+
+
+def _validar_parametros(tipo, parametros):
+    """
+    Comprueba los parámetros de una transformación tal como vienen del archivo JSON.
+
+    Los números deben serlo también en el JSON (30, no "30"), el eje debe ser 'horizontal' o
+    'vertical' y no puede faltar ni sobrar ningún parámetro. Los pasos de una compuesta se
+    comprueban igual (ver `_validar_pasos`).
+
+    Parámetros:
+        tipo (str): Tipo de transformación, ya sin alias.
+        parametros (dict): Parámetros leídos del archivo.
+
+    Retorna:
+        dict: Copia de los parámetros, con los pasos de una compuesta ya interpretados.
+
+    Excepciones:
+        ValueError: Si `parametros` no es un objeto, falta o sobra algún parámetro o algún
+                    valor no es válido.
+    """
+    if not isinstance(parametros, dict):
+        raise ValueError(f"'parametros' debe ser un objeto JSON, no {json.dumps(parametros)}.")
+    faltantes = [nombre for nombre in PARAMETROS_TRANSFORMACION[tipo] if nombre not in parametros]
+    if faltantes:
+        raise ValueError(f"faltan los parámetros {', '.join(faltantes)}.")
+    sobrantes = [nombre for nombre in parametros if nombre not in PARAMETROS_TRANSFORMACION[tipo]]
+    if sobrantes:
+        raise ValueError(f"'{tipo}' no admite los parámetros {', '.join(sobrantes)}.")
+
+    validados = {}
+    for nombre, valor in parametros.items():
+        if nombre == "pasos":
+            valor = _validar_pasos(valor)
+        elif nombre == "eje":
+            if valor not in ("horizontal", "vertical"):
+                raise ValueError(f"eje no válido: {json.dumps(valor)}. Usa 'horizontal' o 'vertical'.")
+        elif isinstance(valor, bool) or not isinstance(valor, (int, float)) or not math.isfinite(valor):
+            raise ValueError(f"el parámetro {nombre} debe ser un número, no {json.dumps(valor)}.")
+        validados[nombre] = valor
+    return validados
+
+
+def _validar_pasos(pasos):
+    """
+    Interpreta y comprueba los pasos de una transformación compuesta de un trabajo.
+
+    Parámetros:
+        pasos (str o list): Texto como el de `--pasos` (ver `interpretar_pasos`) o lista de
+                            pares [tipo, parámetros], p. ej. [["rotar", {"angulo": 30}]].
+
+    Retorna:
+        list: Pares (tipo, parámetros) para `componer_transformaciones`.
+
+    Excepciones:
+        ValueError: Si los pasos no tienen ninguna de las dos formas o alguno no es válido.
+    """
+    if isinstance(pasos, str):
+        return interpretar_pasos(pasos)
+    if not isinstance(pasos, list) or not pasos:
+        raise ValueError("'pasos' debe ser un texto como 'rotar:angulo=30;trasladar:dx=5,dy=0' o una "
+                         "lista de pares [tipo, parámetros].")
+    validados = []
+    for paso in pasos:
+        if not isinstance(paso, list) or len(paso) != 2 or not isinstance(paso[0], str):
+            raise ValueError(f"paso no válido: {json.dumps(paso)}. Usa [tipo, parámetros].")
+        tipo_paso = ALIAS_TRANSFORMACIONES.get(paso[0].lower(), paso[0].lower())
+        if tipo_paso not in TRANSFORMACIONES:
+            raise ValueError(f"paso no válido: {json.dumps(paso)}. Los tipos son {', '.join(TRANSFORMACIONES)}.")
+        validados.append((tipo_paso, _validar_parametros(tipo_paso, paso[1])))
+    return validados
+
+
+def cargar_trabajos(ruta):
+    """
+    Lee y valida un archivo de trabajos.
+
+    Las rutas relativas (entradas y salidas) se interpretan respecto a la carpeta del archivo.
+
+    Parámetros:
+        ruta (str): Ruta del archivo JSON.
+
+    Retorna:
+        tuple: (lista de `Trabajo`, concurrencia indicada en el archivo o None).
+
+    Excepciones:
+        ValueError: Si el archivo no es JSON válido, si falta un campo, si un tipo,
+                    interpolación o precisión no son válidos, si algún parámetro falta, sobra,
+                    no es válido o da una transformación no invertible (ver `_validar_parametros`),
+                    o si dos trabajos tienen el mismo nombre o escriben en la misma carpeta.
+    """
+    base = os.path.dirname(os.path.abspath(ruta))
+    try:
+        with open(ruta, encoding="utf-8") as archivo:
+            contenido = json.load(archivo)
+    except json.JSONDecodeError as error:
+        raise ValueError(f"{ruta} no es un JSON válido: {error}")
+    if isinstance(contenido, list):
+        contenido = {"trabajos": contenido}
+    if not isinstance(contenido, dict) or not isinstance(contenido.get("trabajos"), list):
+        raise ValueError("El archivo debe tener una lista 'trabajos'.")
+
+    trabajos = []
+    carpetas = {}
+    for posicion, datos in enumerate(contenido["trabajos"], start=1):
+        if not isinstance(datos, dict):
+            raise ValueError(f"trabajo_{posicion}: cada trabajo debe ser un objeto JSON, no {json.dumps(datos)}.")
+        nombre = str(datos.get("nombre", f"trabajo_{posicion}"))
+        if any(trabajo.nombre == nombre for trabajo in trabajos):
+            raise ValueError(f"Hay dos trabajos llamados '{nombre}'.")
+        tipo = str(datos.get("tipo", "")).lower()
+        tipo = ALIAS_TRANSFORMACIONES.get(tipo, tipo)
+        if tipo not in PARAMETROS_TRANSFORMACION:
+            raise ValueError(f"{nombre}: tipo de transformación no válido: '{datos.get('tipo')}'.")
+        try:
+            parametros = _validar_parametros(tipo, datos.get("parametros", {}))
+            validar_invertible(tipo, **parametros)
+        except ValueError as error:
+            raise ValueError(f"{nombre}: {error}")
+        entradas = datos.get("entradas")
+        if isinstance(entradas, str):
+            entradas = [entradas]
+        if not entradas:
+            raise ValueError(f"{nombre}: no tiene entradas.")
+        salida = datos.get("salida")
+        try:
+            trabajo = Trabajo(nombre, expandir_entradas(entradas, base), tipo, parametros,
+                              salida=os.path.join(base, salida) if salida else None,
+                              prioridad=int(datos.get("prioridad", 0)),
+                              interpolacion=datos.get("interpolacion", "vecino"),
+                              expandir=bool(datos.get("expandir", False)),
+                              precision=datos.get("precision", "doble"))
+        except ValueError as error:
+            raise ValueError(f"{nombre}: {error}")
+        if trabajo.carpeta in carpetas:
+            raise ValueError(f"{carpetas[trabajo.carpeta]} y {nombre} escriben en la misma carpeta "
+                             f"{trabajo.carpeta}; indica otra 'salida' en uno de ellos.")
+        carpetas[trabajo.carpeta] = nombre
+        trabajos.append(trabajo)
+    return trabajos, contenido.get("concurrencia")
+
+
+def planificar(trabajos, pendientes=None):
+    """
+    Agrupa el trabajo por imagen de entrada y lo ordena por prioridad.
+
+    Parámetros:
+        trabajos (list): Trabajos cargados con `cargar_trabajos`.
+        pendientes (list): Para cada trabajo, el conjunto de entradas que hay que procesar; por
+                           defecto, todas.
+
+    Retorna:
+        list: Pares (ruta de entrada, índices de los trabajos que la usan), primero las imágenes
+              del trabajo de mayor prioridad; cada lista de índices va también por prioridad.
+    """
+    grupos = {}
+    for indice, trabajo in enumerate(trabajos):
+        for ruta in trabajo.entradas:
+            if pendientes is None or ruta in pendientes[indice]:
+                grupos.setdefault(ruta, []).append(indice)
+
+    def prioridad(indices):
+        return max(trabajos[indice].prioridad for indice in indices)
+
+    # sorted es estable: con la misma prioridad se respeta el orden del archivo.
+    plan = [(ruta, sorted(indices, key=lambda indice: -trabajos[indice].prioridad))
+            for ruta, indices in grupos.items()]
+    return sorted(plan, key=lambda grupo: -prioridad(grupo[1]))
+
+
+def _procesar_entrada(argumentos):
+    """
+    Lee una imagen una sola vez y calcula y guarda el resultado de cada trabajo que la usa.
+
+    Parámetros:
+        argumentos (tuple): (ruta de entrada, lista de (índice del trabajo, opciones del trabajo)).
+
+    Retorna:
+        tuple: (huella de la entrada o None, lista de (índice del trabajo, ruta de salida o None,
+               mensaje de error o None)).
+    """
+    ruta_entrada, tareas = argumentos
+    imagen, huella = cargar_imagen(ruta_entrada)
+    if imagen is None:
+        return None, [(indice, None, "no se pudo cargar la imagen") for indice, _ in tareas]
+
+    resultados = []
+    nombre_archivo = os.path.basename(ruta_entrada)
+    for indice, opciones in tareas:
+        try:
+            imagen_transformada = transformar_imagen(imagen, opciones["tipo"], interpolacion=opciones["interpolacion"],
+                                                     expandir=opciones["expandir"], precision=opciones["precision"],
+                                                     **opciones["parametros"])
+            output_path = os.path.join(opciones["carpeta"], nombre_archivo)
+            if not cv2.imwrite(output_path, imagen_transformada):
+                raise OSError("cv2.imwrite no pudo escribir el archivo")
+            resultados.append((indice, output_path, None))
+        except Exception as error:
+            resultados.append((indice, None, f"{type(error).__name__}: {error}"))
+    return huella, resultados
+
+
+def ejecutar_trabajos(trabajos, concurrencia=None, ejecutor="procesos", reanudar=False):
+    """
+    Ejecuta varios trabajos decodificando cada imagen de entrada una sola vez.
+
+    Parámetros:
+        trabajos (list): Trabajos cargados con `cargar_trabajos`.
+        concurrencia (int): Imágenes que se procesan a la vez, en total para todos los trabajos.
+                            None o 1 procesa en secuencia.
+        ejecutor (str): 'procesos' (por defecto) o 'hilos'.
+        reanudar (bool): Si es True, en cada trabajo se saltan las imágenes cuya salida ya está
+                         al día según el manifiesto de su carpeta (ver `manifiesto`).
+
+    Excepciones:
+        ValueError: Si el ejecutor no es válido.
+
+    Retorna:
+        dict: Para cada nombre de trabajo, las rutas guardadas (o ya al día) en el orden de sus
+              entradas.
+    """
+    for trabajo in trabajos:
+        os.makedirs(trabajo.carpeta, exist_ok=True)
+    manifiestos = [Manifiesto(trabajo.carpeta) for trabajo in trabajos]
+    firmas = [trabajo.firma() for trabajo in trabajos]
+    guardadas = [{} for _ in trabajos]
+    pendientes = []
+    for indice, trabajo in enumerate(trabajos):
+        if reanudar:
+            por_hacer, al_dia = manifiestos[indice].separar(trabajo.entradas, firmas[indice])
+            guardadas[indice].update((trabajo.entradas[posicion], salida) for posicion, salida in al_dia.items())
+            pendientes.append({trabajo.entradas[posicion] for posicion in por_hacer})
+        else:
+            pendientes.append(set(trabajo.entradas))
+
+    plan = planificar(trabajos, pendientes)
+    opciones = [trabajo.opciones() for trabajo in trabajos]
+    tareas = [(ruta, [(indice, opciones[indice]) for indice in indices]) for ruta, indices in plan]
+    salidas = sum(len(indices) for _, indices in plan)
+    print(f"{len(trabajos)} trabajos: {len(plan)} imágenes que decodificar para {salidas} resultados.")
+
+    if not concurrencia or concurrencia <= 1:
+        pool = None
+    elif ejecutor == "procesos":
+        pool = ProcessPoolExecutor(max_workers=concurrencia)
+    elif ejecutor == "hilos":
+        pool = ThreadPoolExecutor(max_workers=concurrencia)
+    else:
+        raise ValueError("Ejecutor no válido. Usa 'procesos' o 'hilos'.")
+
+    try:
+        # pool.map envía las tareas en orden, así que las de mayor prioridad empiezan antes.
+        resultados = pool.map(_procesar_entrada, tareas) if pool is not None else map(_procesar_entrada, tareas)
+        for (ruta_entrada, _), (huella, resultados_entrada) in zip(plan, resultados):
+            for indice, output_path, error in resultados_entrada:
+                if error is not None:
+                    print(f"{trabajos[indice].nombre}: error al procesar {ruta_entrada}: {error}")
+                    continue
+                print(f"{trabajos[indice].nombre}: guardada en {output_path}")
+                guardadas[indice][ruta_entrada] = output_path
+                manifiestos[indice].anotar(ruta_entrada, firmas[indice], huella)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return {trabajo.nombre: [guardadas[indice][ruta] for ruta in trabajo.entradas if ruta in guardadas[indice]]
+            for indice, trabajo in enumerate(trabajos)}
@@ -0,0 +1,676 @@
+"""
+Núcleo de transformaciones lineales sobre imágenes.
+
+Contiene las matrices afines (rotar, escalar, reflejar, trasladar) y el motor que las aplica.
+No importa nada relacionado con la interfaz gráfica, por lo que puede usarse desde procesos
+de trabajo, servidores o la línea de comandos.
+"""
+import itertools
+import os
+
+import numpy as np
+
+from mapas import (
+    INTERPOLACIONES,
+    PRECISIONES,
+    calcular_mapa,
+    permutacion_entera,
+    remapear,
+    remapear_permutacion,
+    remapear_pila,
+    remapear_pila_por_imagen,
+    remapear_por_bloques,
+)
+
+TRANSFORMACIONES = ("rotar", "escalar", "reflejar", "trasladar")
+"""
+Transformaciones elementales que saben construir su matriz.
+"""
+
+TIPOS_TRANSFORMACION = TRANSFORMACIONES + ("compuesta",)
+"""
+Tipos aceptados por `construir_matriz` y `procesar_imagenes`; 'compuesta' encadena varios pasos.
+"""
+
+PARAMETROS_TRANSFORMACION = {
+    "rotar": ("angulo",),
+    "escalar": ("factor_x", "factor_y"),
+    "reflejar": ("eje",),
+    "trasladar": ("dx", "dy"),
+    "compuesta": ("pasos",),
+}
+"""
+Parámetros que necesita cada tipo de transformación, con los nombres de `construir_matriz`.
+"""
+
+VERSION_MOTOR = "1"
+"""
+Versión del resultado del motor. Se anota en el manifiesto de cada lote (ver `manifiesto`);
+si un cambio altera los píxeles que produce alguna transformación, hay que subirla para que
+los lotes reanudados vuelvan a procesar sus imágenes.
+"""
+
+ALIAS_TRANSFORMACIONES = {
+    "rotate": "rotar",
+    "scale": "escalar",
+    "reflect": "reflejar",
+    "translate": "trasladar",
+    "pipeline": "compuesta",
+}
+"""
+Nombres en inglés aceptados y su transformación equivalente.
+"""
+
+
+def aplicar_transformacion(imagen, matriz_transformacion, modo="vectorizado", cache=None,
+                           interpolacion="vecino", matriz_inversa=None, forma_salida=None, expandir=False,
+                           precision="doble"):
+    """
+    Aplica una transformación afín a la imagen utilizando una matriz de transformación.
+
+    Por defecto calcula todas las coordenadas de destino a la vez con NumPy y toma los píxeles
+    de origen en una sola operación indexada. Las reflexiones, traslaciones enteras y giros de
+    90 grados se resuelven sin mapa, con vistas recortadas, invertidas o traspuestas del
+    origen (ver `mapas.permutacion_entera`), con el mismo resultado. El modo 'referencia' conserva el recorrido
+    píxel por píxel original para poder comparar ambos resultados.
+
+    Solo se calculan los píxeles de destino del rectángulo al que llega el origen (ver
+    `mapas.region_destino`); el resto queda en cero sin recorrerlo.
+
+    Parámetros:
+        imagen (numpy.ndarray): Imagen de entrada a transformar.
+        matriz_transformacion (numpy.ndarray): Matriz de transformación afín (3x3).
+        modo (str): 'vectorizado' (por defecto) o 'referencia'.
+        cache (mapas.CacheMapas): Caché de mapas de coordenadas. Si se indica, las imágenes del
+                                  mismo tamaño con la misma matriz reutilizan el mapa ya calculado.
+        interpolacion (str): 'vecino' (por defecto, trunca la coordenada como el motor original),
+                             'bilineal' o 'bicubica'.
+        matriz_inversa (numpy.ndarray): Inversa ya calculada de la matriz. Si no se indica, se
+                                        calcula una sola vez aquí.
+        forma_salida (tuple): (filas, columnas) del destino. Por defecto, las de la imagen.
+        expandir (bool): Si es True, el destino se ajusta para que quepa la imagen transformada
+                         completa, sin recortes ni márgenes de más (ver `ajustar_lienzo`); se
+                         ignoran `forma_salida` y `matriz_inversa`.
+        precision (str): 'doble' (por defecto, exacta) o 'compacta', que calcula en float32 y
+                         guarda el mapa en punto fijo con menos memoria (ver `mapas.calcular_mapa`
+                         para la cota de error). Las transformaciones que solo reordenan píxeles
+                         son exactas en ambas.
+
+    Retorna:
+        numpy.ndarray: Imagen transformada.
+
+    Excepciones:
+        ValueError: Si el modo, la interpolación o la precisión no son válidos.
+    """
+    if expandir:
+        filas, columnas = imagen.shape[:2]
+        matriz_transformacion, forma_salida = ajustar_lienzo(matriz_transformacion, columnas, filas)
+        matriz_inversa = None
+    if modo == "referencia":
+        if interpolacion != "vecino" or forma_salida is not None:
+            raise ValueError("El modo 'referencia' solo admite interpolación 'vecino' y el tamaño original.")
+        return aplicar_transformacion_referencia(imagen, matriz_transformacion)
+    if modo != "vectorizado":
+        raise ValueError("Modo no válido. Usa 'vectorizado' o 'referencia'.")
+    if interpolacion not in INTERPOLACIONES:
+        raise ValueError(f"Interpolación no válida. Usa una de: {', '.join(INTERPOLACIONES)}.")
+    if precision not in PRECISIONES:
+        raise ValueError(f"Precisión no válida. Usa una de: {', '.join(PRECISIONES)}.")
+
+    if matriz_inversa is None:
+        matriz_inversa = np.linalg.inv(matriz_transformacion)
+
+    permutacion = permutacion_entera(matriz_transformacion, matriz_inversa)
+    if permutacion is not None:
+        return remapear_permutacion(imagen, permutacion, forma_salida)
+
+    mapa = _mapa_para(matriz_transformacion, imagen.shape[:2], cache, interpolacion, matriz_inversa, forma_salida,
+                      precision)
+    return remapear(imagen, mapa)
+
+
+def aplicar_transformacion_lote(pila, matrices, cache=None, interpolacion="vecino", precision="doble",
+                                forma_salida=None):
+    """
+    Aplica una o varias transformaciones afines a una pila de imágenes del mismo tamaño.
+
+    Con una sola matriz el mapa se calcula una vez y se aplica a toda la pila en un único
+    indexado. Con una matriz por imagen, cada matriz distinta calcula su mapa una sola vez y,
+    con 'vecino', todas las imágenes se toman en un único indexado sobre la pila. El resultado
+    de cada imagen es idéntico al de `aplicar_transformacion`.
+
+    Parámetros:
+        pila (numpy.ndarray): Imágenes con forma (N, filas, columnas) o (N, filas, columnas, canales).
+        matrices (numpy.ndarray): Matriz afín (3x3) común, o una por imagen con forma (N, 3, 3).
+        cache (mapas.CacheMapas): Caché de mapas de coordenadas, opcional.
+        interpolacion (str): 'vecino' (por defecto), 'bilineal' o 'bicubica'.
+        precision (str): 'doble' (por defecto) o 'compacta' (ver `aplicar_transformacion`).
+        forma_salida (tuple): (filas, columnas) del destino, común a toda la pila. Por defecto,
+                              las de las imágenes (ver `ajustar_lienzo` para expandir el lienzo).
+
+    Retorna:
+        numpy.ndarray: Pila transformada, del mismo tipo que `pila` y con `forma_salida` como
+                       filas y columnas.
+
+    Excepciones:
+        ValueError: Si la pila no tiene al menos tres dimensiones, si las matrices no son 3x3 o
+                    no hay una por imagen, o si la interpolación o la precisión no son válidas.
+    """
+    pila = np.asarray(pila)
+    matrices = np.asarray(matrices, dtype=float)
+    if pila.ndim < 3:
+        raise ValueError("La pila debe tener forma (N, filas, columnas) o (N, filas, columnas, canales).")
+    if interpolacion not in INTERPOLACIONES:
+        raise ValueError(f"Interpolación no válida. Usa una de: {', '.join(INTERPOLACIONES)}.")
+    if precision not in PRECISIONES:
+        raise ValueError(f"Precisión no válida. Usa una de: {', '.join(PRECISIONES)}.")
+    if matrices.shape == (3, 3):
+        matrices = matrices[np.newaxis]
+    if matrices.ndim != 3 or matrices.shape[1:] != (3, 3) or len(matrices) not in (1, len(pila)):
+        raise ValueError("Indica una matriz 3x3 o una por imagen de la pila, con forma (N, 3, 3).")
+
+    forma_entrada = pila.shape[1:3]
+    distintas = {}
+    for matriz in matrices:
+        distintas.setdefault(matriz.tobytes(), matriz)
+
+    if len(distintas) == 1:
+        matriz = matrices[0]
+        matriz_inversa = np.linalg.inv(matriz)
+        permutacion = permutacion_entera(matriz, matriz_inversa)
+        if permutacion is not None:
+            # La pila pasa como eje de canales para recortarla e invertirla toda a la vez.
+            pila_transformada = remapear_permutacion(np.moveaxis(pila, 0, 2), permutacion, forma_salida)
+            return np.ascontiguousarray(np.moveaxis(pila_transformada, 2, 0))
+        mapa = _mapa_para(matriz, forma_entrada, cache, interpolacion, matriz_inversa, forma_salida, precision)
+        return remapear_pila(pila, mapa)
+
+    mapas = {clave: _mapa_para(matriz, forma_entrada, cache, interpolacion, forma_salida=forma_salida,
+                               precision=precision)
+             for clave, matriz in distintas.items()}
+    return remapear_pila_por_imagen(pila, [mapas[matriz.tobytes()] for matriz in matrices])
+
+
+def _mapa_para(matriz_transformacion, forma_entrada, cache, interpolacion, matriz_inversa=None, forma_salida=None,
+               precision="doble"):
+    """
+    Obtiene el mapa de una matriz desde la caché, si se indica, o lo calcula.
+    """
+    if cache is not None:
+        return cache.obtener(matriz_transformacion, forma_entrada, forma_salida, interpolacion=interpolacion,
+                             matriz_inversa=matriz_inversa, precision=precision)
+    return calcular_mapa(matriz_transformacion, forma_entrada, forma_salida, interpolacion=interpolacion,
+                         matriz_inversa=matriz_inversa, precision=precision)
+
+
+def aplicar_transformacion_por_bloques(imagen, matriz_transformacion, salida=None, tam_bloque=1024,
+                                       interpolacion="vecino", expandir=False):
+    """
+    Aplica una transformación afín por bloques, para imágenes demasiado grandes para la memoria.
+
+    Cada bloque de destino calcula sus propias coordenadas y lee solo la parte del origen que
+    necesita, de modo que la memoria de trabajo depende de `tam_bloque` y no del tamaño de la
+    imagen. El resultado es idéntico al de `aplicar_transformacion`.
+
+    Parámetros:
+        imagen (numpy.ndarray): Imagen de entrada; puede abrirse sin cargarla con
+                                `np.load(ruta, mmap_mode='r')`.
+        matriz_transformacion (numpy.ndarray): Matriz de transformación afín (3x3).
+        salida (str o numpy.ndarray): Ruta de un archivo `.npy` que se crea mapeado a disco, o un
+                                      arreglo ya creado con la forma del destino y el tipo de la
+                                      imagen. Si es None, el resultado se crea en memoria.
+        tam_bloque (int): Lado en píxeles de cada bloque de destino.
+        interpolacion (str): 'vecino' (por defecto), 'bilineal' o 'bicubica'.
+        expandir (bool): Si es True, el destino se ajusta para que quepa la imagen transformada
+                         completa (ver `ajustar_lienzo`).
+
+    Retorna:
+        numpy.ndarray: Imagen transformada (un `numpy.memmap` si `salida` es una ruta).
+    """
+    forma = imagen.shape
+    if expandir:
+        matriz_transformacion, forma_salida = ajustar_lienzo(matriz_transformacion, imagen.shape[1], imagen.shape[0])
+        forma = tuple(forma_salida) + imagen.shape[2:]
+
+    salida_en_ceros = True
+    if salida is None:
+        salida = np.zeros(forma, dtype=imagen.dtype)
+    elif isinstance(salida, (str, os.PathLike)):
+        # Un .npy recién creado está en ceros sin escribirlo, así que los bloques vacíos no
+        # llegan a tocar el disco.
+        salida = np.lib.format.open_memmap(salida, mode="w+", dtype=imagen.dtype, shape=forma)
+    else:
+        salida_en_ceros = False
+
+    remapear_por_bloques(imagen, matriz_transformacion, salida, tam_bloque, salida_en_ceros, interpolacion)
+    if isinstance(salida, np.memmap):
+        salida.flush()
+    return salida
+
+
+def aplicar_transformacion_referencia(imagen, matriz_transformacion):
+    """
+    Aplica una transformación afín recorriendo la imagen píxel por píxel.
+
+    Es la implementación original, mucho más lenta; se conserva como referencia para verificar
+    que el motor vectorizado produce exactamente el mismo resultado.
+
+    Parámetros:
+        imagen (numpy.ndarray): Imagen de entrada a transformar.
+        matriz_transformacion (numpy.ndarray): Matriz de transformación afín (3x3).
+
+    Retorna:
+        numpy.ndarray: Imagen transformada.
+    """
+    filas, columnas = imagen.shape[:2]
+    imagen_transformada = np.zeros_like(imagen)
+    matriz_inversa = np.linalg.inv(matriz_transformacion)
+
+    for i in range(filas):
+        for j in range(columnas):
+            transformado = np.dot(matriz_inversa, [j, i, 1])
+            x_original, y_original = int(transformado[0]), int(transformado[1])
+            if 0 <= x_original < columnas and 0 <= y_original < filas:
+                imagen_transformada[i, j] = imagen[y_original, x_original]
+
+    return imagen_transformada
+
+def rotar(angulo, ancho, alto):
+    """
+    Crea una matriz de rotación respecto al centro de la imagen.
+
+    Parámetros:
+        angulo (float): Ángulo de rotación en grados.
+        ancho (int): Ancho de la imagen.
+        alto (int): Alto de la imagen.
+
+    Retorna:
+        numpy.ndarray: Matriz de rotación afín (3x3).
+    """
+    if angulo % 90 == 0:
+        # En múltiplos de 90 grados se usan los valores exactos: np.cos(np.radians(90)) no da
+        # cero sino 6e-17, y ese residuo desplaza un píxel filas o columnas enteras al truncar.
+        cos_theta, sin_theta = ((1.0, 0.0), (0.0, 1.0), (-1.0, 0.0), (0.0, -1.0))[int(angulo // 90) % 4]
+    else:
+        radianes = np.radians(angulo)
+        cos_theta, sin_theta = np.cos(radianes), np.sin(radianes)
+    matriz_rotacion = np.array([
+        [cos_theta, sin_theta, 0],
+        [-sin_theta, cos_theta, 0],
+        [0, 0, 1]
+    ])
+    centro_x, centro_y = ancho // 2, alto // 2
+    matriz_traslado_centro = np.array([
+        [1, 0, -centro_x],
+        [0, 1, -centro_y],
+        [0, 0, 1]
+    ])
+    matriz_traslado_origen = np.array([
+        [1, 0, centro_x],
+        [0, 1, centro_y],
+        [0, 0, 1]
+    ])
+    return np.dot(np.dot(matriz_traslado_origen, matriz_rotacion), matriz_traslado_centro)
+
+def escalar(factor_x, factor_y, ancho, alto):
+    """
+    Crea una matriz de escalado respecto al centro de la imagen.
+
+    Parámetros:
+        factor_x (float): Factor de escalado en el eje X.
+        factor_y (float): Factor de escalado en el eje Y.
+        ancho (int): Ancho de la imagen.
+        alto (int): Alto de la imagen.
+
+    Retorna:
+        numpy.ndarray: Matriz de escalado afín (3x3).
+    """
+    matriz_escalado = np.array([
+        [factor_x, 0, 0],
+        [0, factor_y, 0],
+        [0, 0, 1]
+    ])
+
+    centro_x, centro_y = ancho // 2, alto // 2
+    matriz_traslado_centro = np.array([
+        [1, 0, -centro_x],
+        [0, 1, -centro_y],
+        [0, 0, 1]
+    ])
+    matriz_traslado_origen = np.array([
+        [1, 0, centro_x],
+        [0, 1, centro_y],
+        [0, 0, 1]
+    ])
+
+    return np.dot(np.dot(matriz_traslado_origen, matriz_escalado), matriz_traslado_centro)
+
+def reflejar(eje, ancho, alto):
+    """
+    Crea una matriz de reflexión respecto al centro de la imagen.
+
+    Parámetros:
+        eje (str): Eje de reflexión ('horizontal' o 'vertical').
+        ancho (int): Ancho de la imagen.
+        alto (int): Alto de la imagen.
+
+    Retorna:
+        numpy.ndarray: Matriz de reflexión afín (3x3).
+
+    Excepciones:
+        ValueError: Si el eje proporcionado no es 'horizontal' o 'vertical'.
+    """
+    if eje == 'horizontal':
+        matriz_reflexion = np.array([
+            [1, 0, 0],
+            [0, -1, 0],
+            [0, 0, 1]
+        ])
+    elif eje == 'vertical':
+        matriz_reflexion = np.array([
+            [-1, 0, 0],
+            [0, 1, 0],
+            [0, 0, 1]
+        ])
+    else:
+        raise ValueError("Eje no válido. Usa 'horizontal' o 'vertical'.")
+
+    centro_x, centro_y = ancho // 2, alto // 2
+    matriz_traslado_centro = np.array([
+        [1, 0, -centro_x],
+        [0, 1, -centro_y],
+        [0, 0, 1]
+    ])
+    matriz_traslado_origen = np.array([
+        [1, 0, centro_x],
+        [0, 1, centro_y],
+        [0, 0, 1]
+    ])
+
+    return np.dot(np.dot(matriz_traslado_origen, matriz_reflexion), matriz_traslado_centro)
+
+
+def trasladar(dx, dy):
+    """
+    Crea una matriz de traslación.
+
+    Parámetros:
+        dx (float): Desplazamiento en el eje X.
+        dy (float): Desplazamiento en el eje Y.
+
+    Retorna:
+        numpy.ndarray: Matriz de traslación afín (3x3).
+    """
+    return np.array([
+        [1, 0, dx],
+        [0, 1, dy],
+        [0, 0, 1]
+    ])
+
+
+def construir_matriz(tipo_transformacion, ancho, alto, **parametros):
+    """
+    Construye la matriz afín correspondiente a un tipo de transformación y sus parámetros.
+
+    Parámetros:
+        tipo_transformacion (str): 'rotar', 'escalar', 'reflejar' o 'trasladar'.
+        ancho (int): Ancho de la imagen.
+        alto (int): Alto de la imagen.
+        **parametros: Parámetros de la transformación, con los mismos nombres que en
+                      `procesar_imagenes` (angulo, factor_x, factor_y, eje, dx, dy, o
+                      pasos para 'compuesta').
+
+    Retorna:
+        numpy.ndarray: Matriz de transformación afín (3x3).
+
+    Excepciones:
+        ValueError: Si el tipo de transformación no es válido.
+    """
+    if tipo_transformacion == "rotar":
+        return rotar(parametros['angulo'], ancho, alto)
+    elif tipo_transformacion == "escalar":
+        return escalar(parametros['factor_x'], parametros['factor_y'], ancho, alto)
+    elif tipo_transformacion == "reflejar":
+        return reflejar(parametros['eje'], ancho, alto)
+    elif tipo_transformacion == "trasladar":
+        return trasladar(parametros['dx'], parametros['dy'])
+    elif tipo_transformacion == "compuesta":
+        return componer_transformaciones(parametros['pasos'], ancho, alto)
+    else:
+        raise ValueError("Transformación no válida")
+
+
+def componer_transformaciones(pasos, ancho, alto):
+    """
+    Multiplica las matrices de una cadena de transformaciones en una sola matriz afín.
+
+    Los pasos se aplican en el orden dado: el primero actúa sobre la imagen original y cada
+    paso siguiente sobre el resultado del anterior. Como el resultado es una sola matriz, la
+    imagen se remuestrea una única vez sin importar cuántos pasos tenga la cadena.
+
+    Parámetros:
+        pasos (list): Lista de pares (tipo_transformacion, parametros), donde parametros es un
+                      diccionario con los mismos nombres que en `construir_matriz`.
+        ancho (int): Ancho de la imagen.
+        alto (int): Alto de la imagen.
+
+    Retorna:
+        numpy.ndarray: Matriz de transformación afín (3x3).
+
+    Excepciones:
+        ValueError: Si algún paso no es una transformación elemental válida.
+    """
+    matriz = np.eye(3)
+    for tipo_paso, parametros_paso in pasos:
+        if tipo_paso not in TRANSFORMACIONES:
+            raise ValueError(f"Paso no válido: {tipo_paso}")
+        matriz = np.dot(construir_matriz(tipo_paso, ancho, alto, **parametros_paso), matriz)
+    return matriz
+
+
+def validar_invertible(tipo_transformacion, **parametros):
+    """
+    Comprueba que la transformación se pueda invertir, como necesita el motor para saber de
+    qué píxel de origen viene cada píxel de destino.
+
+    El determinante no depende del tamaño de la imagen, así que basta con construir la matriz
+    para un tamaño cualquiera. Una transformación singular es, en la práctica, un escalado con
+    factor 0 (directo o dentro de una compuesta).
+
+    Parámetros:
+        tipo_transformacion (str): 'rotar', 'escalar', 'reflejar', 'trasladar' o 'compuesta'.
+        **parametros: Parámetros de la transformación (ver `construir_matriz`).
+
+    No retorna ningún valor.
+
+    Excepciones:
+        ValueError: Si la transformación no es válida o su matriz no es invertible.
+    """
+    matriz = construir_matriz(tipo_transformacion, 1, 1, **parametros)
+    if abs(np.linalg.det(matriz)) < 1e-12:
+        raise ValueError("La transformación no es invertible; revisa que ningún factor de escala sea 0.")
+
+
+def ajustar_lienzo(matriz_transformacion, ancho, alto):
+    """
+    Ajusta una transformación para que el destino contenga la imagen transformada completa.
+
+    Proyecta con la matriz las esquinas de la zona del origen que se toma al truncar
+    (-1 < x < ancho, -1 < y < alto), añade la traslación que lleva los píxeles enteros de su
+    rectángulo envolvente al origen y usa el tamaño de ese rectángulo como destino. Un giro de
+    45 grados no pierde las esquinas y una reducción no deja márgenes vacíos.
+
+    Parámetros:
+        matriz_transformacion (numpy.ndarray): Matriz de transformación afín (3x3).
+        ancho (int): Ancho de la imagen de origen.
+        alto (int): Alto de la imagen de origen.
+
+    Retorna:
+        tuple: (matriz ajustada, (filas, columnas) del destino).
+    """
+    esquinas = np.array([
+        [-1, -1, 1],
+        [ancho, -1, 1],
+        [-1, alto, 1],
+        [ancho, alto, 1],
+    ], dtype=float).T
+    proyectadas = np.dot(matriz_transformacion, esquinas)[:2]
+    # Píxeles enteros estrictamente dentro del rectángulo proyectado; la tolerancia evita que
+    # un residuo de coma flotante añada una fila o columna vacía.
+    minimos = np.floor(proyectadas.min(axis=1) + 1e-9) + 1
+    maximos = np.ceil(proyectadas.max(axis=1) - 1e-9) - 1
+    matriz_ajustada = np.dot(trasladar(-minimos[0], -minimos[1]), matriz_transformacion)
+    columnas, filas = (max(1, int(valor) + 1) for valor in maximos - minimos)
+    return matriz_ajustada, (filas, columnas)
+
+
+def interpretar_pasos(especificacion):
+    """
+    Convierte una especificación de texto en la lista de pasos de una transformación compuesta.
+
+    Los pasos se separan con ';' y cada uno tiene la forma 'tipo:parametro=valor,...', por ejemplo
+    'rotar:angulo=30;escalar:factor_x=2,factor_y=2;trasladar:dx=10,dy=0'. El eje de 'reflejar'
+    se toma como texto y el resto de valores como números.
+
+    Parámetros:
+        especificacion (str): Texto con la cadena de pasos.
+
+    Retorna:
+        list: Lista de pares (tipo_transformacion, parametros).
+
+    Excepciones:
+        ValueError: Si algún paso o parámetro está mal escrito, si un paso no tiene todos sus
+                    parámetros (ver `PARAMETROS_TRANSFORMACION`) o tiene alguno de más, o si un
+                    eje no es 'horizontal' ni 'vertical'.
+    """
+    pasos = []
+    for texto_paso in especificacion.split(";"):
+        texto_paso = texto_paso.strip()
+        if not texto_paso:
+            continue
+        tipo_paso, _, texto_parametros = texto_paso.partition(":")
+        tipo_paso = tipo_paso.strip().lower()
+        tipo_paso = ALIAS_TRANSFORMACIONES.get(tipo_paso, tipo_paso)
+        if tipo_paso not in TRANSFORMACIONES:
+            raise ValueError(f"Paso no válido: {texto_paso}")
+
+        parametros_paso = {}
+        for asignacion in texto_parametros.split(","):
+            if not asignacion.strip():
+                continue
+            nombre, signo, valor = asignacion.partition("=")
+            if not signo:
+                raise ValueError(f"Parámetro no válido en '{texto_paso}': {asignacion}")
+            nombre, valor = nombre.strip(), valor.strip()
+            if nombre not in PARAMETROS_TRANSFORMACION[tipo_paso]:
+                raise ValueError(f"'{tipo_paso}' no admite el parámetro '{nombre}'; usa "
+                                 f"{', '.join(PARAMETROS_TRANSFORMACION[tipo_paso])}.")
+            if nombre == "eje":
+                if valor not in ("horizontal", "vertical"):
+                    raise ValueError(f"Eje no válido en '{texto_paso}'. Usa 'horizontal' o 'vertical'.")
+                parametros_paso[nombre] = valor
+            else:
+                try:
+                    parametros_paso[nombre] = float(valor)
+                except ValueError:
+                    raise ValueError(f"El parámetro {nombre} de '{texto_paso}' debe ser un número.")
+        faltantes = [nombre for nombre in PARAMETROS_TRANSFORMACION[tipo_paso] if nombre not in parametros_paso]
+        if faltantes:
+            raise ValueError(f"Faltan los parámetros {', '.join(faltantes)} en '{texto_paso}'.")
+        pasos.append((tipo_paso, parametros_paso))
+
+    if not pasos:
+        raise ValueError("La transformación compuesta no tiene pasos.")
+    return pasos
+
+
+def interpretar_barrido(especificaciones):
+    """
+    Convierte las especificaciones de texto de un barrido de parámetros en listas de valores.
+
+    Cada especificación tiene la forma 'parametro=valores', donde los valores son un rango
+    'inicio:fin:paso' (sin incluir el fin, como `range`) o una lista separada por comas, por
+    ejemplo 'angulo=0:360:5' o 'factor_x=0.5,1,1.5'. El eje de 'reflejar' se toma como texto
+    y el resto de valores como números.
+
+    Parámetros:
+        especificaciones (list): Textos con la forma 'parametro=valores'.
+
+    Retorna:
+        dict: Nombre de cada parámetro y la lista de valores que toma.
+
+    Excepciones:
+        ValueError: Si alguna especificación está mal escrita, un rango está vacío o dos valores
+                    darían el mismo nombre de archivo (ver `sufijo_parametros`).
+    """
+    barrido = {}
+    for especificacion in especificaciones:
+        nombre, signo, texto_valores = especificacion.partition("=")
+        nombre, texto_valores = nombre.strip(), texto_valores.strip()
+        if not signo or not nombre or not texto_valores:
+            raise ValueError(f"Barrido no válido: {especificacion}")
+
+        if nombre == "eje":
+            valores = [valor.strip() for valor in texto_valores.split(",") if valor.strip()]
+        elif ":" in texto_valores:
+            partes = texto_valores.split(":")
+            if len(partes) != 3:
+                raise ValueError(f"El rango debe tener la forma inicio:fin:paso: {especificacion}")
+            inicio, fin, paso = (float(parte) for parte in partes)
+            if paso == 0:
+                raise ValueError(f"El paso del rango no puede ser cero: {especificacion}")
+            # Los valores se calculan desde el inicio y no sumando el paso, para no acumular error.
+            cantidad = max(0, int(np.ceil((fin - inicio) / paso - 1e-9)))
+            valores = [inicio + paso * indice for indice in range(cantidad)]
+        else:
+            valores = [float(valor) for valor in texto_valores.split(",") if valor.strip()]
+
+        if not valores:
+            raise ValueError(f"El barrido de '{nombre}' no tiene valores.")
+        textos = [_texto_valor(valor) for valor in valores]
+        if len(set(textos)) != len(textos):
+            raise ValueError(f"El barrido de '{nombre}' repite valores (o valores iguales en sus primeras 15 "
+                             f"cifras), y sus variantes se guardarían con el mismo nombre: {especificacion}")
+        barrido[nombre] = valores
+    return barrido
+
+
+def combinaciones_barrido(barrido, **parametros_fijos):
+    """
+    Genera todas las combinaciones de valores de un barrido.
+
+    Parámetros:
+        barrido (dict): Nombre de cada parámetro y la lista de valores que toma.
+        **parametros_fijos: Parámetros comunes a todas las combinaciones.
+
+    Retorna:
+        list: Un diccionario de parámetros por combinación; el último parámetro del barrido
+              es el que cambia más rápido.
+    """
+    nombres = list(barrido)
+    return [dict(parametros_fijos, **dict(zip(nombres, valores)))
+            for valores in itertools.product(*(barrido[nombre] for nombre in nombres))]
+
+
+def sufijo_parametros(parametros):
+    """
+    Crea el sufijo de nombre de archivo que identifica una combinación de parámetros,
+    por ejemplo 'angulo=30' o 'factor_x=1.5_factor_y=2'.
+
+    Parámetros:
+        parametros (dict): Parámetros de la combinación, en el orden en que se nombran.
+
+    Retorna:
+        str: Sufijo sin separador inicial.
+    """
+    return "_".join(f"{nombre}={_texto_valor(valor)}" for nombre, valor in parametros.items())
+
+
+def _texto_valor(valor):
+    """
+    Escribe un valor de parámetro para un nombre de archivo.
+
+    Los números llevan hasta 15 cifras significativas: bastan para distinguir valores cercanos
+    de un barrido fino y dejan '0.3' para `0.1 * 3`, sin el error de redondeo de la suma.
+    """
+    return format(valor, ".15g") if isinstance(valor, (int, float)) else str(valor)
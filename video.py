@@ -0,0 +1,271 @@
+"""
+Procesamiento de vídeos y secuencias de fotogramas numeradas.
+
+Los fotogramas se leen con `cv2.VideoCapture` y se escriben con `cv2.VideoWriter` a medida que
+se transforman, sin extraer el vídeo a disco. Todos los fotogramas de un clip tienen el mismo
+tamaño, así que la matriz, su inversa y el mapa de coordenadas se calculan una sola vez por clip
+y cada fotograma solo paga el indexado.
+
+Una secuencia numerada se indica con un patrón al estilo de printf, por ejemplo
+`fotogramas/f_%04d.png`; OpenCV la lee como si fuera un vídeo y el resultado se guarda con el
+mismo patrón.
+"""
+import os
+import queue
+import re
+import threading
+
+import cv2
+import numpy as np
+
+from mapas import calcular_mapa, permutacion_entera, remapear, remapear_permutacion
+from procesamiento import preparar_carpeta
+from transformaciones import ajustar_lienzo, construir_matriz
+
+EXTENSIONES_VIDEO = (".mp4", ".m4v", ".mov", ".avi", ".mkv", ".webm")
+"""
+Extensiones que se tratan como vídeo al buscar entradas.
+"""
+
+CODECS_VIDEO = {".avi": "MJPG", ".webm": "VP80"}
+"""
+Códec (FOURCC) con el que se escribe cada contenedor; el resto usa `CODEC_POR_DEFECTO`.
+"""
+
+CODEC_POR_DEFECTO = "mp4v"
+"""
+Códec (FOURCC) para los contenedores sin uno propio en `CODECS_VIDEO`.
+"""
+
+_FIN = object()
+"""
+Marca que indica a los hilos del clip que no quedan más fotogramas.
+"""
+
+
+def es_secuencia(ruta):
+    """
+    Indica si una ruta es el patrón de una secuencia numerada (por ejemplo `f_%04d.png`).
+
+    Parámetros:
+        ruta (str): Ruta a revisar.
+
+    Retorna:
+        bool: True si el nombre del archivo contiene un campo numérico de printf.
+    """
+    return re.search(r"%0?\d*d", os.path.basename(ruta)) is not None
+
+
+def es_video(ruta):
+    """
+    Indica si una ruta es un vídeo o una secuencia numerada.
+
+    Parámetros:
+        ruta (str): Ruta a revisar.
+
+    Retorna:
+        bool: True si la extensión es de vídeo o la ruta es el patrón de una secuencia.
+    """
+    return es_secuencia(ruta) or os.path.splitext(ruta)[1].lower() in EXTENSIONES_VIDEO
+
+
+def preparar_transformacion(tipo_transformacion, forma_entrada, interpolacion="vecino", expandir=False,
+                            precision="doble", **parametros):
+    """
+    Calcula una sola vez todo lo que comparten los fotogramas de un clip.
+
+    Si la transformación solo reordena píxeles (reflexiones, giros de 90 grados, traslaciones
+    enteras) no hace falta mapa; en otro caso se calcula el mapa de coordenadas completo.
+
+    Parámetros:
+        tipo_transformacion (str): 'rotar', 'escalar', 'reflejar', 'trasladar' o 'compuesta'.
+        forma_entrada (tuple): (filas, columnas) de los fotogramas.
+        interpolacion (str): 'vecino' (por defecto), 'bilineal' o 'bicubica'.
+        expandir (bool): Si es True, el destino se ajusta a la imagen transformada completa.
+        precision (str): 'doble' (por defecto) o 'compacta' (ver `mapas.calcular_mapa`).
+        **parametros: Parámetros de la transformación (ver `procesamiento.procesar_imagenes`).
+
+    Retorna:
+        tuple: (función que transforma un fotograma, (filas, columnas) de salida).
+    """
+    filas, columnas = forma_entrada[:2]
+    matriz = construir_matriz(tipo_transformacion, columnas, filas, **parametros)
+    forma_salida = (filas, columnas)
+    if expandir:
+        matriz, forma_salida = ajustar_lienzo(matriz, columnas, filas)
+    matriz_inversa = np.linalg.inv(matriz)
+
+    permutacion = permutacion_entera(matriz, matriz_inversa)
+    if permutacion is not None:
+        return (lambda fotograma: remapear_permutacion(fotograma, permutacion, forma_salida)), forma_salida
+    mapa = calcular_mapa(matriz, (filas, columnas), forma_salida, interpolacion, matriz_inversa, precision)
+    return (lambda fotograma: remapear(fotograma, mapa)), forma_salida
+
+
+def abrir_escritor(ruta_salida, forma_salida, fps, codec=None):
+    """
+    Abre el escritor de un clip: una secuencia de imágenes si la ruta es un patrón numerado, o
+    un vídeo con el códec indicado o el propio del contenedor.
+
+    Parámetros:
+        ruta_salida (str): Ruta del vídeo o patrón de la secuencia de salida.
+        forma_salida (tuple): (filas, columnas) de los fotogramas.
+        fps (float): Fotogramas por segundo.
+        codec (str): Código FOURCC de cuatro letras. Por defecto, según la extensión.
+
+    Retorna:
+        cv2.VideoWriter: Escritor abierto, o None si OpenCV no pudo abrirlo.
+    """
+    filas, columnas = forma_salida
+    if es_secuencia(ruta_salida):
+        escritor = cv2.VideoWriter(ruta_salida, 0, 0, (columnas, filas))
+    else:
+        extension = os.path.splitext(ruta_salida)[1].lower()
+        codec = codec or CODECS_VIDEO.get(extension, CODEC_POR_DEFECTO)
+        escritor = cv2.VideoWriter(ruta_salida, cv2.VideoWriter_fourcc(*codec), fps, (columnas, filas))
+    return escritor if escritor.isOpened() else None
+
+
+def procesar_video(ruta_entrada, tipo_transformacion, directorio_salida=None, interpolacion="vecino",
+                   expandir=False, codec=None, capacidad_cola=4, progreso=None, cancelar=None, precision="doble",
+                   **parametros):
+    """
+    Transforma un vídeo o una secuencia numerada fotograma a fotograma y guarda el resultado.
+
+    La lectura, la transformación y la escritura trabajan a la vez en tres hilos unidos por colas
+    de capacidad limitada, de modo que en memoria nunca hay más de `2 * capacidad_cola + 3`
+    fotogramas, sin importar la duración del clip. El mapa de coordenadas se calcula con el primer
+    fotograma y se reutiliza en todos los demás.
+
+    Parámetros:
+        ruta_entrada (str): Ruta del vídeo o patrón de la secuencia (p. ej. `f_%04d.png`).
+        tipo_transformacion (str): 'rotar', 'escalar', 'reflejar', 'trasladar' o 'compuesta'.
+        directorio_salida (str): Carpeta raíz de salida, o None para `processed/`.
+        interpolacion (str): 'vecino' (por defecto), 'bilineal' o 'bicubica'.
+        expandir (bool): Si es True, el destino se ajusta a la imagen transformada completa.
+        codec (str): Código FOURCC del vídeo de salida. Por defecto, según la extensión.
+        capacidad_cola (int): Fotogramas que caben en cada cola entre etapas.
+        progreso (callable): Si se indica, se llama como `progreso(hechos, total, ruta_salida)`
+                             tras escribir cada fotograma; `total` es None si el contenedor no
+                             informa cuántos fotogramas tiene.
+        cancelar (threading.Event): Si se indica y se activa, se dejan de leer fotogramas y el
+                                    clip se cierra con los ya escritos.
+        precision (str): 'doble' (por defecto) o 'compacta' (ver `mapas.calcular_mapa`).
+        **parametros: Parámetros de la transformación (ver `procesamiento.procesar_imagenes`).
+
+    Excepciones:
+        ValueError: Si el tipo de transformación o la interpolación no son válidos.
+
+    Retorna:
+        str: Ruta del vídeo o patrón de la secuencia guardada, o None si no se pudo leer o escribir.
+    """
+    carpeta_tipo = preparar_carpeta(directorio_salida, tipo_transformacion, interpolacion, precision)
+    captura = cv2.VideoCapture(ruta_entrada)
+    correcto, primero = captura.read() if captura.isOpened() else (False, None)
+    if not correcto:
+        captura.release()
+        print(f"No se pudo cargar el vídeo desde {ruta_entrada}.")
+        return None
+
+    fps = captura.get(cv2.CAP_PROP_FPS) or 25.0
+    total = int(captura.get(cv2.CAP_PROP_FRAME_COUNT)) or None
+    transformar, forma_salida = preparar_transformacion(tipo_transformacion, primero.shape, interpolacion,
+                                                        expandir, precision, **parametros)
+    output_path = os.path.join(carpeta_tipo, os.path.basename(ruta_entrada))
+    escritor = abrir_escritor(output_path, forma_salida, fps, codec)
+    if escritor is None:
+        captura.release()
+        print(f"No se pudo abrir {output_path} para escribir.")
+        return None
+
+    cancelar = cancelar or threading.Event()
+    detener = threading.Event()
+    cola_fotogramas = queue.Queue(maxsize=capacidad_cola)
+    cola_resultados = queue.Queue(maxsize=capacidad_cola)
+    escritos = [0]
+
+    def leer():
+        fotograma = primero
+        while fotograma is not None and not (cancelar.is_set() or detener.is_set()):
+            cola_fotogramas.put(fotograma)
+            correcto, fotograma = captura.read()
+            if not correcto:
+                fotograma = None
+        cola_fotogramas.put(_FIN)
+
+    def escribir():
+        while True:
+            fotograma = cola_resultados.get()
+            if fotograma is _FIN:
+                return
+            escritor.write(fotograma)
+            escritos[0] += 1
+            if progreso is not None:
+                progreso(escritos[0], total, output_path)
+
+    lector = threading.Thread(target=leer, daemon=True)
+    escritora = threading.Thread(target=escribir, daemon=True)
+    lector.start()
+    escritora.start()
+    try:
+        while True:
+            fotograma = cola_fotogramas.get()
+            if fotograma is _FIN:
+                break
+            cola_resultados.put(transformar(fotograma))
+    finally:
+        # Si la transformación falla, el lector puede estar esperando sitio en la cola.
+        detener.set()
+        while lector.is_alive():
+            try:
+                cola_fotogramas.get(timeout=0.05)
+            except queue.Empty:
+                pass
+        cola_resultados.put(_FIN)
+        escritora.join()
+        captura.release()
+        escritor.release()
+
+    print(f"Procesado y guardado en: {output_path} ({escritos[0]} fotogramas)")
+    return output_path
+
+
+def procesar_videos(videos, tipo_transformacion, directorio_salida=None, interpolacion="vecino",
+                    expandir=False, codec=None, cancelar=None, precision="doble", **parametros):
+    """
+    Procesa varios vídeos o secuencias, uno tras otro, con `procesar_video`.
+
+    Un error en un clip se informa y no detiene los demás.
+
+    Parámetros:
+        videos (list): Rutas de los vídeos o patrones de las secuencias.
+        tipo_transformacion (str): Tipo de transformación.
+        directorio_salida (str): Carpeta raíz de salida, o None para `processed/`.
+        interpolacion (str): 'vecino' (por defecto), 'bilineal' o 'bicubica'.
+        expandir (bool): Si es True, el destino se ajusta a la imagen transformada completa.
+        codec (str): Código FOURCC de los vídeos de salida. Por defecto, según la extensión.
+        cancelar (threading.Event): Si se indica y se activa, no se empiezan más clips.
+        precision (str): 'doble' (por defecto) o 'compacta' (ver `mapas.calcular_mapa`).
+        **parametros: Parámetros de la transformación (ver `procesamiento.procesar_imagenes`).
+
+    Excepciones:
+        ValueError: Si el tipo de transformación o la interpolación no son válidos.
+
+    Retorna:
+        list: Rutas de los clips guardados, en el mismo orden que `videos`.
+    """
+    preparar_carpeta(directorio_salida, tipo_transformacion, interpolacion, precision)
+    guardados = []
+    for ruta_entrada in videos:
+        if cancelar is not None and cancelar.is_set():
+            break
+        try:
+            output_path = procesar_video(ruta_entrada, tipo_transformacion, directorio_salida,
+                                         interpolacion=interpolacion, expandir=expandir, codec=codec,
+                                         cancelar=cancelar, precision=precision, **parametros)
+        except Exception as error:
+            print(f"Error al procesar {ruta_entrada}: {type(error).__name__}: {error}")
+            continue
+        if output_path is not None:
+            guardados.append(output_path)
+    return guardados
@@ -0,0 +1,291 @@
+"""
+Vigilancia de una carpeta de entrada para procesar imágenes a medida que llegan.
+
+Un proceso de larga duración revisa la carpeta cada poco tiempo. Un archivo se considera
+completo cuando su tamaño y su fecha de modificación no cambian durante un tiempo (así no se
+lee una imagen a medio copiar); las imágenes listas se agrupan en lotes y se envían a
+`procesar_imagenes` con la transformación configurada. El pool de trabajadores se crea una sola
+vez y sigue vivo entre lotes, con sus cachés de mapas ya llenas.
+
+Cada lote se anota en el manifiesto de la carpeta de salida y se procesa con `reanudar`, de
+modo que al reiniciar la vigilancia las imágenes ya transformadas no se repiten. Periódicamente
+se informa la profundidad de la cola y la latencia desde que un archivo aparece hasta que se
+guarda su resultado, para dimensionar el pool.
+"""
+import collections
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from metricas import percentil
+from procesamiento import preparar_carpeta, procesar_imagenes
+
+EXTENSIONES_IMAGEN = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp")
+"""
+Extensiones de los archivos que se vigilan; los demás (temporales, parciales) se ignoran.
+"""
+
+MUESTRAS_LATENCIA = 1000
+"""
+Latencias más recientes que se conservan para calcular los percentiles del informe.
+"""
+
+
+class VigilanteCarpeta:
+    """
+    Vigila una carpeta y procesa con una transformación fija cada imagen nueva o modificada.
+
+    Atributos:
+        carpeta_entrada (str): Carpeta vigilada (sin subcarpetas).
+        espera_estable (float): Segundos que un archivo debe pasar sin cambios para procesarse.
+        tamano_lote (int): Imágenes que se envían como máximo en cada lote.
+        intervalo (float): Segundos entre dos revisiones de la carpeta.
+        intervalo_informe (float): Segundos entre dos informes en consola; 0 no informa.
+    """
+
+    def __init__(self, carpeta_entrada, tipo_transformacion, directorio_salida=None, trabajadores=None,
+                 ejecutor="procesos", espera_estable=1.0, tamano_lote=32, intervalo=0.25, intervalo_informe=10.0,
+                 **opciones):
+        """
+        Parámetros:
+            carpeta_entrada (str): Carpeta que se vigila.
+            tipo_transformacion (str): Tipo de transformación (ver `procesar_imagenes`).
+            directorio_salida (str): Carpeta raíz de salida (ver `procesar_imagenes`).
+            trabajadores (int): Trabajadores del pool persistente. None o 1 procesa en el hilo
+                                de despacho, sin pool.
+            ejecutor (str): 'procesos' (por defecto) o 'hilos'.
+            espera_estable (float): Segundos sin cambios de tamaño ni fecha para dar un archivo
+                                    por completo.
+            tamano_lote (int): Imágenes por lote como máximo.
+            intervalo (float): Segundos entre revisiones de la carpeta.
+            intervalo_informe (float): Segundos entre informes en consola; 0 no informa.
+            **opciones: Resto de argumentos de `procesar_imagenes` (interpolacion, expandir,
+                        precision, tam_bloque...) y parámetros de la transformación.
+
+        Excepciones:
+            ValueError: Si el tipo de transformación, la interpolación, la precisión o el
+                        ejecutor no son válidos, o si la carpeta de entrada no existe.
+        """
+        if not os.path.isdir(carpeta_entrada):
+            raise ValueError(f"La carpeta {carpeta_entrada} no existe.")
+        if ejecutor not in ("procesos", "hilos"):
+            raise ValueError("Ejecutor no válido. Usa 'procesos' o 'hilos'.")
+        preparar_carpeta(directorio_salida, tipo_transformacion, opciones.get("interpolacion", "vecino"),
+                         opciones.get("precision", "doble"))
+        self.carpeta_entrada = carpeta_entrada
+        self.espera_estable = espera_estable
+        self.tamano_lote = max(1, tamano_lote)
+        self.intervalo = intervalo
+        self.intervalo_informe = intervalo_informe
+        self._tipo = tipo_transformacion
+        self._directorio_salida = directorio_salida
+        self._trabajadores = trabajadores
+        self._ejecutor = ejecutor
+        self._opciones = opciones
+        self._pool = None
+
+        # Archivos vistos que aún no se enviaron: ruta -> (tamaño, fecha, vista_en, sin_cambios_desde).
+        self._pendientes = {}
+        # Versión (tamaño, fecha) ya enviada de cada archivo, para no repetirlo mientras no cambie.
+        self._enviados = {}
+        # Instante en que se vio cada archivo enviado, por nombre de salida, para medir la latencia.
+        self._llegadas = {}
+        self._latencias = collections.deque(maxlen=MUESTRAS_LATENCIA)
+        # Rutas de lotes que fallaron enteros, para que el hilo que revisa las vuelva a intentar.
+        self._reintentos = set()
+        self._candado = threading.Lock()
+        self._despacho = None
+        self.procesadas = 0
+        self.fallidas = 0
+        self.cola_maxima = 0
+
+    def revisar(self, ahora=None):
+        """
+        Recorre la carpeta una vez y actualiza los archivos pendientes.
+
+        Parámetros:
+            ahora (float): Instante de la revisión (`time.monotonic`). Por defecto, el actual.
+
+        Retorna:
+            list: Rutas listas para procesar (sin cambios durante `espera_estable`), de la más
+                  antigua a la más nueva.
+        """
+        ahora = time.monotonic() if ahora is None else ahora
+        with self._candado:
+            reintentos, self._reintentos = self._reintentos, set()
+        for ruta in reintentos:
+            self._enviados.pop(ruta, None)
+        presentes = set()
+        with os.scandir(self.carpeta_entrada) as entradas:
+            for entrada in entradas:
+                if not entrada.is_file() or not entrada.name.lower().endswith(EXTENSIONES_IMAGEN):
+                    continue
+                try:
+                    estado = entrada.stat()
+                except OSError:
+                    continue  # Se borró o renombró entre el listado y la consulta.
+                ruta = entrada.path
+                version = (estado.st_size, estado.st_mtime_ns)
+                presentes.add(ruta)
+                if self._enviados.get(ruta) == version:
+                    continue
+                anterior = self._pendientes.get(ruta)
+                if anterior is None:
+                    self._pendientes[ruta] = version + (ahora, ahora)
+                elif anterior[:2] != version:
+                    # Aún se está escribiendo: se reinicia la espera, pero se conserva la llegada.
+                    self._pendientes[ruta] = version + (anterior[2], ahora)
+
+        for registro in (self._pendientes, self._enviados):
+            for ruta in [ruta for ruta in registro if ruta not in presentes]:
+                del registro[ruta]
+        self.cola_maxima = max(self.cola_maxima, len(self._pendientes))
+
+        listos = [(datos[2], ruta) for ruta, datos in self._pendientes.items()
+                  if ahora - datos[3] >= self.espera_estable and datos[0] > 0]
+        return [ruta for _, ruta in sorted(listos)]
+
+    def enviar(self, rutas):
+        """
+        Procesa un lote de imágenes listas con `procesar_imagenes` y registra sus latencias.
+
+        Parámetros:
+            rutas (list): Rutas devueltas por `revisar`.
+
+        Retorna:
+            list: Rutas de las imágenes guardadas.
+        """
+        self._reservar(rutas)
+        return self._procesar(rutas)
+
+    def _reservar(self, rutas):
+        """
+        Saca un lote de los pendientes y anota cuándo llegó cada imagen. Se llama desde el hilo
+        que revisa la carpeta, el único que modifica los pendientes.
+        """
+        for ruta in rutas:
+            tamano, fecha, vista_en, _ = self._pendientes.pop(ruta)
+            self._enviados[ruta] = (tamano, fecha)
+            with self._candado:
+                self._llegadas[os.path.basename(ruta)] = vista_en
+
+    def _procesar(self, rutas):
+        """
+        Envía a `procesar_imagenes` un lote ya reservado; puede ejecutarse en otro hilo. Si el
+        lote falla entero, el error se informa y sus imágenes se marcan para reintentarlas.
+
+        Retorna:
+            list: Rutas de las imágenes guardadas.
+        """
+        def progreso(hechas, total, ruta_salida):
+            if ruta_salida is None:
+                return
+            with self._candado:
+                vista_en = self._llegadas.pop(os.path.basename(ruta_salida), None)
+                if vista_en is not None:
+                    self._latencias.append(time.monotonic() - vista_en)
+
+        try:
+            guardadas = procesar_imagenes(rutas, self._tipo, mostrar=False, directorio_salida=self._directorio_salida,
+                                          trabajadores=self._trabajadores, ejecutor=self._pool or self._ejecutor,
+                                          reanudar=True, progreso=progreso, **self._opciones)
+        except Exception as error:
+            # Si el lote entero falla, sus imágenes cuentan como fallidas y se vuelven a enviar en
+            # la siguiente revisión; la vigilancia sigue con lo que llegue después.
+            print(f"Error al procesar un lote de {len(rutas)} imágenes: {type(error).__name__}: {error}")
+            with self._candado:
+                for ruta in rutas:
+                    self._llegadas.pop(os.path.basename(ruta), None)
+                self.fallidas += len(rutas)
+                self._reintentos.update(rutas)
+            return []
+        with self._candado:
+            # Las imágenes ya al día no pasan por `progreso`; sus llegadas se descartan aquí.
+            for ruta in rutas:
+                self._llegadas.pop(os.path.basename(ruta), None)
+            self.procesadas += len(guardadas)
+            self.fallidas += len(rutas) - len(guardadas)
+        return guardadas
+
+    def estadisticas(self):
+        """
+        Resume el estado de la vigilancia.
+
+        Retorna:
+            dict: 'cola' (archivos vistos sin enviar, incluidos los que aún se escriben),
+                  'cola_maxima', 'en_curso' (si hay un lote procesándose), 'procesadas',
+                  'fallidas' y 'latencia' (p50, p95 y máximo en segundos de las últimas
+                  `MUESTRAS_LATENCIA` imágenes, desde que se vieron hasta que se guardaron).
+        """
+        with self._candado:
+            latencias = list(self._latencias)
+            procesadas, fallidas = self.procesadas, self.fallidas
+        return {
+            "cola": len(self._pendientes),
+            "cola_maxima": self.cola_maxima,
+            "en_curso": self._despacho is not None and self._despacho.is_alive(),
+            "procesadas": procesadas,
+            "fallidas": fallidas,
+            "latencia": {
+                "p50": percentil(latencias, 50),
+                "p95": percentil(latencias, 95),
+                "maxima": max(latencias, default=0.0),
+            },
+        }
+
+    def informar(self):
+        """
+        Muestra en consola una línea con la cola, las imágenes procesadas y la latencia.
+
+        No retorna ningún valor.
+        """
+        resumen = self.estadisticas()
+        latencia = resumen["latencia"]
+        print(f"Cola: {resumen['cola']} (máx. {resumen['cola_maxima']}) · procesadas {resumen['procesadas']} · "
+              f"fallidas {resumen['fallidas']} · latencia p50 {latencia['p50']:.2f} s "
+              f"p95 {latencia['p95']:.2f} s máx. {latencia['maxima']:.2f} s")
+
+    def ejecutar(self, detener=None):
+        """
+        Vigila la carpeta hasta que se active `detener` o se pulse Ctrl+C.
+
+        Mientras un lote se procesa en segundo plano la carpeta se sigue revisando, y lo que
+        llega entretanto forma el lote siguiente, de modo que con mucha carga los lotes crecen
+        hasta `tamano_lote` y con poca cada imagen sale en cuanto está completa. Al detenerse se
+        espera a que termine el lote en curso.
+
+        Parámetros:
+            detener (threading.Event): Evento para detener la vigilancia desde otro hilo.
+
+        No retorna ningún valor.
+        """
+        detener = detener or threading.Event()
+        if self._trabajadores and self._trabajadores > 1:
+            clase = ProcessPoolExecutor if self._ejecutor == "procesos" else ThreadPoolExecutor
+            self._pool = clase(max_workers=self._trabajadores)
+            # Se arrancan todos los trabajadores ahora y no con la primera imagen.
+            list(self._pool.map(abs, range(self._trabajadores)))
+        print(f"Vigilando {self.carpeta_entrada} (Ctrl+C para terminar).")
+        proximo_informe = time.monotonic() + self.intervalo_informe
+        try:
+            while not detener.is_set():
+                listos = self.revisar()
+                if listos and (self._despacho is None or not self._despacho.is_alive()):
+                    lote = listos[:self.tamano_lote]
+                    self._reservar(lote)
+                    self._despacho = threading.Thread(target=self._procesar, args=(lote,), daemon=True)
+                    self._despacho.start()
+                if self.intervalo_informe and time.monotonic() >= proximo_informe:
+                    self.informar()
+                    proximo_informe = time.monotonic() + self.intervalo_informe
+                detener.wait(self.intervalo)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self._despacho is not None:
+                self._despacho.join()
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+            self.informar()